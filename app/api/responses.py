@@ -0,0 +1,176 @@
+"""
+Fast JSON responses
+
+Routes render through orjson instead of the stdlib encoder. Row-heavy
+routes go further and return ``json_response(request, payload)``: the
+payload is serialized straight from its dicts and lists (skipping FastAPI's
+``jsonable_encoder`` pass) and compressed with brotli or gzip when the
+client accepts it. Columnar payloads of numpy arrays serialize natively.
+
+Rows can also be sent column by column, as JSON arrays (``to_columns``) or
+as an Arrow IPC stream (``arrow_stream``), with repetitive string columns
+dictionary-encoded.
+"""
+
+import gzip
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+# Bodies larger than this are compressed off the event loop
+COMPRESS_IN_THREAD_BYTES = 256 * 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding in an Accept-Encoding header"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    candidates = [
+        coding
+        for coding in supported
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    # Prefer the client's highest q-value; ties go to the order above
+    return max(candidates, key=lambda c: accepted.get(c, accepted.get("*", 0.0)))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+async def encoded_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Response of ``body``, compressed as the client negotiates"""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        if len(body) > COMPRESS_IN_THREAD_BYTES:
+            body = await run_in_threadpool(compress, body, encoding)
+        else:
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(
+        body, status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
+async def json_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize ``content`` with orjson, compressed as the client negotiates"""
+    return await encoded_response(
+        request, dumps(content), "application/json", status_code, headers
+    )
+
+
+def to_columns(
+    rows: Sequence[Dict[str, Any]], dictionary: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """Columnar form of ``rows``: one array per field, in first-seen order
+
+    Fields missing from a row are null. Each ``dictionary`` column holds
+    integer codes into its list under ``dictionaries``.
+    """
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    data: Dict[str, List[Any]] = {
+        name: [row.get(name) for row in rows] for name in names
+    }
+    dictionaries: Dict[str, List[Any]] = {}
+    for name in dictionary:
+        if name not in data:
+            continue
+        codes: Dict[Any, int] = {}
+        data[name] = [codes.setdefault(value, len(codes)) for value in data[name]]
+        dictionaries[name] = list(codes)
+    return {
+        "format": "columnar",
+        "count": len(rows),
+        "columns": names,
+        "data": data,
+        "dictionaries": dictionaries,
+    }
+
+
+def arrow_stream(columns: Dict[str, Any]) -> bytes:
+    """Arrow IPC stream of a ``to_columns`` payload, keeping its dictionaries
+
+    Needs pyarrow; raises RuntimeError without it.
+    """
+    from app.services.exports import load_pyarrow
+
+    pa, _ = load_pyarrow("Arrow output")
+    arrays = {}
+    for name in columns["columns"]:
+        values = columns["data"][name]
+        if name in columns["dictionaries"]:
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(values, pa.int32()), pa.array(columns["dictionaries"][name])
+            )
+        elif any(isinstance(value, dict) for value in values):
+            # Label sets differ per row, so send them as maps rather than structs
+            arrays[name] = pa.array(
+                [None if value is None else list(value.items()) for value in values],
+                pa.map_(pa.string(), pa.string()),
+            )
+        else:
+            arrays[name] = pa.array(values)
+    table = pa.table(arrays)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
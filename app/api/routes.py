@@ -1,111 +1,445 @@
+import asyncio
 import csv
 import io
 import json
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from fastapi import (
     APIRouter,
     HTTPException,
+    Path,
     Query,
+    Request,
     Response,
     WebSocket,
     WebSocketDisconnect,
 )
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from ..services.cost_model import CostModel
 from ..services.database import db_service
+from ..services.exports import ENCODERS, EXPORT_FORMATS, load_pyarrow
 from ..services.forecasting import forecast_service
-from ..services.k8s_client import KubernetesClient
+from ..services.history_writer import history_writer
+from ..services.label_selector import parse_label_selector
+from ..services.metrics_collector import MetricsSnapshot, metrics_collector
+from ..services.pod_index import (
+    SORT_COLUMNS,
+    PodIndex,
+    PodPage,
+    decode_key,
+    encode_key,
+    snapshot_index,
+)
 from ..services.recommendations import recommendation_service
+from ..services.response_cache import response_cache
+from ..services.retention import retention_scheduler
+from ..services.storage import decode_cursor, encode_cursor
+from ..services.topics import TopicFeed, parse_topic
+from .responses import (
+    FastJSONResponse,
+    arrow_stream,
+    dumps,
+    encoded_response,
+    json_response,
+    to_columns,
+)
+
+router = APIRouter(default_response_class=FastJSONResponse)
+k8s_client = metrics_collector.k8s_client
+cost_model = metrics_collector.cost_model
+
+CLUSTER_UNAVAILABLE = (
+    "Kubernetes cluster not available. Please ensure cluster is "
+    "running and metrics-server is installed."
+)
+
 
-router = APIRouter()
-k8s_client = KubernetesClient()
-cost_model = CostModel()
+async def get_available_snapshot(
+    detail: str = CLUSTER_UNAVAILABLE,
+) -> MetricsSnapshot:
+    """Latest collected snapshot, or 503 if the cluster could not be scraped"""
+    snapshot = await metrics_collector.get_snapshot()
+    if not snapshot.available:
+        raise HTTPException(status_code=503, detail=detail)
+    return snapshot
+
+
+def snapshot_frame(snapshot: MetricsSnapshot) -> str:
+    """WebSocket message for a snapshot, encoded once for every subscriber"""
+    if not snapshot.namespaces:
+        return json.dumps({"type": "error", "message": "Cluster unavailable"})
+    return dumps(
+        {
+            "type": "metrics_update",
+            "data": snapshot.namespaces,
+            "timestamp": snapshot.timestamp,
+            **snapshot.metadata(),
+        }
+    ).decode()
+
+
+class Subscriber:
+    """One WebSocket connection and the version it last received per topic
+
+    Connections that never subscribe get the legacy full ``metrics_update``
+    frame for each snapshot.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # Holds at most one pending wake-up, so bursts coalesce
+        self.wakeup: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.topics: Dict[str, int] = {}
+        self.subscribed = False
+        self.legacy_version = 0
+        self.notices: List[str] = []
 
 
 # WebSocket connections manager
 class ConnectionManager:
+    """Pushes each published snapshot to every connected WebSocket
+
+    Every connection has its own sender task woken through a one-slot queue,
+    so sends run concurrently and a slow client skips straight to the newest
+    state instead of holding up the others or buffering without bound. Topic
+    subscribers get a full frame first and then only deltas; one that missed
+    a delta is sent a full frame again.
+    """
+
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: Dict[WebSocket, Subscriber] = {}
+        self.feed = TopicFeed()
+        self.snapshot: Optional[MetricsSnapshot] = None
+        self._legacy_frame: Optional[str] = None
+        self.stats = {
+            "broadcasts": 0,
+            "frames_sent": 0,
+            "bytes_sent": 0,
+            "frames_dropped": 0,
+        }
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> Subscriber:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        subscriber = Subscriber(websocket)
+        self.active_connections[websocket] = subscriber
+        if self.snapshot is not None:
+            self._wake(subscriber)
+        return subscriber
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        self.active_connections.pop(websocket, None)
+
+    def _wake(self, subscriber: Subscriber):
+        if subscriber.wakeup.full():
+            # Whatever it has not sent yet is superseded by the newest state
+            self.stats["frames_dropped"] += 1
+        else:
+            subscriber.wakeup.put_nowait(None)
+
+    def push_snapshot(self, snapshot: MetricsSnapshot):
+        """Snapshot listener: bring every subscriber up to ``snapshot``"""
+        self.snapshot = snapshot
+        self._legacy_frame = None
+        if snapshot.available:
+            topics = {
+                topic
+                for subscriber in self.active_connections.values()
+                for topic in subscriber.topics
+            }
+            self.feed.publish(snapshot, topics)
+        self.stats["broadcasts"] += 1
+        for subscriber in self.active_connections.values():
+            self._wake(subscriber)
+
+    def legacy_frame(self) -> str:
+        if self._legacy_frame is None:
+            self._legacy_frame = snapshot_frame(self.snapshot)
+        return self._legacy_frame
+
+    def subscribe(self, subscriber: Subscriber, topics: List[str]):
+        subscriber.subscribed = True
+        for topic in topics:
+            if parse_topic(topic) is None:
+                subscriber.notices.append(
+                    json.dumps({"type": "error", "message": f"Unknown topic: {topic}"})
+                )
+                continue
+            subscriber.topics.setdefault(topic, 0)
+            if self.snapshot is not None and self.snapshot.available:
+                self.feed.track(topic, self.snapshot)
+        self._wake(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, topics: List[str]):
+        for topic in topics:
+            subscriber.topics.pop(topic, None)
+
+    def resync(self, subscriber: Subscriber, topics: List[str]):
+        """Send full frames again, e.g. after a client lost its state"""
+        for topic in topics:
+            if topic in subscriber.topics:
+                subscriber.topics[topic] = 0
+        self._wake(subscriber)
+
+    def resend_latest(self, websocket: WebSocket):
+        subscriber = self.active_connections.get(websocket)
+        if subscriber is not None:
+            subscriber.legacy_version = 0
+            self._wake(subscriber)
+
+    def _pending_frames(self, subscriber: Subscriber) -> List[str]:
+        frames, subscriber.notices = subscriber.notices, []
+        if self.snapshot is None:
+            return frames
+
+        if not subscriber.subscribed:
+            if subscriber.legacy_version != self.snapshot.version:
+                frames.append(self.legacy_frame())
+                subscriber.legacy_version = self.snapshot.version
+            return frames
+
+        for topic, sent_version in subscriber.topics.items():
+            frame, version = self.feed.frame(topic, sent_version)
+            if frame is not None:
+                frames.append(frame)
+                subscriber.topics[topic] = version
+        return frames
+
+    async def send_frames(self, subscriber: Subscriber):
+        """Send one client whatever is new each time it is woken"""
+        try:
+            while True:
+                await subscriber.wakeup.get()
+                for frame in self._pending_frames(subscriber):
+                    await subscriber.websocket.send_text(frame)
+                    self.stats["frames_sent"] += 1
+                    self.stats["bytes_sent"] += len(frame)
+        except Exception:
+            # The receive loop sees the disconnect and cleans up
+            pass
+
+    def handle_message(self, subscriber: Subscriber, text: str):
+        """Apply a client's ping or subscription request"""
+        if text == "ping":
+            self.resend_latest(subscriber.websocket)
+            return
+        try:
+            message = json.loads(text)
+            action = message["action"]
+            topics = message.get("topics", [])
+            if not isinstance(action, str) or not (
+                isinstance(topics, list)
+                and all(isinstance(topic, str) for topic in topics)
+            ):
+                raise TypeError("action must be a string and topics a list of strings")
+        except (ValueError, KeyError, TypeError):
+            subscriber.notices.append(
+                json.dumps({"type": "error", "message": "Invalid message"})
+            )
+            self._wake(subscriber)
+            return
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                pass
+        handlers = {
+            "subscribe": self.subscribe,
+            "unsubscribe": self.unsubscribe,
+            "resync": self.resync,
+        }
+        if action not in handlers:
+            subscriber.notices.append(
+                json.dumps({"type": "error", "message": f"Unknown action: {action}"})
+            )
+            self._wake(subscriber)
+            return
+        handlers[action](subscriber, topics)
 
+    def info(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.active_connections),
+            "topics": len(self.feed.topics),
+            **self.stats,
+            **self.feed.stats,
+        }
 
-manager = ConnectionManager()
 
+manager = ConnectionManager()
 
-@router.get("/api/namespaces")
-async def get_namespaces(
-    save_history: bool = Query(True, description="Save metrics to database")
-) -> Dict[str, Any]:
-    """Get real-time namespace cost data from Kubernetes cluster"""
-    namespace_usage = k8s_client.get_namespace_usage()
 
-    if namespace_usage is None:
-        raise HTTPException(
-            status_code=503,
-            detail=(
-                "Kubernetes cluster not available. Please ensure cluster is "
-                "running and metrics-server is installed."
-            ),
+ROWS_FORMAT = Query(
+    "json",
+    pattern="^(json|columnar|arrow)$",
+    description="Rows as JSON objects, JSON columns or an Arrow IPC stream",
+)
+# Columns sent as codes into a list of their distinct values
+DICTIONARY_COLUMNS = ("namespace", "node")
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+async def rows_response(
+    request: Request,
+    snapshot: MetricsSnapshot,
+    endpoint: str,
+    params: Optional[Dict[str, Any]],
+    rows: List[Dict[str, Any]],
+    format: str,
+    page: Optional[PodPage] = None,
+) -> Response:
+    """Snapshot rows in the requested format
+
+    Columnar and Arrow encodings are cached per snapshot version and
+    ``params``, so polling clients share one transformation of each
+    snapshot. Rows of an unpublished snapshot pass ``params=None`` and are
+    encoded per request. A ``page`` adds its
+    total and next cursor as fields, or as headers of an Arrow stream.
+    """
+    metadata = {"demo_mode": False, **snapshot.metadata()}
+    headers = {}
+    if page is not None:
+        next_cursor = encode_key(page.next_key) if page.next_key else None
+        metadata.update(total=page.total, next_cursor=next_cursor)
+        headers["X-Total-Count"] = str(page.total)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    if format == "json":
+        return await json_response(request, {"data": rows, **metadata})
+
+    if format == "arrow":
+        try:
+            load_pyarrow("Arrow output")
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    async def encoded(kind: str, compute):
+        if params is None:
+            return await compute()
+        return await response_cache.get_or_compute(
+            f"{endpoint}:{kind}", {**params, "version": snapshot.version}, compute
         )
 
-    namespace_costs = cost_model.compute_cost(namespace_usage)
+    async def columns():
+        return to_columns(rows, DICTIONARY_COLUMNS)
+
+    columnar = await encoded("columnar", columns)
+    if format == "columnar":
+        return await json_response(request, {**columnar, **metadata})
+
+    async def arrow():
+        return await run_in_threadpool(arrow_stream, columnar)
 
-    # Save to database for historical tracking
+    body = await encoded("arrow", arrow)
+    return await encoded_response(
+        request,
+        body,
+        ARROW_STREAM,
+        headers={
+            **headers,
+            "X-Snapshot-Version": str(snapshot.version),
+            "X-Snapshot-Timestamp": snapshot.timestamp,
+            "X-Snapshot-Age-Seconds": str(round(snapshot.age_seconds(), 3)),
+        },
+    )
+
+
+@router.get("/api/namespaces")
+async def get_namespaces(
+    request: Request,
+    save_history: bool = Query(True, description="Save metrics to database"),
+    format: str = ROWS_FORMAT,
+) -> Response:
+    """Get namespace cost data from the latest cluster snapshot"""
+    snapshot = await get_available_snapshot()
+    namespace_costs = list(snapshot.namespaces)
+
+    # Queue the snapshot for historical tracking (deduplicated per interval)
     if save_history:
-        try:
-            await db_service.save_namespace_metrics(namespace_costs)
-        except Exception as e:
-            print(f"Warning: Failed to save metrics to database: {e}")
+        history_writer.submit(snapshot)
 
-    return {"data": namespace_costs, "demo_mode": False}
+    return await rows_response(
+        request, snapshot, "namespaces", {}, namespace_costs, format
+    )
 
 
 @router.get("/api/pods")
 async def get_pods(
+    request: Request,
     namespace: str = None,
+    label_selector: Optional[str] = Query(
+        None, description="Kubernetes label selector, e.g. app=web,tier notin (batch)"
+    ),
+    name_prefix: Optional[str] = Query(None, description="Pod name prefix"),
+    min_hourly_cost: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(
+        None,
+        pattern=f"^-?({'|'.join(SORT_COLUMNS)})$",
+        description="Column to sort by, prefixed with - for descending",
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Rows per page"),
+    offset: int = Query(0, ge=0, description="Rows to skip"),
+    cursor: Optional[str] = Query(
+        None, description="Resume after this cursor (from next_cursor)"
+    ),
+    live: bool = Query(
+        False, description="Scrape the matching pods now instead of the snapshot"
+    ),
     save_history: bool = Query(True, description="Save metrics to database"),
-) -> Dict[str, Any]:
-    """Get real-time pod cost data from Kubernetes cluster"""
-    pod_usage = k8s_client.get_pod_usage()
-
-    if pod_usage is None:
-        raise HTTPException(
-            status_code=503,
-            detail=(
-                "Kubernetes cluster not available. Please ensure cluster is "
-                "running and metrics-server is installed."
-            ),
+    format: str = ROWS_FORMAT,
+) -> Response:
+    """Get pod cost data from the latest cluster snapshot
+
+    Filters, sorting and pages are evaluated against an index of the
+    snapshot. Rows are ordered by ``sort`` (namespace and pod name when
+    omitted); pass ``next_cursor`` back as ``cursor`` for the following page.
+    With ``live`` only the namespace and label selector are scraped, so the
+    cost of the request follows the size of the namespace, not the cluster.
+    """
+    try:
+        requirements = parse_label_selector(label_selector or "")
+        after = decode_key(cursor, sort) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if live:
+        snapshot = await metrics_collector.collect_scoped(
+            namespace or None, label_selector
         )
+        if not snapshot.available:
+            raise HTTPException(status_code=503, detail=CLUSTER_UNAVAILABLE)
+        index = PodIndex(snapshot.pods)
+    else:
+        snapshot = await get_available_snapshot()
+        index = snapshot_index(snapshot)
+    if snapshot.pods is None:
+        raise HTTPException(status_code=503, detail=CLUSTER_UNAVAILABLE)
+
+    page = index.query(
+        namespace=namespace or None,
+        requirements=requirements,
+        name_prefix=name_prefix,
+        min_hourly_cost=min_hourly_cost,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        after=after,
+    )
 
-    if namespace:
-        pod_usage = [pod for pod in pod_usage if pod["namespace"] == namespace]
-
-    pod_costs = cost_model.compute_cost(pod_usage)
-
-    # Save to database for historical tracking
-    if save_history:
-        try:
-            await db_service.save_pod_metrics(pod_costs)
-        except Exception as e:
-            print(f"Warning: Failed to save pod metrics to database: {e}")
-
-    return {"data": pod_costs, "demo_mode": False}
+    # Queue the snapshot for historical tracking (deduplicated per interval);
+    # a live scrape only covers part of the cluster
+    if save_history and not live:
+        history_writer.submit(snapshot)
+
+    params = {
+        "namespace": namespace or None,
+        "label_selector": label_selector,
+        "name_prefix": name_prefix,
+        "min_hourly_cost": min_hourly_cost,
+        "sort": sort,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+    }
+    return await rows_response(
+        request, snapshot, "pods", None if live else params, page.rows, format, page
+    )
 
 
 @router.get("/api/config")
@@ -129,14 +463,11 @@ async def health_check() -> Dict[str, Any]:
     is_simulated = k8s_client.simulated_cluster is not None
     k8s_available = k8s_client.metrics_api is not None or is_simulated
     metrics_available = False
+    snapshot = metrics_collector.snapshot
 
-    if k8s_available:
-        try:
-            # Try to fetch metrics to verify full functionality
-            namespace_usage = k8s_client.get_namespace_usage()
-            metrics_available = namespace_usage is not None and len(namespace_usage) > 0
-        except Exception as e:
-            print(f"Metrics check failed: {e}")
+    if snapshot is not None:
+        # Full functionality is verified by the background collector's scrapes
+        metrics_available = snapshot.available and len(snapshot.namespaces) > 0
 
     return {
         "status": "healthy",
@@ -144,6 +475,16 @@ async def health_check() -> Dict[str, Any]:
         "metrics_server_available": metrics_available,
         "demo_mode": False,
         "mode": "simulated" if is_simulated else "real",
+        "collection_interval_seconds": metrics_collector.interval,
+        "storage_backend": db_service.name,
+        "history_queue": {"pending": history_writer.pending, **history_writer.stats},
+        "response_cache": response_cache.info(),
+        "websocket": manager.info(),
+        "retention": {
+            "policies_days": retention_scheduler.policies,
+            **retention_scheduler.stats,
+        },
+        **(snapshot.metadata() if snapshot is not None else {}),
     }
 
 
@@ -152,23 +493,71 @@ async def health_check() -> Dict[str, Any]:
 
 @router.get("/api/history/namespaces")
 async def get_namespace_history(
+    request: Request,
     namespace: Optional[str] = Query(None, description="Filter by namespace"),
     hours: int = Query(24, description="Hours of history to retrieve"),
-) -> Dict[str, Any]:
-    """Get historical namespace metrics"""
+    limit: int = Query(1000, ge=1, le=10000, description="Rows per page"),
+    cursor: Optional[str] = Query(
+        None, description="Resume after this cursor (from next_cursor)"
+    ),
+    format: str = Query(
+        "json",
+        pattern="^(json|ndjson)$",
+        description="json: one page; ndjson: stream every remaining row",
+    ),
+):
+    """Get historical namespace metrics
+
+    Rows are paged on (timestamp, series) keyset order: pass ``next_cursor``
+    back as ``cursor`` for the following page. ``format=ndjson`` instead
+    streams all rows from the cursor to the end of the window, one JSON
+    object per line, reading ``limit`` rows from the database at a time.
+    """
     try:
-        history = await db_service.get_namespace_history(namespace, hours)
-        return {
-            "data": history,
-            "namespace": namespace,
-            "hours": hours,
-            "count": len(history),
-        }
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _ndjson_lines(
+                db_service.stream_namespace_history(namespace, hours, after, limit)
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        history, position = await db_service.get_namespace_history_page(
+            namespace, hours, after, limit
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving history: {str(e)}"
         )
 
+    return await json_response(
+        request,
+        {
+            "data": history,
+            "namespace": namespace,
+            "hours": hours,
+            "count": len(history),
+            "next_cursor": encode_cursor(position) if position else None,
+        },
+    )
+
+
+async def _ndjson_lines(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield dumps(row) + b"\n"
+
+
+async def _cost_trends(hours: int) -> Dict[str, Any]:
+    """Trends shared by the trend, forecast and budget endpoints"""
+    return await response_cache.get_or_compute(
+        "trends", {"hours": hours}, lambda: db_service.get_cost_trends(hours)
+    )
+
 
 @router.get("/api/history/trends")
 async def get_cost_trends(
@@ -176,8 +565,7 @@ async def get_cost_trends(
 ) -> Dict[str, Any]:
     """Get cost trend data for visualizations"""
     try:
-        trends = await db_service.get_cost_trends(hours)
-        return trends
+        return await _cost_trends(hours)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving trends: {str(e)}"
@@ -190,26 +578,92 @@ async def get_top_namespaces(
     hours: int = Query(24, description="Time period in hours"),
 ) -> Dict[str, Any]:
     """Get top namespaces by cost over a time period"""
-    try:
+
+    async def compute() -> Dict[str, Any]:
         top = await db_service.get_top_namespaces(limit, hours)
         return {"data": top, "limit": limit, "hours": hours}
+
+    try:
+        return await response_cache.get_or_compute(
+            "top-namespaces", {"limit": limit, "hours": hours}, compute
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving top namespaces: {str(e)}"
         )
 
 
+@router.get("/api/history/pods")
+async def get_pod_history(
+    request: Request,
+    namespace: str = Query(..., description="Namespace of the pod"),
+    pod: str = Query(..., description="Pod name"),
+    hours: int = Query(24, description="Hours of history to retrieve"),
+) -> Response:
+    """Get historical metrics of one pod"""
+    try:
+        history = await db_service.get_pod_history(namespace, pod, hours)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving pod history: {str(e)}"
+        )
+
+    return await json_response(
+        request,
+        {
+            "data": history,
+            "namespace": namespace,
+            "pod": pod,
+            "hours": hours,
+            "count": len(history),
+        },
+    )
+
+
+@router.get("/api/history/top-pods")
+async def get_top_pods(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000, description="Number of top pods"),
+    hours: int = Query(24, description="Time period in hours"),
+    namespace: Optional[str] = Query(None, description="Filter by namespace"),
+) -> Response:
+    """Get top pods by cost over a time period (window aligned to the hour)"""
+    try:
+        top = await db_service.get_top_pods(limit, hours, namespace)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving top pods: {str(e)}"
+        )
+
+    return await json_response(
+        request, {"data": top, "limit": limit, "hours": hours, "namespace": namespace}
+    )
+
+
+@router.get("/api/history/workloads/trends")
+async def get_workload_trends(
+    namespace: str = Query(..., description="Namespace of the workload"),
+    workload: str = Query(..., description="Workload name"),
+    hours: int = Query(168, description="Hours of trend data (default: 7 days)"),
+) -> Dict[str, Any]:
+    """Get cost trend data for one workload"""
+    try:
+        trends = await db_service.get_workload_trends(namespace, workload, hours)
+        return {"namespace": namespace, "workload": workload, **trends}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving workload trends: {str(e)}"
+        )
+
+
 # ==================== EXPORT ENDPOINTS ====================
 
 
 @router.get("/api/export/namespaces/csv")
 async def export_namespaces_csv():
     """Export namespace cost data as CSV"""
-    namespace_usage = k8s_client.get_namespace_usage()
-    if namespace_usage is None:
-        raise HTTPException(status_code=503, detail="Cluster not available")
-
-    namespace_costs = cost_model.compute_cost(namespace_usage)
+    snapshot = await get_available_snapshot("Cluster not available")
+    namespace_costs = snapshot.namespaces
 
     # Create CSV with all fields
     output = io.StringIO()
@@ -238,7 +692,9 @@ async def export_namespaces_csv():
             "Content-Disposition": (
                 f"attachment; filename=costkube_namespaces_"
                 f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            )
+            ),
+            "X-Snapshot-Timestamp": snapshot.timestamp,
+            "X-Snapshot-Age-Seconds": str(round(snapshot.age_seconds(), 3)),
         },
     )
 
@@ -246,11 +702,8 @@ async def export_namespaces_csv():
 @router.get("/api/export/namespaces/json")
 async def export_namespaces_json():
     """Export namespace cost data as JSON"""
-    namespace_usage = k8s_client.get_namespace_usage()
-    if namespace_usage is None:
-        raise HTTPException(status_code=503, detail="Cluster not available")
-
-    namespace_costs = cost_model.compute_cost(namespace_usage)
+    snapshot = await get_available_snapshot("Cluster not available")
+    namespace_costs = list(snapshot.namespaces)
 
     return Response(
         content=json.dumps(
@@ -258,6 +711,7 @@ async def export_namespaces_json():
                 "timestamp": datetime.now().isoformat(),
                 "data": namespace_costs,
                 "export_type": "namespaces",
+                **snapshot.metadata(),
             },
             indent=2,
         ),
@@ -271,33 +725,77 @@ async def export_namespaces_json():
     )
 
 
+# Rows fetched per database round trip while streaming an export
+EXPORT_PAGE_SIZE = 5000
+
+
+@router.get("/api/export/history/{level}")
+async def export_history(
+    level: str = Path(..., pattern="^(namespaces|pods)$"),
+    hours: int = Query(24, ge=1, description="Hours of history to export"),
+    namespace: Optional[str] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+):
+    """Stream raw namespace or pod samples of a window as CSV, NDJSON or Parquet"""
+    # Older raw samples have been purged, so a longer window would come back
+    # silently truncated
+    raw_days = retention_scheduler.policies["raw"]
+    if hours > raw_days * 24:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Raw samples are kept for {raw_days:g} days (RETENTION_RAW_DAYS); "
+                f"export at most {int(raw_days * 24)} hours"
+            ),
+        )
+    if format == "parquet":
+        try:
+            load_pyarrow()
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    pages = db_service.history_pages(
+        level, namespace, hours, page_size=EXPORT_PAGE_SIZE
+    )
+    scope = f"_{namespace}" if namespace else ""
+    return StreamingResponse(
+        ENCODERS[format](pages, level),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=costkube_{level}{scope}_{hours}h_"
+                f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+            )
+        },
+    )
+
+
 # ==================== RECOMMENDATIONS ENDPOINTS ====================
 
 
 @router.get("/api/recommendations")
 async def get_recommendations() -> Dict[str, Any]:
     """Get resource right-sizing recommendations for all namespaces"""
-    namespace_usage = k8s_client.get_namespace_usage()
-    if namespace_usage is None:
-        raise HTTPException(status_code=503, detail="Cluster not available")
+    snapshot = await get_available_snapshot("Cluster not available")
 
-    namespace_costs = cost_model.compute_cost(namespace_usage)
-    recommendations = recommendation_service.analyze_all_namespaces(namespace_costs)
+    async def compute() -> Dict[str, Any]:
+        return recommendation_service.analyze_all_namespaces(list(snapshot.namespaces))
 
-    return recommendations
+    # Only the analysis is cached; snapshot age is reported per request
+    recommendations = await response_cache.get_or_compute(
+        "recommendations", {"version": snapshot.version}, compute
+    )
+    return {**recommendations, **snapshot.metadata()}
 
 
 @router.get("/api/recommendations/idle")
 async def get_idle_resources() -> Dict[str, Any]:
     """Get idle or underutilized resources"""
-    namespace_usage = k8s_client.get_namespace_usage()
-    if namespace_usage is None:
-        raise HTTPException(status_code=503, detail="Cluster not available")
-
-    namespace_costs = cost_model.compute_cost(namespace_usage)
+    snapshot = await get_available_snapshot("Cluster not available")
     idle_resources = []
 
-    for ns in namespace_costs:
+    for ns in snapshot.namespaces:
         idle_check = recommendation_service.detect_idle_resources(ns)
         if idle_check:
             idle_resources.append(idle_check)
@@ -308,6 +806,7 @@ async def get_idle_resources() -> Dict[str, Any]:
         "idle_resources": idle_resources,
         "count": len(idle_resources),
         "total_potential_savings": total_savings,
+        **snapshot.metadata(),
     }
 
 
@@ -320,43 +819,13 @@ async def get_cost_forecast(
 ) -> Dict[str, Any]:
     """Get cost forecast based on historical trends"""
     try:
-        # Get historical data
-        trends = await db_service.get_cost_trends(hours=168)  # Last 7 days
-
-        if not trends["timestamps"] or len(trends["timestamps"]) < 2:
-            # Return a friendly response instead of error when insufficient data
-            return {
-                "error": "insufficient_data",
-                "message": "Collecting historical data for forecasting. Check back in 24 hours.",
-                "forecast_monthly_total": 0,
-                "current_monthly_cost": 0,
-                "trend": "unknown",
-                "forecast_dates": [],
-                "forecast_costs": []
-            }
-
-        # Prepare data for forecasting
-        historical_data = [
-            {"timestamp": ts, "total_cost": cost, "hourly_cost": cost}
-            for ts, cost in zip(trends["timestamps"], trends["costs"])
-        ]
-
-        forecast = forecast_service.forecast_costs(historical_data, days)
-
-        if "error" in forecast:
-            # Return friendly error response instead of HTTP 400
-            return {
-                "error": forecast.get("error", "unknown"),
-                "message": forecast.get("error", "Unable to generate forecast"),
-                "forecast_monthly_total": 0,
-                "current_monthly_cost": 0,
-                "trend": "unknown",
-                "forecast_dates": [],
-                "forecast_costs": []
-            }
-
+        forecast = await response_cache.get_or_compute(
+            "forecast", {"days": days}, lambda: _forecast(days)
+        )
+        if "timestamp" in forecast:
+            # Stamp each response, not the cached computation
+            forecast = {**forecast, "timestamp": datetime.now().isoformat()}
         return forecast
-
     except HTTPException:
         raise
     except Exception as e:
@@ -372,13 +841,53 @@ async def get_cost_forecast(
         }
 
 
+async def _forecast(days: int) -> Dict[str, Any]:
+    """Forecast from the last 7 days of trends, or a friendly error payload"""
+    # Get historical data
+    trends = await _cost_trends(168)  # Last 7 days
+
+    if not trends["timestamps"] or len(trends["timestamps"]) < 2:
+        # Return a friendly response instead of error when insufficient data
+        return {
+            "error": "insufficient_data",
+            "message": "Collecting historical data for forecasting. Check back in 24 hours.",
+            "forecast_monthly_total": 0,
+            "current_monthly_cost": 0,
+            "trend": "unknown",
+            "forecast_dates": [],
+            "forecast_costs": [],
+        }
+
+    # Prepare data for forecasting
+    historical_data = [
+        {"timestamp": ts, "total_cost": cost, "hourly_cost": cost}
+        for ts, cost in zip(trends["timestamps"], trends["costs"])
+    ]
+
+    forecast = forecast_service.forecast_costs(historical_data, days)
+
+    if "error" in forecast:
+        # Return friendly error response instead of HTTP 400
+        return {
+            "error": forecast.get("error", "unknown"),
+            "message": forecast.get("error", "Unable to generate forecast"),
+            "forecast_monthly_total": 0,
+            "current_monthly_cost": 0,
+            "trend": "unknown",
+            "forecast_dates": [],
+            "forecast_costs": [],
+        }
+
+    return forecast
+
+
 @router.get("/api/forecast/budget-runway")
 async def get_budget_runway(
     budget: float = Query(..., description="Remaining budget amount")
 ) -> Dict[str, Any]:
     """Predict when budget will be exhausted"""
     try:
-        trends = await db_service.get_cost_trends(hours=168)
+        trends = await _cost_trends(168)
 
         if not trends["timestamps"]:
             raise HTTPException(status_code=400, detail="Insufficient historical data")
@@ -406,36 +915,25 @@ async def get_budget_runway(
 
 @router.websocket("/ws/metrics")
 async def websocket_metrics(websocket: WebSocket):
-    """WebSocket endpoint for real-time metric updates"""
-    await manager.connect(websocket)
-
+    """WebSocket endpoint pushing every new snapshot as it is collected
+
+    Send ``{"action": "subscribe", "topics": [...]}`` to receive a full frame
+    per topic followed by deltas; without a subscription every snapshot is
+    pushed as a full ``metrics_update``.
+    """
+    if manager.snapshot is None:
+        # First subscriber before the collector's first broadcast
+        manager.push_snapshot(await metrics_collector.get_snapshot())
+
+    subscriber = await manager.connect(websocket)
+    sender = asyncio.create_task(manager.send_frames(subscriber))
     try:
         while True:
-            # Wait for ping from client
-            data = await websocket.receive_text()
-
-            if data == "ping":
-                # Fetch latest metrics
-                namespace_usage = k8s_client.get_namespace_usage()
-
-                if namespace_usage:
-                    namespace_costs = cost_model.compute_cost(namespace_usage)
-
-                    # Send update
-                    await websocket.send_json(
-                        {
-                            "type": "metrics_update",
-                            "data": namespace_costs,
-                            "timestamp": datetime.now().isoformat(),
-                        }
-                    )
-                else:
-                    await websocket.send_json(
-                        {"type": "error", "message": "Cluster unavailable"}
-                    )
-
+            manager.handle_message(subscriber, await websocket.receive_text())
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
+    finally:
         manager.disconnect(websocket)
+        sender.cancel()
@@ -5,8 +5,13 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from .api.routes import manager as websocket_manager
 from .api.routes import router as api_router
 from .services.database import db_service
+from .services.history_writer import history_writer
+from .services.metrics_collector import metrics_collector
+from .services.response_cache import response_cache
+from .services.retention import retention_scheduler
 
 
 @asynccontextmanager
@@ -16,9 +21,36 @@ async def lifespan(app: FastAPI):
     await db_service.initialize()
     print("✅ Database initialized")
 
+    # Persist each collected snapshot through the write-behind queue
+    metrics_collector.add_listener(history_writer.submit)
+    history_writer.start()
+
+    # Cached responses go stale as soon as new metrics or history land
+    metrics_collector.add_listener(response_cache.invalidate)
+    history_writer.add_listener(response_cache.invalidate)
+
+    # Push each new snapshot to WebSocket subscribers as soon as it lands
+    metrics_collector.add_listener(websocket_manager.push_snapshot)
+
+    # Start background metrics collection
+    metrics_collector.start()
+    print(f"✅ Metrics collector started (every {metrics_collector.interval:g}s)")
+
+    # Purge history past its retention window in the background
+    retention_scheduler.start()
+
     yield
 
     # Cleanup on shutdown
+    await retention_scheduler.stop()
+    await metrics_collector.stop()
+    metrics_collector.async_client.close()
+    metrics_collector.remove_listener(history_writer.submit)
+    metrics_collector.remove_listener(response_cache.invalidate)
+    history_writer.remove_listener(response_cache.invalidate)
+    metrics_collector.remove_listener(websocket_manager.push_snapshot)
+    await history_writer.stop()
+    await db_service.close()
     print("🔒 Shutting down CostKube")
 
 
@@ -1,12 +1,51 @@
-from typing import Any, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
 
+import numpy as np
 import yaml
 
+HOURS_PER_MONTH = 730  # 730 hours in a month
+
+DEFAULT_TIER = "default"
+
+
+@dataclass
+class PricingIndex:
+    """Precomputed node -> price tier lookup.
+
+    Tier 0 holds the cluster-wide default prices; every node_pricing rule
+    adds one tier. Pod rows are mapped to tiers once per scrape so costing
+    stays a vectorized gather over the price arrays.
+    """
+
+    tier_names: List[str]
+    cpu_prices: np.ndarray
+    mem_prices: np.ndarray
+    node_tiers: Dict[str, int] = field(default_factory=dict)
+
+    def tiers_for(self, nodes: Sequence[Optional[str]]) -> np.ndarray:
+        """Map a column of node names to tier indexes"""
+        if not self.node_tiers or len(nodes) == 0:
+            return np.zeros(len(nodes), dtype=np.intp)
+
+        # Resolve each distinct node once, then scatter back to the rows
+        names, inverse = np.unique(
+            np.array([node or "" for node in nodes], dtype=str), return_inverse=True
+        )
+        tiers = np.array(
+            [self.node_tiers.get(name, 0) for name in names.tolist()], dtype=np.intp
+        )
+        return tiers[inverse]
+
 
 class CostModel:
     def __init__(self, config_path: str = "config/cost_model.yaml"):
         self.config_path = config_path
         self.cost_config = self._load_cost_config()
+        self.node_pricing: List[Dict[str, Any]] = (
+            self.cost_config.get("node_pricing") or []
+        )
+        self.pricing_index = self.build_pricing_index({})
 
     def _load_cost_config(self) -> Dict[str, Any]:
         """Load cost model configuration from YAML file"""
@@ -21,36 +60,176 @@ class CostModel:
                 "mem_per_gb_hour": 0.004,
             }
 
+    @property
+    def node_pricing_enabled(self) -> bool:
+        return bool(self.node_pricing)
+
+    def _match_rule(self, labels: Dict[str, str]) -> int:
+        """Tier of the first node_pricing rule whose labels all match"""
+        for tier, rule in enumerate(self.node_pricing, start=1):
+            if all(labels.get(k) == str(v) for k, v in rule.get("match", {}).items()):
+                return tier
+        return 0
+
+    def build_pricing_index(self, nodes: Dict[str, Dict[str, str]]) -> PricingIndex:
+        """Build the node -> price tier index from node names and labels"""
+        default_cpu = self.cost_config["cpu_per_core_hour"]
+        default_mem = self.cost_config["mem_per_gb_hour"]
+
+        return PricingIndex(
+            tier_names=[DEFAULT_TIER]
+            + [
+                rule.get("name", f"rule-{i}")
+                for i, rule in enumerate(self.node_pricing, start=1)
+            ],
+            cpu_prices=np.array(
+                [default_cpu]
+                + [r.get("cpu_per_core_hour", default_cpu) for r in self.node_pricing],
+                dtype=np.float64,
+            ),
+            mem_prices=np.array(
+                [default_mem]
+                + [r.get("mem_per_gb_hour", default_mem) for r in self.node_pricing],
+                dtype=np.float64,
+            ),
+            node_tiers={
+                name: tier
+                for name, labels in nodes.items()
+                if (tier := self._match_rule(labels or {}))
+            },
+        )
+
+    def update_nodes(self, nodes: Dict[str, Dict[str, str]]):
+        """Refresh the pricing index for the cluster's current nodes"""
+        self.pricing_index = self.build_pricing_index(nodes)
+
+    def _hourly_cost(
+        self,
+        cpu_core_hours: np.ndarray,
+        memory_gb_hours: np.ndarray,
+        nodes: Optional[Sequence[Optional[str]]] = None,
+    ) -> np.ndarray:
+        if nodes is None or not self.pricing_index.node_tiers:
+            return (
+                cpu_core_hours * self.cost_config["cpu_per_core_hour"]
+                + memory_gb_hours * self.cost_config["mem_per_gb_hour"]
+            )
+
+        tiers = self.pricing_index.tiers_for(nodes)
+        return (
+            cpu_core_hours * self.pricing_index.cpu_prices[tiers]
+            + memory_gb_hours * self.pricing_index.mem_prices[tiers]
+        )
+
+    def compute_cost_batch(
+        self,
+        cpu_mcores: np.ndarray,
+        memory_bytes: np.ndarray,
+        nodes: Optional[Sequence[Optional[str]]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Compute costs for columnar usage arrays in one vectorized pass
+
+        When ``nodes`` is given, each row is priced by its node's tier.
+        """
+        # Calculate CPU core hours (convert millicores to cores)
+        cpu_core_hours = np.asarray(cpu_mcores, dtype=np.float64) / 1000.0
+
+        # Calculate memory GB hours (convert bytes to GB)
+        memory_gb_hours = np.asarray(memory_bytes, dtype=np.float64) / (1024**3)
+
+        # Calculate costs
+        hourly_cost = self._hourly_cost(cpu_core_hours, memory_gb_hours, nodes)
+        monthly_cost = hourly_cost * HOURS_PER_MONTH
+
+        return {
+            "cpu_core_hours": cpu_core_hours,
+            "memory_gb_hours": memory_gb_hours,
+            "hourly_cost": np.round(hourly_cost, 4),
+            "monthly_cost": np.round(monthly_cost, 2),
+        }
+
+    def _usage_columns(self, usage_data: List[Dict[str, Any]]):
+        count = len(usage_data)
+        cpu_mcores = np.fromiter(
+            (item.get("cpu_mcores", 0) for item in usage_data),
+            dtype=np.float64,
+            count=count,
+        )
+        memory_bytes = np.fromiter(
+            (item.get("memory_bytes", 0) for item in usage_data),
+            dtype=np.float64,
+            count=count,
+        )
+        nodes = (
+            [item.get("node") for item in usage_data]
+            if self.pricing_index.node_tiers
+            else None
+        )
+        return cpu_mcores, memory_bytes, nodes
+
+    def _merge_costs(
+        self, usage_data: List[Dict[str, Any]], costs: Dict[str, np.ndarray]
+    ) -> List[Dict[str, Any]]:
+        # Create result entries with original data plus computed costs
+        return [
+            {
+                **item,
+                "cpu_core_hours": cpu_core_hours,
+                "memory_gb_hours": memory_gb_hours,
+                "hourly_cost": hourly_cost,
+                "monthly_cost": monthly_cost,
+            }
+            for item, cpu_core_hours, memory_gb_hours, hourly_cost, monthly_cost in zip(
+                usage_data,
+                costs["cpu_core_hours"].tolist(),
+                costs["memory_gb_hours"].tolist(),
+                costs["hourly_cost"].tolist(),
+                costs["monthly_cost"].tolist(),
+            )
+        ]
+
     def compute_cost(self, usage_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Compute cost for a list of usage data entries"""
-        result = []
-
-        for item in usage_data:
-            # Calculate CPU core hours (convert millicores to cores)
-            cpu_cores = item.get("cpu_mcores", 0) / 1000.0
-            cpu_core_hours = cpu_cores  # Assuming we're calculating per hour
-
-            # Calculate memory GB hours (convert bytes to GB)
-            memory_gb = item.get("memory_bytes", 0) / (1024**3)
-            memory_gb_hours = memory_gb  # Assuming we're calculating per hour
-
-            # Calculate costs
-            cpu_cost = cpu_core_hours * self.cost_config["cpu_per_core_hour"]
-            memory_cost = memory_gb_hours * self.cost_config["mem_per_gb_hour"]
-            hourly_cost = cpu_cost + memory_cost
-            monthly_cost = hourly_cost * 730  # 730 hours in a month
-
-            # Create result entry with original data plus computed costs
-            result_item = item.copy()
-            result_item.update(
-                {
-                    "cpu_core_hours": cpu_core_hours,
-                    "memory_gb_hours": memory_gb_hours,
-                    "hourly_cost": round(hourly_cost, 4),
-                    "monthly_cost": round(monthly_cost, 2),
-                }
-            )
+        costs = self.compute_cost_batch(*self._usage_columns(usage_data))
+        return self._merge_costs(usage_data, costs)
 
-            result.append(result_item)
+    def compute_namespace_cost(
+        self,
+        namespace_usage: List[Dict[str, Any]],
+        pod_usage: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Cost namespaces as the sum of their pods' node-priced costs"""
+        if not self.pricing_index.node_tiers:
+            return self.compute_cost(namespace_usage)
+
+        cpu_mcores, memory_bytes, nodes = self._usage_columns(pod_usage)
+        pod_hourly = self._hourly_cost(
+            cpu_mcores / 1000.0, memory_bytes / (1024**3), nodes
+        )
+
+        # Sum pod costs per namespace with a single bincount
+        names, inverse = np.unique(
+            np.array([pod["namespace"] for pod in pod_usage], dtype=str),
+            return_inverse=True,
+        )
+        totals = dict(
+            zip(
+                names.tolist(),
+                np.bincount(inverse, weights=pod_hourly, minlength=len(names)),
+            )
+        )
+        hourly_cost = np.array(
+            [totals.get(ns["namespace"], 0.0) for ns in namespace_usage],
+            dtype=np.float64,
+        )
 
-        return result
+        ns_cpu, ns_mem, _ = self._usage_columns(namespace_usage)
+        return self._merge_costs(
+            namespace_usage,
+            {
+                "cpu_core_hours": ns_cpu / 1000.0,
+                "memory_gb_hours": ns_mem / (1024**3),
+                "hourly_cost": np.round(hourly_cost, 4),
+                "monthly_cost": np.round(hourly_cost * HOURS_PER_MONTH, 2),
+            },
+        )
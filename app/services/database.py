@@ -1,217 +1,1116 @@
 """
-Database service for storing historical metrics data
+SQLite storage backend for historical metrics data (the default backend)
+
+Samples are stored in a normalized time-series layout: namespace, workload
+and pod names are interned into small dimension tables, and each sample
+table is clustered on (series id, epoch seconds) in a WITHOUT ROWID table.
+
+Namespace samples are also downsampled into hourly and daily rollup tables
+that are kept current on every write, so trend and top-N queries read a few
+pre-aggregated rows per series instead of every raw sample.
+
+Every statement issued at runtime is a module-level constant collected in
+``QUERIES``, so the indexes below can be checked against the actual queries.
 """
 
-from datetime import datetime, timedelta
+import asyncio
+import importlib
+import os
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import aiosqlite
 
+from app.services.storage import (
+    HOURS_PER_MONTH,
+    ROLLUP_TIERS,
+    Position,
+    StorageBackend,
+    pod_rollup_table,
+    rollup_table,
+    trend_tier,
+    workload_name,
+)
+
+# Connection tuning applied once when the shared connection is opened
+PRAGMAS = (
+    # Must precede table creation to apply without a VACUUM
+    "PRAGMA auto_vacuum=INCREMENTAL",  # let retention hand free pages back
+    "PRAGMA journal_mode=WAL",  # readers don't block the writer
+    "PRAGMA synchronous=NORMAL",  # fsync on checkpoint only; safe with WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # 16 MiB page cache
+    "PRAGMA busy_timeout=5000",
+)
+
+# Bumped whenever the schema changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS namespaces (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS workloads (
+    id INTEGER PRIMARY KEY,
+    namespace_id INTEGER NOT NULL REFERENCES namespaces(id),
+    name TEXT NOT NULL,
+    UNIQUE (namespace_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS pods (
+    id INTEGER PRIMARY KEY,
+    namespace_id INTEGER NOT NULL REFERENCES namespaces(id),
+    name TEXT NOT NULL,
+    workload_id INTEGER NOT NULL REFERENCES workloads(id),
+    UNIQUE (namespace_id, name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pods_workload ON pods(workload_id);
+
+-- ts is integer epoch seconds (UTC); monthly cost is derived on read
+CREATE TABLE IF NOT EXISTS namespace_samples (
+    namespace_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    cpu_mcores REAL NOT NULL,
+    memory_bytes INTEGER NOT NULL,
+    hourly_cost REAL NOT NULL,
+    PRIMARY KEY (namespace_id, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS pod_samples (
+    pod_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    cpu_mcores REAL NOT NULL,
+    memory_bytes INTEGER NOT NULL,
+    hourly_cost REAL NOT NULL,
+    PRIMARY KEY (pod_id, ts)
+) WITHOUT ROWID;
+
+-- Covers window scans across all namespaces (history, rollups, top-N) in
+-- (ts, namespace_id) keyset order; the primary key serves single-namespace
+-- history
+CREATE INDEX IF NOT EXISTS idx_namespace_samples_ts_keyset
+    ON namespace_samples(ts, namespace_id, cpu_mcores, memory_bytes, hourly_cost);
+
+-- Pod samples are the bulk of the file, so only ts (plus the implicit pod_id)
+-- is indexed, for retention
+CREATE INDEX IF NOT EXISTS idx_pod_samples_ts ON pod_samples(ts);
+"""
+
+# Rollup tables per series: (sample table, series column, table name function)
+ROLLUP_SERIES = {
+    "namespace": ("namespace_samples", "namespace_id", rollup_table),
+    "pod": ("pod_samples", "pod_id", pod_rollup_table),
+}
+
+# Rollups keep sums and a sample count so averages stay exact across tiers
+ROLLUP_SCHEMA = "".join(
+    f"""
+CREATE TABLE IF NOT EXISTS {table(tier)} (
+    {key} INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    sum_cpu REAL NOT NULL,
+    sum_memory REAL NOT NULL,
+    sum_cost REAL NOT NULL,
+    PRIMARY KEY ({key}, bucket)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_{table(tier)}_bucket_covering
+    ON {table(tier)}(bucket, samples, sum_cpu, sum_memory, sum_cost);
+"""
+    for _, key, table in ROLLUP_SERIES.values()
+    for tier, _ in ROLLUP_TIERS
+)
+
+
+def _rollup_query(index: int, series: str = "namespace") -> str:
+    """Recompute the buckets of one tier within a [start, end) time range
+
+    Each tier is aggregated from the one before it; the first from the
+    series' sample table.
+    """
+    samples, key, table = ROLLUP_SERIES[series]
+    tier, seconds = ROLLUP_TIERS[index]
+    if index == 0:
+        source, column = samples, "ts"
+        aggregates = "COUNT(*), SUM(cpu_mcores), SUM(memory_bytes), SUM(hourly_cost)"
+    else:
+        source, column = table(ROLLUP_TIERS[index - 1][0]), "bucket"
+        aggregates = "SUM(samples), SUM(sum_cpu), SUM(sum_memory), SUM(sum_cost)"
+
+    return f"""
+        INSERT OR REPLACE INTO {table(tier)}
+        ({key}, bucket, samples, sum_cpu, sum_memory, sum_cost)
+        SELECT {key}, {column} / {seconds} * {seconds}, {aggregates}
+        FROM {source}
+        WHERE {column} >= ? AND {column} < ?
+        GROUP BY {key}, {column} / {seconds}
+    """
+
+
+ROLLUP_QUERIES = tuple(_rollup_query(i) for i in range(len(ROLLUP_TIERS)))
+
+# Whole-range pod rollup rebuilds, used only to backfill when upgrading
+POD_ROLLUP_QUERIES = tuple(_rollup_query(i, "pod") for i in range(len(ROLLUP_TIERS)))
+
+
+# Indexes dropped by each schema version, replaced by the ones above
+SUPERSEDED_INDEXES = {
+    # Single-column time indexes, replaced by covering ones
+    3: ("idx_namespace_samples_ts",)
+    + tuple(f"idx_{rollup_table(tier)}_bucket" for tier, _ in ROLLUP_TIERS),
+    # Ordered (ts, cpu, ...), so it could not serve keyset pagination
+    4: ("idx_namespace_samples_ts_covering",),
+}
+
+
+# Time-series tables per retention tier as (table, series column, time column)
+RETENTION_TABLES = {
+    "raw": (
+        ("namespace_samples", "namespace_id", "ts"),
+        ("pod_samples", "pod_id", "ts"),
+    ),
+    **{
+        tier: (
+            (rollup_table(tier), "namespace_id", "bucket"),
+            (pod_rollup_table(tier), "pod_id", "bucket"),
+        )
+        for tier, _ in ROLLUP_TIERS
+    },
+}
+
+# Tables used before the normalized schema (schema version 0)
+LEGACY_TABLES = ("namespace_metrics", "pod_metrics")
+
+# ==================== QUERIES ====================
+
+# Insertable columns of each dimension table
+DIMENSION_COLUMNS = {
+    "namespaces": ("name",),
+    "workloads": ("namespace_id", "name"),
+    "pods": ("namespace_id", "name", "workload_id"),
+}
+
+LOAD_DIMENSION_SQL = {
+    table: f"SELECT id, {', '.join(columns)} FROM {table}"
+    for table, columns in DIMENSION_COLUMNS.items()
+}
+MAX_DIMENSION_ID_SQL = {
+    table: f"SELECT MAX(id) FROM {table}" for table in DIMENSION_COLUMNS
+}
+INSERT_DIMENSION_SQL = {
+    table: f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+    f"VALUES ({', '.join('?' * len(columns))})"
+    for table, columns in DIMENSION_COLUMNS.items()
+}
+NEW_DIMENSION_SQL = {
+    table: f"{LOAD_DIMENSION_SQL[table]} WHERE id > ?" for table in DIMENSION_COLUMNS
+}
+
+INSERT_NAMESPACE_SAMPLES_SQL = """
+    INSERT OR REPLACE INTO namespace_samples
+    (namespace_id, ts, cpu_mcores, memory_bytes, hourly_cost)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_POD_SAMPLES_SQL = """
+    INSERT OR REPLACE INTO pod_samples
+    (pod_id, ts, cpu_mcores, memory_bytes, hourly_cost)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_NAMESPACE_HISTORY_SELECT = f"""
+    SELECT
+        datetime(s.ts, 'unixepoch') as timestamp,
+        n.name as namespace,
+        s.cpu_mcores,
+        s.memory_bytes,
+        s.hourly_cost,
+        ROUND(s.hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost
+    FROM namespace_samples s
+    JOIN namespaces n ON n.id = s.namespace_id
+"""
+
+NAMESPACE_HISTORY_SQL = f"""{_NAMESPACE_HISTORY_SELECT}
+    WHERE s.ts >= ?
+    ORDER BY s.ts ASC
+"""
+
+NAMESPACE_HISTORY_FOR_NAMESPACE_SQL = f"""{_NAMESPACE_HISTORY_SELECT}
+    WHERE s.ts >= ? AND n.name = ?
+    ORDER BY s.ts ASC
+"""
+
+# Keyset pages also return the row's (ts, namespace_id) position
+_NAMESPACE_HISTORY_PAGE_SELECT = f"""
+    SELECT
+        datetime(s.ts, 'unixepoch') as timestamp,
+        n.name as namespace,
+        s.cpu_mcores,
+        s.memory_bytes,
+        s.hourly_cost,
+        ROUND(s.hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost,
+        s.ts as _ts,
+        s.namespace_id as _series
+    FROM namespace_samples s
+    JOIN namespaces n ON n.id = s.namespace_id
+    WHERE s.ts >= ? AND (s.ts, s.namespace_id) > (?, ?)
+"""
+
+# Params: max(since, after ts), after ts, after namespace_id, limit
+NAMESPACE_HISTORY_PAGE_SQL = f"""{_NAMESPACE_HISTORY_PAGE_SELECT}
+    ORDER BY s.ts, s.namespace_id
+    LIMIT ?
+"""
+
+# Params: max(since, after ts), after ts, after namespace_id, namespace, limit
+NAMESPACE_HISTORY_PAGE_FOR_NAMESPACE_SQL = f"""{_NAMESPACE_HISTORY_PAGE_SELECT}
+      AND n.name = ?
+    ORDER BY s.ts
+    LIMIT ?
+"""
+
+# Pod rollups are maintained incrementally: a snapshot at a new timestamp is
+# added to its buckets. Re-aggregating whole buckets on every write, as for
+# namespaces, would re-read every pod sample of the hour and the day.
+POD_ROLLUP_ADD_SQL = {
+    tier: f"""
+        INSERT INTO {pod_rollup_table(tier)}
+        (pod_id, bucket, samples, sum_cpu, sum_memory, sum_cost)
+        VALUES (?, ?, 1, ?, ?, ?)
+        ON CONFLICT (pod_id, bucket) DO UPDATE SET
+            samples = samples + 1,
+            sum_cpu = sum_cpu + excluded.sum_cpu,
+            sum_memory = sum_memory + excluded.sum_memory,
+            sum_cost = sum_cost + excluded.sum_cost
+    """
+    for tier, _ in ROLLUP_TIERS
+}
+
+# Pods that already have a sample at a timestamp
+POD_SAMPLES_AT_SQL = "SELECT pod_id FROM pod_samples WHERE ts = ?"
+
+
+def _pod_rollup_refresh(index: int) -> Tuple[str, str]:
+    """DELETE and INSERT that rebuild one pod's bucket of a tier
+
+    Used when a snapshot replaces samples, which adding cannot undo.
+    Params: pod_id, bucket; then bucket, pod_id, start, end.
+    """
+    tier, _ = ROLLUP_TIERS[index]
+    if index == 0:
+        source, column = "pod_samples", "ts"
+        aggregates = "COUNT(*), SUM(cpu_mcores), SUM(memory_bytes), SUM(hourly_cost)"
+    else:
+        source, column = pod_rollup_table(ROLLUP_TIERS[index - 1][0]), "bucket"
+        aggregates = "SUM(samples), SUM(sum_cpu), SUM(sum_memory), SUM(sum_cost)"
+
+    return (
+        f"DELETE FROM {pod_rollup_table(tier)} WHERE pod_id = ? AND bucket = ?",
+        f"""
+        INSERT INTO {pod_rollup_table(tier)}
+        (bucket, pod_id, samples, sum_cpu, sum_memory, sum_cost)
+        SELECT ?, pod_id, {aggregates}
+        FROM {source}
+        WHERE pod_id = ? AND {column} >= ? AND {column} < ?
+        GROUP BY pod_id
+        """,
+    )
+
+
+POD_ROLLUP_REFRESH_SQL = tuple(_pod_rollup_refresh(i) for i in range(len(ROLLUP_TIERS)))
+
+POD_HISTORY_SQL = f"""
+    SELECT
+        datetime(s.ts, 'unixepoch') as timestamp,
+        n.name as namespace,
+        p.name as pod,
+        s.cpu_mcores,
+        s.memory_bytes,
+        s.hourly_cost,
+        ROUND(s.hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost
+    FROM namespaces n
+    JOIN pods p ON p.namespace_id = n.id
+    JOIN pod_samples s ON s.pod_id = p.id
+    WHERE n.name = ? AND p.name = ? AND s.ts >= ?
+    ORDER BY s.ts ASC
+"""
+
+
+# Keyset pages over every pod in the window, in (ts, pod_id) order. The ts
+# index holds pod_id as its primary key suffix, so pages seek straight to the
+# cursor; each row's values are then read by primary key. It is forced because
+# for one namespace the planner would rather sort that namespace's whole
+# window on every page.
+_POD_HISTORY_PAGE_SELECT = f"""
+    SELECT
+        datetime(s.ts, 'unixepoch') as timestamp,
+        n.name as namespace,
+        p.name as pod,
+        s.cpu_mcores,
+        s.memory_bytes,
+        s.hourly_cost,
+        ROUND(s.hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost,
+        s.ts as _ts,
+        s.pod_id as _series
+    FROM pod_samples s INDEXED BY idx_pod_samples_ts
+    JOIN pods p ON p.id = s.pod_id
+    JOIN namespaces n ON n.id = p.namespace_id
+    WHERE s.ts >= ? AND (s.ts, s.pod_id) > (?, ?)
+"""
+
+# Params: max(since, after ts), after ts, after pod_id, limit
+POD_HISTORY_PAGE_SQL = f"""{_POD_HISTORY_PAGE_SELECT}
+    ORDER BY s.ts, s.pod_id
+    LIMIT ?
+"""
+
+# Params: max(since, after ts), after ts, after pod_id, namespace, limit
+POD_HISTORY_PAGE_FOR_NAMESPACE_SQL = f"""{_POD_HISTORY_PAGE_SELECT}
+      AND n.name = ?
+    ORDER BY s.ts, s.pod_id
+    LIMIT ?
+"""
+
+
+def _top_pods_sql(by_namespace: bool) -> str:
+    """Top pods from the hourly rollups up to the first full day, then daily
+
+    Pods are ranked on ids alone; names are joined for the top rows only.
+    Params: [namespace,] window start, first day, [namespace,] first day, limit
+    """
+    (hourly, _), (daily, _) = ROLLUP_TIERS
+    if by_namespace:
+        source = """
+        FROM namespaces n
+        JOIN pods p ON p.namespace_id = n.id
+        JOIN {table} r ON r.pod_id = p.id
+        WHERE n.name = ? AND"""
+    else:
+        source = """
+        FROM {table} r
+        WHERE"""
+
+    return f"""
+    WITH window_totals AS (
+        SELECT r.pod_id, r.samples, r.sum_cpu, r.sum_memory, r.sum_cost
+        {source.format(table=pod_rollup_table(hourly))} r.bucket >= ? AND r.bucket < ?
+        UNION ALL
+        SELECT r.pod_id, r.samples, r.sum_cpu, r.sum_memory, r.sum_cost
+        {source.format(table=pod_rollup_table(daily))} r.bucket >= ?
+    ),
+    ranked AS (
+        SELECT
+            pod_id,
+            SUM(sum_cost) / SUM(samples) as avg_hourly_cost,
+            SUM(sum_cpu) / SUM(samples) as avg_cpu,
+            SUM(sum_memory) / SUM(samples) as avg_memory
+        FROM window_totals
+        GROUP BY pod_id
+        HAVING SUM(samples) > 0
+        ORDER BY avg_hourly_cost DESC
+        LIMIT ?
+    )
+    SELECT
+        n.name as namespace,
+        p.name as pod,
+        w.name as workload,
+        top.avg_hourly_cost,
+        top.avg_hourly_cost * {HOURS_PER_MONTH} as avg_monthly_cost,
+        top.avg_cpu,
+        top.avg_memory
+    FROM ranked top
+    JOIN pods p ON p.id = top.pod_id
+    JOIN namespaces n ON n.id = p.namespace_id
+    JOIN workloads w ON w.id = p.workload_id
+    ORDER BY top.avg_hourly_cost DESC
+"""
+
+
+TOP_PODS_SQL = _top_pods_sql(by_namespace=False)
+TOP_PODS_FOR_NAMESPACE_SQL = _top_pods_sql(by_namespace=True)
+
+WORKLOAD_TRENDS_SQL = {
+    tier: f"""
+        SELECT
+            datetime(r.bucket, 'unixepoch') as bucket_start,
+            SUM(r.sum_cost / r.samples) as total_cost,
+            SUM(r.sum_cpu / r.samples) as total_cpu,
+            SUM(r.sum_memory / r.samples) as total_memory,
+            COUNT(*) as pods
+        FROM namespaces n
+        JOIN workloads w ON w.namespace_id = n.id
+        JOIN pods p ON p.workload_id = w.id
+        JOIN {pod_rollup_table(tier)} r ON r.pod_id = p.id
+        WHERE n.name = ? AND w.name = ? AND r.bucket >= ? AND r.samples > 0
+        GROUP BY r.bucket
+        ORDER BY r.bucket ASC
+    """
+    for tier, _ in ROLLUP_TIERS
+}
+
+COST_TRENDS_SQL = {
+    tier: f"""
+        SELECT
+            datetime(bucket, 'unixepoch') as bucket_start,
+            SUM(sum_cost / samples) as total_cost,
+            SUM(sum_cpu / samples) as total_cpu,
+            SUM(sum_memory / samples) as total_memory
+        FROM {rollup_table(tier)}
+        WHERE bucket >= ?
+        GROUP BY bucket
+        ORDER BY bucket ASC
+    """
+    for tier, _ in ROLLUP_TIERS
+}
+
+# Params: since, first hour, first hour, first day, first day, limit
+TOP_NAMESPACES_SQL = f"""
+    WITH window_totals AS (
+        SELECT namespace_id, COUNT(*) as samples,
+               SUM(cpu_mcores) as sum_cpu, SUM(memory_bytes) as sum_memory,
+               SUM(hourly_cost) as sum_cost
+        FROM namespace_samples
+        WHERE ts >= ? AND ts < ?
+        GROUP BY namespace_id
+        UNION ALL
+        SELECT namespace_id, samples, sum_cpu, sum_memory, sum_cost
+        FROM {rollup_table(ROLLUP_TIERS[0][0])}
+        WHERE bucket >= ? AND bucket < ?
+        UNION ALL
+        SELECT namespace_id, samples, sum_cpu, sum_memory, sum_cost
+        FROM {rollup_table(ROLLUP_TIERS[1][0])}
+        WHERE bucket >= ?
+    )
+    SELECT
+        n.name as namespace,
+        SUM(w.sum_cost) / SUM(w.samples) as avg_hourly_cost,
+        SUM(w.sum_cost) / SUM(w.samples) * {HOURS_PER_MONTH} as avg_monthly_cost,
+        SUM(w.sum_cpu) / SUM(w.samples) as avg_cpu,
+        SUM(w.sum_memory) / SUM(w.samples) as avg_memory
+    FROM window_totals w
+    JOIN namespaces n ON n.id = w.namespace_id
+    GROUP BY w.namespace_id
+    ORDER BY avg_monthly_cost DESC
+    LIMIT ?
+"""
+
+# Rows are addressed by their (series, time) primary key, so each chunk is a
+# bounded index range delete
+DELETE_EXPIRED_SQL = {
+    table: f"""
+        DELETE FROM {table}
+        WHERE ({key}, {column}) IN (
+            SELECT {key}, {column} FROM {table}
+            WHERE {column} < ?
+            LIMIT ?
+        )
+    """
+    for tables in RETENTION_TABLES.values()
+    for table, key, column in tables
+}
+
+_NAMESPACE_HAS_DATA = " OR ".join(
+    f"EXISTS (SELECT 1 FROM {table} WHERE namespace_id = namespaces.id)"
+    for table in ["pods", "namespace_samples"]
+    + [rollup_table(tier) for tier, _ in ROLLUP_TIERS]
+)
+
+_POD_HAS_DATA = " OR ".join(
+    f"EXISTS (SELECT 1 FROM {table} WHERE pod_id = pods.id)"
+    for table in ["pod_samples"] + [pod_rollup_table(tier) for tier, _ in ROLLUP_TIERS]
+)
+
+# Dependents first, so a namespace whose pods were just pruned goes too
+PRUNE_DIMENSIONS_SQL = {
+    "pods": f"DELETE FROM pods WHERE NOT ({_POD_HAS_DATA})",
+    "workloads": """
+        DELETE FROM workloads WHERE NOT EXISTS
+            (SELECT 1 FROM pods WHERE workload_id = workloads.id)
+    """,
+    "namespaces": f"DELETE FROM namespaces WHERE NOT ({_NAMESPACE_HAS_DATA})",
+}
+
+# Every statement issued outside of schema migrations, by name
+QUERIES: Dict[str, str] = {
+    **{f"load_{t}": sql for t, sql in LOAD_DIMENSION_SQL.items()},
+    **{f"max_id_{t}": sql for t, sql in MAX_DIMENSION_ID_SQL.items()},
+    **{f"insert_{t}": sql for t, sql in INSERT_DIMENSION_SQL.items()},
+    **{f"new_{t}": sql for t, sql in NEW_DIMENSION_SQL.items()},
+    "insert_namespace_samples": INSERT_NAMESPACE_SAMPLES_SQL,
+    "insert_pod_samples": INSERT_POD_SAMPLES_SQL,
+    **{f"rollup_{tier}": sql for (tier, _), sql in zip(ROLLUP_TIERS, ROLLUP_QUERIES)},
+    "namespace_history": NAMESPACE_HISTORY_SQL,
+    "namespace_history_for_namespace": NAMESPACE_HISTORY_FOR_NAMESPACE_SQL,
+    "namespace_history_page": NAMESPACE_HISTORY_PAGE_SQL,
+    "namespace_history_page_for_namespace": NAMESPACE_HISTORY_PAGE_FOR_NAMESPACE_SQL,
+    **{f"cost_trends_{tier}": sql for tier, sql in COST_TRENDS_SQL.items()},
+    "top_namespaces": TOP_NAMESPACES_SQL,
+    **{f"pod_rollup_add_{tier}": sql for tier, sql in POD_ROLLUP_ADD_SQL.items()},
+    "pod_samples_at": POD_SAMPLES_AT_SQL,
+    **{
+        f"pod_rollup_{step}_{tier}": sql
+        for (tier, _), queries in zip(ROLLUP_TIERS, POD_ROLLUP_REFRESH_SQL)
+        for step, sql in zip(("clear", "refresh"), queries)
+    },
+    "pod_history": POD_HISTORY_SQL,
+    "pod_history_page": POD_HISTORY_PAGE_SQL,
+    "pod_history_page_for_namespace": POD_HISTORY_PAGE_FOR_NAMESPACE_SQL,
+    "top_pods": TOP_PODS_SQL,
+    "top_pods_for_namespace": TOP_PODS_FOR_NAMESPACE_SQL,
+    **{f"workload_trends_{tier}": sql for tier, sql in WORKLOAD_TRENDS_SQL.items()},
+    **{f"delete_expired_{t}": sql for t, sql in DELETE_EXPIRED_SQL.items()},
+    **{f"prune_{t}": sql for t, sql in PRUNE_DIMENSIONS_SQL.items()},
+}
+
+
+class DatabaseService(StorageBackend):
+    name = "sqlite"
+    retention_tables = RETENTION_TABLES
 
-class DatabaseService:
     def __init__(self, db_path: str = "data/costkube.db"):
         self.db_path = db_path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        # Interned dimension ids, loaded on first write
+        self._namespace_ids: Dict[str, int] = {}
+        self._workload_ids: Dict[Tuple[int, str], int] = {}
+        self._pod_ids: Dict[Tuple[int, str], int] = {}
+        self._dimensions_loaded = False
         # Ensure data directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
+    async def _connection(self) -> aiosqlite.Connection:
+        """Get the long-lived connection, opening it on first use"""
+        if self._db is not None:
+            return self._db
+
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self.db_path)
+                db.row_factory = aiosqlite.Row
+                for pragma in PRAGMAS:
+                    await db.execute(pragma)
+                self._write_lock = asyncio.Lock()
+                self._db = db
+        return self._db
+
+    async def close(self):
+        """Close the shared connection"""
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+            self._connect_lock = None
+            self._dimensions_loaded = False
+
     async def initialize(self):
-        """Initialize database and create tables if they don't exist"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Create namespace metrics table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS namespace_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    namespace TEXT NOT NULL,
-                    cpu_mcores REAL NOT NULL,
-                    memory_bytes REAL NOT NULL,
-                    hourly_cost REAL NOT NULL,
-                    monthly_cost REAL NOT NULL
-                )
-            """
-            )
+        """Initialize database, create tables and migrate older schemas"""
+        db = await self._connection()
+        async with self._write_lock:
+            await db.executescript(SCHEMA + ROLLUP_SCHEMA)
 
-            # Create pod metrics table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS pod_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    namespace TEXT NOT NULL,
-                    pod TEXT NOT NULL,
-                    cpu_mcores REAL NOT NULL,
-                    memory_bytes REAL NOT NULL,
-                    hourly_cost REAL NOT NULL,
-                    monthly_cost REAL NOT NULL
-                )
-            """
-            )
+            version = (await db.execute_fetchall("PRAGMA user_version"))[0][0]
+            if version < 1:
+                await self._migrate_legacy_tables(db)
+            if version < 2:
+                # Backfill every tier from the samples already stored
+                await self._update_rollups(db, 0, 2**62)
+            if version < 5:
+                for query in POD_ROLLUP_QUERIES:
+                    await db.execute(query, (0, 2**62))
+            for superseded_in, indexes in SUPERSEDED_INDEXES.items():
+                if version < superseded_in:
+                    for index in indexes:
+                        await db.execute(f"DROP INDEX IF EXISTS {index}")
+
+            await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            await db.commit()
+
+            auto_vacuum = (await db.execute_fetchall("PRAGMA auto_vacuum"))[0][0]
+            if auto_vacuum != 2:
+                # Files created before incremental vacuum need one rebuild
+                await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                await db.execute("VACUUM")
+                print("✅ Enabled incremental vacuum on the metrics database")
+
+    async def _migrate_legacy_tables(self, db: aiosqlite.Connection):
+        """Move rows from the denormalized tables into the sample tables"""
+        rows = await db.execute_fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+            LEGACY_TABLES,
+        )
+        legacy = {row[0] for row in rows}
 
-            # Create indexes for better query performance
+        if "namespace_metrics" in legacy:
             await db.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_namespace_metrics_timestamp
-                ON namespace_metrics(timestamp DESC)
+                INSERT OR IGNORE INTO namespaces (name)
+                SELECT DISTINCT namespace FROM namespace_metrics
             """
             )
             await db.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_namespace_metrics_namespace
-                ON namespace_metrics(namespace)
+                INSERT OR REPLACE INTO namespace_samples
+                (namespace_id, ts, cpu_mcores, memory_bytes, hourly_cost)
+                SELECT n.id, CAST(strftime('%s', m.timestamp) AS INTEGER),
+                       m.cpu_mcores, CAST(m.memory_bytes AS INTEGER), m.hourly_cost
+                FROM namespace_metrics m
+                JOIN namespaces n ON n.name = m.namespace
             """
             )
-            await db.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_pod_metrics_timestamp
-                ON pod_metrics(timestamp DESC)
-            """
+            await db.execute("DROP TABLE namespace_metrics")
+
+        if "pod_metrics" in legacy:
+            pairs = await db.execute_fetchall(
+                "SELECT DISTINCT namespace, pod FROM pod_metrics"
             )
+            await self._intern_pods(db, [(row[0], row[1]) for row in pairs])
+            # The legacy table held one row per container; sum them per pod
             await db.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_pod_metrics_namespace
-                ON pod_metrics(namespace)
+                INSERT OR REPLACE INTO pod_samples
+                (pod_id, ts, cpu_mcores, memory_bytes, hourly_cost)
+                SELECT p.id, CAST(strftime('%s', m.timestamp) AS INTEGER) AS ts,
+                       SUM(m.cpu_mcores), CAST(SUM(m.memory_bytes) AS INTEGER),
+                       SUM(m.hourly_cost)
+                FROM pod_metrics m
+                JOIN namespaces n ON n.name = m.namespace
+                JOIN pods p ON p.namespace_id = n.id AND p.name = m.pod
+                GROUP BY p.id, ts
             """
             )
+            await db.execute("DROP TABLE pod_metrics")
 
-            await db.commit()
+        if legacy:
+            print(f"✅ Migrated {', '.join(sorted(legacy))} to the normalized schema")
+
+    async def _update_rollups(self, db: aiosqlite.Connection, start: int, end: int):
+        """Re-aggregate every tier's buckets overlapping [start, end)"""
+        for query, (_, seconds) in zip(ROLLUP_QUERIES, ROLLUP_TIERS):
+            bucket_start = start // seconds * seconds
+            bucket_end = -(-end // seconds) * seconds
+            await db.execute(query, (bucket_start, bucket_end))
+
+    # ==================== DIMENSION INTERNING ====================
+
+    async def _load_dimensions(self, db: aiosqlite.Connection):
+        """Populate the in-memory id caches from the dimension tables"""
+        self._namespace_ids = {
+            row[1]: row[0]
+            for row in await db.execute_fetchall(LOAD_DIMENSION_SQL["namespaces"])
+        }
+        self._workload_ids = {
+            (row[1], row[2]): row[0]
+            for row in await db.execute_fetchall(LOAD_DIMENSION_SQL["workloads"])
+        }
+        self._pod_ids = {
+            (row[1], row[2]): row[0]
+            for row in await db.execute_fetchall(LOAD_DIMENSION_SQL["pods"])
+        }
+        self._dimensions_loaded = True
 
-    async def save_namespace_metrics(self, metrics: List[Dict[str, Any]]):
-        """Save namespace metrics snapshot"""
-        async with aiosqlite.connect(self.db_path) as db:
-            for metric in metrics:
-                await db.execute(
-                    """
-                    INSERT INTO namespace_metrics
-                    (namespace, cpu_mcores, memory_bytes, hourly_cost, monthly_cost)
-                    VALUES (?, ?, ?, ?, ?)
-                """,
+    async def _insert_dimensions(
+        self, db: aiosqlite.Connection, table: str, values: List[tuple]
+    ) -> Iterable[aiosqlite.Row]:
+        """Insert new dimension rows in one batch and return them with ids"""
+        max_id = (await db.execute_fetchall(MAX_DIMENSION_ID_SQL[table]))[0][0]
+        await db.executemany(INSERT_DIMENSION_SQL[table], values)
+        # Ids are assigned in increasing order, so new rows sort after max_id
+        return await db.execute_fetchall(NEW_DIMENSION_SQL[table], (max_id or 0,))
+
+    async def _intern_namespaces(
+        self, db: aiosqlite.Connection, names: Iterable[str]
+    ) -> Dict[str, int]:
+        if not self._dimensions_loaded:
+            await self._load_dimensions(db)
+
+        missing = {name for name in names if name not in self._namespace_ids}
+        if missing:
+            for row in await self._insert_dimensions(
+                db, "namespaces", [(name,) for name in missing]
+            ):
+                self._namespace_ids[row[1]] = row[0]
+            if not missing.issubset(self._namespace_ids):
+                await self._load_dimensions(db)
+        return self._namespace_ids
+
+    async def _intern_pods(
+        self, db: aiosqlite.Connection, pods: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[int, str], int]:
+        """Intern (namespace, pod) pairs along with their namespaces and workloads"""
+        pods = list(pods)
+        namespace_ids = await self._intern_namespaces(db, {ns for ns, _ in pods})
+
+        missing_pods = {
+            (namespace_ids[ns], pod)
+            for ns, pod in pods
+            if (namespace_ids[ns], pod) not in self._pod_ids
+        }
+        if not missing_pods:
+            return self._pod_ids
+
+        missing_workloads = {
+            (ns_id, workload_name(pod))
+            for ns_id, pod in missing_pods
+            if (ns_id, workload_name(pod)) not in self._workload_ids
+        }
+        if missing_workloads:
+            for row in await self._insert_dimensions(
+                db, "workloads", list(missing_workloads)
+            ):
+                self._workload_ids[(row[1], row[2])] = row[0]
+
+        for row in await self._insert_dimensions(
+            db,
+            "pods",
+            [
+                (ns_id, pod, self._workload_ids[(ns_id, workload_name(pod))])
+                for ns_id, pod in missing_pods
+            ],
+        ):
+            self._pod_ids[(row[1], row[2])] = row[0]
+
+        if not missing_pods.issubset(self._pod_ids):
+            await self._load_dimensions(db)
+        return self._pod_ids
+
+    # ==================== INGEST ====================
+
+    async def save_namespace_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save namespace metrics snapshot, taken now or at an epoch timestamp"""
+        ts = int(timestamp if timestamp is not None else time.time())
+        db = await self._connection()
+
+        async with self._write_lock:
+            namespace_ids = await self._intern_namespaces(
+                db, {metric["namespace"] for metric in metrics}
+            )
+            await db.executemany(
+                INSERT_NAMESPACE_SAMPLES_SQL,
+                [
                     (
-                        metric["namespace"],
+                        namespace_ids[metric["namespace"]],
+                        ts,
                         metric["cpu_mcores"],
-                        metric["memory_bytes"],
+                        int(metric["memory_bytes"]),
                         metric["hourly_cost"],
-                        metric["monthly_cost"],
-                    ),
-                )
+                    )
+                    for metric in metrics
+                ],
+            )
+            # Recomputing the touched buckets keeps rollups idempotent when a
+            # sample is replaced
+            await self._update_rollups(db, ts, ts + 1)
             await db.commit()
 
-    async def save_pod_metrics(self, metrics: List[Dict[str, Any]]):
-        """Save pod metrics snapshot"""
-        async with aiosqlite.connect(self.db_path) as db:
-            for metric in metrics:
-                await db.execute(
-                    """
-                    INSERT INTO pod_metrics
-                    (namespace, pod, cpu_mcores, memory_bytes, hourly_cost, monthly_cost)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        metric["namespace"],
-                        metric["pod"],
-                        metric["cpu_mcores"],
-                        metric["memory_bytes"],
-                        metric["hourly_cost"],
-                        metric["monthly_cost"],
-                    ),
+    async def save_pod_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save pod metrics snapshot, taken now or at an epoch timestamp"""
+        ts = int(timestamp if timestamp is not None else time.time())
+        db = await self._connection()
+
+        async with self._write_lock:
+            pod_ids = await self._intern_pods(
+                db, [(metric["namespace"], metric["pod"]) for metric in metrics]
+            )
+            namespace_ids = self._namespace_ids
+            samples = [
+                (
+                    pod_ids[(namespace_ids[metric["namespace"]], metric["pod"])],
+                    ts,
+                    metric["cpu_mcores"],
+                    int(metric["memory_bytes"]),
+                    metric["hourly_cost"],
                 )
+                for metric in metrics
+            ]
+            replaced = await db.execute_fetchall(POD_SAMPLES_AT_SQL, (ts,))
+            await db.executemany(INSERT_POD_SAMPLES_SQL, samples)
+
+            if replaced:
+                # Rebuild rather than add, so replaced samples drop out
+                await self._refresh_pod_rollups(db, {row[0] for row in samples}, ts)
+            else:
+                for query, (_, seconds) in zip(
+                    POD_ROLLUP_ADD_SQL.values(), ROLLUP_TIERS
+                ):
+                    bucket = ts // seconds * seconds
+                    await db.executemany(
+                        query,
+                        [(pod_id, bucket, *values) for pod_id, _, *values in samples],
+                    )
             await db.commit()
 
+    async def _refresh_pod_rollups(
+        self, db: aiosqlite.Connection, pod_ids: Iterable[int], ts: int
+    ):
+        """Rebuild each pod's buckets containing ``ts``, finest tier first"""
+        for (clear, refresh), (_, seconds) in zip(POD_ROLLUP_REFRESH_SQL, ROLLUP_TIERS):
+            bucket = ts // seconds * seconds
+            await db.executemany(clear, [(pod_id, bucket) for pod_id in pod_ids])
+            await db.executemany(
+                refresh,
+                [(bucket, pod_id, bucket, bucket + seconds) for pod_id in pod_ids],
+            )
+
+    # ==================== QUERIES ====================
+
     async def get_namespace_history(
         self, namespace: Optional[str] = None, hours: int = 24
     ) -> List[Dict[str, Any]]:
         """Get historical namespace metrics"""
-        since = datetime.now() - timedelta(hours=hours)
+        since = self._since(hours)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        db = await self._connection()
+        if namespace:
+            rows = await db.execute_fetchall(
+                NAMESPACE_HISTORY_FOR_NAMESPACE_SQL, (since, namespace)
+            )
+        else:
+            rows = await db.execute_fetchall(NAMESPACE_HISTORY_SQL, (since,))
 
-            if namespace:
-                query = """
-                    SELECT * FROM namespace_metrics
-                    WHERE namespace = ? AND timestamp >= ?
-                    ORDER BY timestamp ASC
-                """
-                cursor = await db.execute(query, (namespace, since))
-            else:
-                query = """
-                    SELECT * FROM namespace_metrics
-                    WHERE timestamp >= ?
-                    ORDER BY timestamp ASC
-                """
-                cursor = await db.execute(query, (since,))
+        return [dict(row) for row in rows]
+
+    async def get_namespace_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Get one keyset page of historical namespace metrics
 
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        Pages follow the (ts, namespace_id) index, so each one is a bounded
+        range read wherever it starts in the window.
+        """
+        since = self._since(hours)
+        after_ts, after_id = after if after is not None else (since, 0)
+        # The index seek starts at the lower of the two ts bounds, so start
+        # it at the cursor rather than filtering from the window start
+        lower = max(since, after_ts)
+
+        db = await self._connection()
+        if namespace:
+            rows = await db.execute_fetchall(
+                NAMESPACE_HISTORY_PAGE_FOR_NAMESPACE_SQL,
+                (lower, after_ts, after_id, namespace, limit),
+            )
+        else:
+            rows = await db.execute_fetchall(
+                NAMESPACE_HISTORY_PAGE_SQL, (lower, after_ts, after_id, limit)
+            )
+
+        page = [dict(row) for row in rows]
+        for row in page:
+            del row["_ts"], row["_series"]
+        if len(rows) < limit:
+            return page, None
+        return page, (rows[-1]["_ts"], rows[-1]["_series"])
 
     async def get_cost_trends(self, hours: int = 168) -> Dict[str, Any]:
-        """Get cost trend data for charts (default: 7 days)"""
-        since = datetime.now() - timedelta(hours=hours)
-
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
-            # Get hourly aggregated costs
-            query = """
-                SELECT
-                    datetime(timestamp, 'start of hour') as hour,
-                    SUM(hourly_cost) as total_cost,
-                    SUM(cpu_mcores) as total_cpu,
-                    SUM(memory_bytes) as total_memory
-                FROM namespace_metrics
-                WHERE timestamp >= ?
-                GROUP BY hour
-                ORDER BY hour ASC
-            """
-            cursor = await db.execute(query, (since,))
-            rows = await cursor.fetchall()
+        """Get cost trend data for charts (default: 7 days)
 
-            return {
-                "timestamps": [row["hour"] for row in rows],
-                "costs": [row["total_cost"] for row in rows],
-                "cpu": [row["total_cpu"] for row in rows],
-                "memory": [row["total_memory"] for row in rows],
-            }
+        Each point is the cluster's average hourly cost within a bucket, read
+        from the coarsest rollup tier that still gives the window enough points.
+        """
+        tier, seconds = trend_tier(hours)
+        since = self._since(hours) // seconds * seconds
+
+        db = await self._connection()
+        rows = await db.execute_fetchall(COST_TRENDS_SQL[tier], (since,))
+
+        return {
+            "timestamps": [row["bucket_start"] for row in rows],
+            "costs": [row["total_cost"] for row in rows],
+            "cpu": [row["total_cpu"] for row in rows],
+            "memory": [row["total_memory"] for row in rows],
+            "resolution": tier,
+        }
 
     async def get_top_namespaces(
         self, limit: int = 10, hours: int = 24
     ) -> List[Dict[str, Any]]:
-        """Get top namespaces by cost"""
-        since = datetime.now() - timedelta(hours=hours)
-
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
-            query = """
-                SELECT
-                    namespace,
-                    AVG(hourly_cost) as avg_hourly_cost,
-                    AVG(monthly_cost) as avg_monthly_cost,
-                    AVG(cpu_mcores) as avg_cpu,
-                    AVG(memory_bytes) as avg_memory
-                FROM namespace_metrics
-                WHERE timestamp >= ?
-                GROUP BY namespace
-                ORDER BY avg_monthly_cost DESC
-                LIMIT ?
-            """
-            cursor = await db.execute(query, (since, limit))
-            rows = await cursor.fetchall()
+        """Get top namespaces by cost
 
-            return [dict(row) for row in rows]
+        The window is split at bucket boundaries: raw samples up to the first
+        full hour, hourly rollups up to the first full day, then daily rollups.
+        """
+        since, first_hour, first_day = self._top_window(hours)
+        db = await self._connection()
+        params = (since, first_hour, first_hour, first_day, first_day, limit)
+        rows = await db.execute_fetchall(TOP_NAMESPACES_SQL, params)
 
-    async def cleanup_old_data(self, days: int = 30):
-        """Clean up data older than specified days"""
-        cutoff = datetime.now() - timedelta(days=days)
+        return [dict(row) for row in rows]
 
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "DELETE FROM namespace_metrics WHERE timestamp < ?", (cutoff,)
+    async def get_pod_history(
+        self, namespace: str, pod: str, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Get historical metrics of one pod"""
+        db = await self._connection()
+        rows = await db.execute_fetchall(
+            POD_HISTORY_SQL, (namespace, pod, self._since(hours))
+        )
+        return [dict(row) for row in rows]
+
+    async def get_pod_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Get one keyset page of historical pod metrics"""
+        since = self._since(hours)
+        after_ts, after_id = after if after is not None else (since, 0)
+        lower = max(since, after_ts)
+
+        db = await self._connection()
+        if namespace:
+            rows = await db.execute_fetchall(
+                POD_HISTORY_PAGE_FOR_NAMESPACE_SQL,
+                (lower, after_ts, after_id, namespace, limit),
+            )
+        else:
+            rows = await db.execute_fetchall(
+                POD_HISTORY_PAGE_SQL, (lower, after_ts, after_id, limit)
             )
-            await db.execute("DELETE FROM pod_metrics WHERE timestamp < ?", (cutoff,))
+
+        page = [dict(row) for row in rows]
+        for row in page:
+            del row["_ts"], row["_series"]
+        if len(rows) < limit:
+            return page, None
+        return page, (rows[-1]["_ts"], rows[-1]["_series"])
+
+    async def get_top_pods(
+        self, limit: int = 50, hours: int = 24, namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get top pods by cost
+
+        Hourly rollups cover the window up to its first full day and daily
+        rollups the rest, so a week over every pod reads about one row per pod
+        per hour of the first day plus one per day.
+        """
+        start, first_day = self._rollup_window(hours)
+        db = await self._connection()
+        if namespace:
+            params = (namespace, start, first_day, namespace, first_day, limit)
+            rows = await db.execute_fetchall(TOP_PODS_FOR_NAMESPACE_SQL, params)
+        else:
+            params = (start, first_day, first_day, limit)
+            rows = await db.execute_fetchall(TOP_PODS_SQL, params)
+
+        return [dict(row) for row in rows]
+
+    async def get_workload_trends(
+        self, namespace: str, workload: str, hours: int = 168
+    ) -> Dict[str, Any]:
+        """Get cost trend data for one workload, summed over its pods"""
+        tier, seconds = trend_tier(hours)
+        since = self._since(hours) // seconds * seconds
+
+        db = await self._connection()
+        rows = await db.execute_fetchall(
+            WORKLOAD_TRENDS_SQL[tier], (namespace, workload, since)
+        )
+
+        return {
+            "timestamps": [row["bucket_start"] for row in rows],
+            "costs": [row["total_cost"] for row in rows],
+            "cpu": [row["total_cpu"] for row in rows],
+            "memory": [row["total_memory"] for row in rows],
+            "pods": [row["pods"] for row in rows],
+            "resolution": tier,
+        }
+
+    # ==================== RETENTION ====================
+
+    async def delete_chunk(
+        self, table: str, cutoff: int, chunk_size: int
+    ) -> Tuple[int, float]:
+        """Delete up to ``chunk_size`` rows older than ``cutoff`` from a table
+
+        Returns the rows deleted and how long the write lock was held.
+        """
+        db = await self._connection()
+
+        async with self._write_lock:
+            started = time.perf_counter()
+            cursor = await db.execute(DELETE_EXPIRED_SQL[table], (cutoff, chunk_size))
             await db.commit()
+            return cursor.rowcount, time.perf_counter() - started
+
+    async def prune_dimensions(self) -> Tuple[int, float]:
+        """Drop pods, workloads and namespaces that no longer have any data"""
+        db = await self._connection()
+
+        async with self._write_lock:
+            started = time.perf_counter()
+            removed = 0
+            for query in PRUNE_DIMENSIONS_SQL.values():
+                cursor = await db.execute(query)
+                removed += cursor.rowcount
+            await db.commit()
+
+            if removed:
+                # Reload ids on the next write instead of patching the caches
+                self._dimensions_loaded = False
+            return removed, time.perf_counter() - started
+
+    async def reclaim_space(self, pages: int) -> Tuple[int, float]:
+        """Return up to ``pages`` free pages to the filesystem
+
+        Returns the bytes reclaimed and how long the write lock was held.
+        """
+        db = await self._connection()
+
+        async with self._write_lock:
+            started = time.perf_counter()
+            page_size = (await db.execute_fetchall("PRAGMA page_size"))[0][0]
+            before = (await db.execute_fetchall("PRAGMA freelist_count"))[0][0]
+            # executescript steps the pragma to completion; execute() would
+            # stop after the first page
+            await db.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            after = (await db.execute_fetchall("PRAGMA freelist_count"))[0][0]
+            return (before - after) * page_size, time.perf_counter() - started
+
+
+# Storage backends by name as (module, class, default path)
+STORAGE_BACKENDS = {
+    "sqlite": ("app.services.database", "DatabaseService", "data/costkube.db"),
+    "duckdb": (
+        "app.services.duckdb_storage",
+        "DuckDBStorage",
+        "data/costkube.duckdb",
+    ),
+}
+
+
+def create_storage_backend(
+    backend: Optional[str] = None, db_path: Optional[str] = None
+) -> StorageBackend:
+    """Build the storage backend named by COSTKUBE_STORAGE_BACKEND"""
+    backend = (backend or os.getenv("COSTKUBE_STORAGE_BACKEND", "sqlite")).lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend {backend!r}; "
+            f"choose one of {', '.join(STORAGE_BACKENDS)}"
+        )
+
+    module, class_name, default_path = STORAGE_BACKENDS[backend]
+    storage_class = getattr(importlib.import_module(module), class_name)
+    return storage_class(db_path or os.getenv("COSTKUBE_DB_PATH", default_path))
 
 
 # Global database instance
-db_service = DatabaseService()
+db_service = create_storage_backend()
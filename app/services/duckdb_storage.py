@@ -0,0 +1,630 @@
+"""
+DuckDB storage backend for historical metrics data
+
+A columnar alternative to the SQLite default, selected with
+COSTKUBE_STORAGE_BACKEND=duckdb (requires ``pip install duckdb pyarrow``).
+
+Snapshots are appended in bulk as Arrow tables with names stored inline;
+DuckDB dictionary-compresses repeated strings, so ingest needs no id lookups.
+Rows arrive in time order, so the per-segment min/max of ``ts``
+prunes window scans without any secondary index, and aggregations only read
+the columns they use. Rollup tiers match the SQLite backend so responses are
+identical.
+
+DuckDB connections are synchronous: every call runs on one dedicated worker
+thread, which also serializes writes.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.storage import (
+    HOURS_PER_MONTH,
+    ROLLUP_TIERS,
+    Position,
+    StorageBackend,
+    pod_rollup_table,
+    rollup_table,
+    trend_tier,
+    workload_name,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS namespace_samples (
+    ts BIGINT NOT NULL,
+    namespace VARCHAR NOT NULL,
+    cpu_mcores DOUBLE NOT NULL,
+    memory_bytes BIGINT NOT NULL,
+    hourly_cost DOUBLE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pod_samples (
+    ts BIGINT NOT NULL,
+    namespace VARCHAR NOT NULL,
+    workload VARCHAR NOT NULL,
+    pod VARCHAR NOT NULL,
+    cpu_mcores DOUBLE NOT NULL,
+    memory_bytes BIGINT NOT NULL,
+    hourly_cost DOUBLE NOT NULL
+);
+"""
+
+# Rollups per sample table: (series columns, table name function)
+ROLLUP_SERIES = {
+    "namespace_samples": (("namespace",), rollup_table),
+    "pod_samples": (("namespace", "workload", "pod"), pod_rollup_table),
+}
+
+ROLLUP_SCHEMA = "".join(
+    f"""
+CREATE TABLE IF NOT EXISTS {table(tier)} (
+    {"".join(f"{column} VARCHAR NOT NULL, " for column in series)}
+    bucket BIGINT NOT NULL,
+    samples BIGINT NOT NULL,
+    sum_cpu DOUBLE NOT NULL,
+    sum_memory DOUBLE NOT NULL,
+    sum_cost DOUBLE NOT NULL
+);
+"""
+    for series, table in ROLLUP_SERIES.values()
+    for tier, _ in ROLLUP_TIERS
+)
+
+RETENTION_TABLES = {
+    "raw": (("namespace_samples", "namespace", "ts"), ("pod_samples", "pod", "ts")),
+    **{
+        tier: (
+            (rollup_table(tier), "namespace", "bucket"),
+            (pod_rollup_table(tier), "pod", "bucket"),
+        )
+        for tier, _ in ROLLUP_TIERS
+    },
+}
+
+
+def _format_ts(column: str) -> str:
+    """SQL rendering epoch seconds like SQLite's datetime(x, 'unixepoch')"""
+    return f"strftime(make_timestamp({column} * 1000000), '%Y-%m-%d %H:%M:%S')"
+
+
+def _rollup_refresh_sql(samples: str, index: int) -> Tuple[str, str]:
+    """DELETE and INSERT that rebuild one bucket of a tier
+
+    Buckets are re-aggregated whole: a vectorized scan of the bucket's rows
+    costs little next to tracking deltas for replaced samples.
+    """
+    series, table = ROLLUP_SERIES[samples]
+    tier, _ = ROLLUP_TIERS[index]
+    if index == 0:
+        source, column = samples, "ts"
+        aggregates = "COUNT(*), SUM(cpu_mcores), SUM(memory_bytes), SUM(hourly_cost)"
+    else:
+        source, column = table(ROLLUP_TIERS[index - 1][0]), "bucket"
+        aggregates = "SUM(samples), SUM(sum_cpu), SUM(sum_memory), SUM(sum_cost)"
+
+    return (
+        f"DELETE FROM {table(tier)} WHERE bucket = ?",
+        f"""
+        INSERT INTO {table(tier)}
+        SELECT {", ".join(series)}, ?, {aggregates}
+        FROM {source}
+        WHERE {column} >= ? AND {column} < ?
+        GROUP BY {", ".join(series)}
+        """,
+    )
+
+
+ROLLUP_REFRESH_SQL = {
+    samples: tuple(_rollup_refresh_sql(samples, i) for i in range(len(ROLLUP_TIERS)))
+    for samples in ROLLUP_SERIES
+}
+
+_NAMESPACE_HISTORY_SELECT = f"""
+    SELECT
+        {_format_ts("ts")} as timestamp,
+        namespace,
+        cpu_mcores,
+        memory_bytes,
+        hourly_cost,
+        ROUND(hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost
+    FROM namespace_samples
+"""
+
+NAMESPACE_HISTORY_SQL = f"{_NAMESPACE_HISTORY_SELECT} WHERE ts >= ? ORDER BY ts"
+
+NAMESPACE_HISTORY_FOR_NAMESPACE_SQL = (
+    f"{_NAMESPACE_HISTORY_SELECT} WHERE ts >= ? AND namespace = ? ORDER BY ts"
+)
+
+# Keyset pages on (ts, namespace). The ts >= bound is the later of the window
+# start and the cursor, so zone maps skip everything already paged past.
+_NAMESPACE_HISTORY_PAGE_SELECT = f"""
+    SELECT
+        {_format_ts("ts")} as timestamp,
+        namespace,
+        cpu_mcores,
+        memory_bytes,
+        hourly_cost,
+        ROUND(hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost,
+        ts as _ts
+    FROM namespace_samples
+    WHERE ts >= ? AND (ts > ? OR (ts = ? AND namespace > ?))
+"""
+
+# Params: lower ts, after ts, after ts, after namespace, limit
+NAMESPACE_HISTORY_PAGE_SQL = f"""{_NAMESPACE_HISTORY_PAGE_SELECT}
+    ORDER BY ts, namespace
+    LIMIT ?
+"""
+
+# Params: lower ts, after ts, after ts, after namespace, namespace, limit
+NAMESPACE_HISTORY_PAGE_FOR_NAMESPACE_SQL = f"""{_NAMESPACE_HISTORY_PAGE_SELECT}
+      AND namespace = ?
+    ORDER BY ts
+    LIMIT ?
+"""
+
+POD_HISTORY_SQL = f"""
+    SELECT
+        {_format_ts("ts")} as timestamp,
+        namespace,
+        pod,
+        cpu_mcores,
+        memory_bytes,
+        hourly_cost,
+        ROUND(hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost
+    FROM pod_samples
+    WHERE namespace = ? AND pod = ? AND ts >= ?
+    ORDER BY ts
+"""
+
+
+# Pod pages order on (ts, "namespace/pod"); names cannot contain "/", so the
+# composite key is unique and fits a single-value cursor
+_POD_KEY = "namespace || '/' || pod"
+
+_POD_HISTORY_PAGE_SELECT = f"""
+    SELECT
+        {_format_ts("ts")} as timestamp,
+        namespace,
+        pod,
+        cpu_mcores,
+        memory_bytes,
+        hourly_cost,
+        ROUND(hourly_cost * {HOURS_PER_MONTH}, 2) as monthly_cost,
+        ts as _ts,
+        {_POD_KEY} as _series
+    FROM pod_samples
+    WHERE ts >= ? AND (ts > ? OR (ts = ? AND {_POD_KEY} > ?))
+"""
+
+# Params: lower ts, after ts, after ts, after pod key, limit
+POD_HISTORY_PAGE_SQL = f"""{_POD_HISTORY_PAGE_SELECT}
+    ORDER BY ts, _series
+    LIMIT ?
+"""
+
+# Params: lower ts, after ts, after ts, after pod key, namespace, limit
+POD_HISTORY_PAGE_FOR_NAMESPACE_SQL = f"""{_POD_HISTORY_PAGE_SELECT}
+      AND namespace = ?
+    ORDER BY ts, _series
+    LIMIT ?
+"""
+
+
+def _top_pods_sql(by_namespace: bool) -> str:
+    """Params: window start, first day, first day, [namespace,] limit"""
+    (hourly, _), (daily, _) = ROLLUP_TIERS
+    return f"""
+    WITH window_totals AS (
+        SELECT namespace, workload, pod, samples, sum_cpu, sum_memory, sum_cost
+        FROM {pod_rollup_table(hourly)}
+        WHERE bucket >= ? AND bucket < ?
+        UNION ALL
+        SELECT namespace, workload, pod, samples, sum_cpu, sum_memory, sum_cost
+        FROM {pod_rollup_table(daily)}
+        WHERE bucket >= ?
+    )
+    SELECT
+        namespace,
+        pod,
+        workload,
+        SUM(sum_cost) / SUM(samples) as avg_hourly_cost,
+        SUM(sum_cost) / SUM(samples) * {HOURS_PER_MONTH} as avg_monthly_cost,
+        SUM(sum_cpu) / SUM(samples) as avg_cpu,
+        SUM(sum_memory) / SUM(samples) as avg_memory
+    FROM window_totals
+    {"WHERE namespace = ?" if by_namespace else ""}
+    GROUP BY namespace, workload, pod
+    HAVING SUM(samples) > 0
+    ORDER BY avg_hourly_cost DESC
+    LIMIT ?
+"""
+
+
+TOP_PODS_SQL = _top_pods_sql(by_namespace=False)
+TOP_PODS_FOR_NAMESPACE_SQL = _top_pods_sql(by_namespace=True)
+
+WORKLOAD_TRENDS_SQL = {
+    tier: f"""
+        SELECT
+            {_format_ts("bucket")} as bucket_start,
+            SUM(sum_cost / samples) as total_cost,
+            SUM(sum_cpu / samples) as total_cpu,
+            SUM(sum_memory / samples) as total_memory,
+            COUNT(*) as pods
+        FROM {pod_rollup_table(tier)}
+        WHERE namespace = ? AND workload = ? AND bucket >= ? AND samples > 0
+        GROUP BY bucket
+        ORDER BY bucket
+    """
+    for tier, _ in ROLLUP_TIERS
+}
+
+COST_TRENDS_SQL = {
+    tier: f"""
+        SELECT
+            {_format_ts("bucket")} as bucket_start,
+            SUM(sum_cost / samples) as total_cost,
+            SUM(sum_cpu / samples) as total_cpu,
+            SUM(sum_memory / samples) as total_memory
+        FROM {rollup_table(tier)}
+        WHERE bucket >= ?
+        GROUP BY bucket
+        ORDER BY bucket
+    """
+    for tier, _ in ROLLUP_TIERS
+}
+
+# Params: since, first hour, first hour, first day, first day, limit
+TOP_NAMESPACES_SQL = f"""
+    WITH window_totals AS (
+        SELECT namespace, COUNT(*) as samples,
+               SUM(cpu_mcores) as sum_cpu, SUM(memory_bytes) as sum_memory,
+               SUM(hourly_cost) as sum_cost
+        FROM namespace_samples
+        WHERE ts >= ? AND ts < ?
+        GROUP BY namespace
+        UNION ALL
+        SELECT namespace, samples, sum_cpu, sum_memory, sum_cost
+        FROM {rollup_table(ROLLUP_TIERS[0][0])}
+        WHERE bucket >= ? AND bucket < ?
+        UNION ALL
+        SELECT namespace, samples, sum_cpu, sum_memory, sum_cost
+        FROM {rollup_table(ROLLUP_TIERS[1][0])}
+        WHERE bucket >= ?
+    )
+    SELECT
+        namespace,
+        SUM(sum_cost) / SUM(samples) as avg_hourly_cost,
+        SUM(sum_cost) / SUM(samples) * {HOURS_PER_MONTH} as avg_monthly_cost,
+        SUM(sum_cpu) / SUM(samples) as avg_cpu,
+        SUM(sum_memory) / SUM(samples) as avg_memory
+    FROM window_totals
+    GROUP BY namespace
+    ORDER BY avg_monthly_cost DESC
+    LIMIT ?
+"""
+
+DELETE_EXPIRED_SQL = {
+    table: f"""
+        DELETE FROM {table}
+        WHERE rowid IN (SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?)
+    """
+    for tables in RETENTION_TABLES.values()
+    for table, _, column in tables
+}
+
+
+class DuckDBStorage(StorageBackend):
+    name = "duckdb"
+    retention_tables = RETENTION_TABLES
+
+    def __init__(self, db_path: str = "data/costkube.duckdb"):
+        try:
+            import duckdb
+            import pyarrow
+        except ImportError as e:
+            raise RuntimeError(
+                "The duckdb storage backend needs the duckdb and pyarrow packages "
+                "(pip install duckdb pyarrow)"
+            ) from e
+
+        self._duckdb = duckdb
+        self._pyarrow = pyarrow
+        self.db_path = db_path
+        self._conn = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    async def _run(self, fn: Callable, *args):
+        """Run ``fn(conn, *args)`` on the DuckDB worker thread"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="duckdb"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    def _call(self, fn: Callable, args: tuple):
+        if self._conn is None:
+            self._conn = self._duckdb.connect(self.db_path)
+        return fn(self._conn, *args)
+
+    @staticmethod
+    def _fetch_dicts(conn, query: str, params: tuple) -> List[Dict[str, Any]]:
+        cursor = conn.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _transaction(conn, work: Callable):
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            result = work()
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    async def initialize(self):
+        """Create tables"""
+        await self._run(lambda conn: conn.execute(SCHEMA + ROLLUP_SCHEMA))
+
+    async def close(self):
+        """Close the connection and stop the worker thread"""
+        if self._executor is None:
+            return
+
+        def close(conn):
+            conn.close()
+            self._conn = None
+
+        if self._conn is not None:
+            await self._run(close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    # ==================== INGEST ====================
+
+    def _append(self, conn, table: str, ts: int, batch: Dict[str, np.ndarray]):
+        """Append ``batch`` at ``ts`` in one transaction
+
+        Like a primary key, a series' earlier sample at ``ts`` is replaced.
+        """
+        series, _ = ROLLUP_SERIES[table]
+        same_series = " AND ".join(f"t.{c} = batch.{c}" for c in series)
+
+        def work():
+            # Arrow tables are scanned in place; NumPy object columns would be
+            # converted row by row
+            conn.register("batch", self._pyarrow.table(batch))
+            try:
+                conn.execute(
+                    f"DELETE FROM {table} t USING batch "
+                    f"WHERE t.ts = ? AND {same_series}",
+                    (ts,),
+                )
+                conn.execute(
+                    f"INSERT INTO {table} ({', '.join(batch)}) "
+                    f"SELECT {', '.join(batch)} FROM batch"
+                )
+            finally:
+                conn.unregister("batch")
+
+            for (delete, insert), (_, seconds) in zip(
+                ROLLUP_REFRESH_SQL[table], ROLLUP_TIERS
+            ):
+                bucket = ts // seconds * seconds
+                conn.execute(delete, (bucket,))
+                conn.execute(insert, (bucket, bucket, bucket + seconds))
+
+        self._transaction(conn, work)
+
+    @staticmethod
+    def _usage_columns(metrics: List[Dict[str, Any]], ts: int) -> Dict[str, np.ndarray]:
+        count = len(metrics)
+        return {
+            "ts": np.full(count, ts, dtype=np.int64),
+            "namespace": np.array([m["namespace"] for m in metrics], dtype=object),
+            "cpu_mcores": np.fromiter(
+                (m["cpu_mcores"] for m in metrics), dtype=np.float64, count=count
+            ),
+            "memory_bytes": np.fromiter(
+                (m["memory_bytes"] for m in metrics), dtype=np.int64, count=count
+            ),
+            "hourly_cost": np.fromiter(
+                (m["hourly_cost"] for m in metrics), dtype=np.float64, count=count
+            ),
+        }
+
+    async def save_namespace_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save namespace metrics snapshot, taken now or at an epoch timestamp"""
+        if not metrics:
+            return
+        ts = int(timestamp if timestamp is not None else time.time())
+        batch = self._usage_columns(metrics, ts)
+        await self._run(self._append, "namespace_samples", ts, batch)
+
+    async def save_pod_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save pod metrics snapshot, taken now or at an epoch timestamp"""
+        if not metrics:
+            return
+        ts = int(timestamp if timestamp is not None else time.time())
+        batch = self._usage_columns(metrics, ts)
+        batch["pod"] = np.array([m["pod"] for m in metrics], dtype=object)
+        batch["workload"] = np.array(
+            [workload_name(m["pod"]) for m in metrics], dtype=object
+        )
+        await self._run(self._append, "pod_samples", ts, batch)
+
+    # ==================== QUERIES ====================
+
+    async def get_namespace_history(
+        self, namespace: Optional[str] = None, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Get historical namespace metrics"""
+        since = self._since(hours)
+        if namespace:
+            query, params = NAMESPACE_HISTORY_FOR_NAMESPACE_SQL, (since, namespace)
+        else:
+            query, params = NAMESPACE_HISTORY_SQL, (since,)
+        return await self._run(self._fetch_dicts, query, params)
+
+    async def get_namespace_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Get one keyset page of historical namespace metrics"""
+        since = self._since(hours)
+        after_ts, after_name = after if after is not None else (since, "")
+        bounds = (max(since, after_ts), after_ts, after_ts, after_name)
+        if namespace:
+            query = NAMESPACE_HISTORY_PAGE_FOR_NAMESPACE_SQL
+            params = (*bounds, namespace, limit)
+        else:
+            query, params = NAMESPACE_HISTORY_PAGE_SQL, (*bounds, limit)
+
+        page = await self._run(self._fetch_dicts, query, params)
+        positions = [(row.pop("_ts"), row["namespace"]) for row in page]
+        if len(page) < limit:
+            return page, None
+        return page, positions[-1]
+
+    async def get_cost_trends(self, hours: int = 168) -> Dict[str, Any]:
+        """Get cost trend data for charts (default: 7 days)"""
+        tier, seconds = trend_tier(hours)
+        since = self._since(hours) // seconds * seconds
+        rows = await self._run(self._fetch_dicts, COST_TRENDS_SQL[tier], (since,))
+
+        return {
+            "timestamps": [row["bucket_start"] for row in rows],
+            "costs": [row["total_cost"] for row in rows],
+            "cpu": [row["total_cpu"] for row in rows],
+            "memory": [row["total_memory"] for row in rows],
+            "resolution": tier,
+        }
+
+    async def get_top_namespaces(
+        self, limit: int = 10, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Get top namespaces by cost"""
+        since, first_hour, first_day = self._top_window(hours)
+        params = (since, first_hour, first_hour, first_day, first_day, limit)
+        return await self._run(self._fetch_dicts, TOP_NAMESPACES_SQL, params)
+
+    async def get_pod_history(
+        self, namespace: str, pod: str, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Get historical metrics of one pod"""
+        params = (namespace, pod, self._since(hours))
+        return await self._run(self._fetch_dicts, POD_HISTORY_SQL, params)
+
+    async def get_pod_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Get one keyset page of historical pod metrics"""
+        since = self._since(hours)
+        after_ts, after_key = after if after is not None else (since, "")
+        bounds = (max(since, after_ts), after_ts, after_ts, after_key)
+        if namespace:
+            query, params = POD_HISTORY_PAGE_FOR_NAMESPACE_SQL, (
+                *bounds,
+                namespace,
+                limit,
+            )
+        else:
+            query, params = POD_HISTORY_PAGE_SQL, (*bounds, limit)
+
+        page = await self._run(self._fetch_dicts, query, params)
+        positions = [(row.pop("_ts"), row.pop("_series")) for row in page]
+        if len(page) < limit:
+            return page, None
+        return page, positions[-1]
+
+    async def get_top_pods(
+        self, limit: int = 50, hours: int = 24, namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get top pods by cost"""
+        start, first_day = self._rollup_window(hours)
+        if namespace:
+            query = TOP_PODS_FOR_NAMESPACE_SQL
+            params = (start, first_day, first_day, namespace, limit)
+        else:
+            query, params = TOP_PODS_SQL, (start, first_day, first_day, limit)
+        return await self._run(self._fetch_dicts, query, params)
+
+    async def get_workload_trends(
+        self, namespace: str, workload: str, hours: int = 168
+    ) -> Dict[str, Any]:
+        """Get cost trend data for one workload, summed over its pods"""
+        tier, seconds = trend_tier(hours)
+        since = self._since(hours) // seconds * seconds
+        rows = await self._run(
+            self._fetch_dicts, WORKLOAD_TRENDS_SQL[tier], (namespace, workload, since)
+        )
+
+        return {
+            "timestamps": [row["bucket_start"] for row in rows],
+            "costs": [row["total_cost"] for row in rows],
+            "cpu": [row["total_cpu"] for row in rows],
+            "memory": [row["total_memory"] for row in rows],
+            "pods": [row["pods"] for row in rows],
+            "resolution": tier,
+        }
+
+    # ==================== RETENTION ====================
+
+    async def delete_chunk(
+        self, table: str, cutoff: int, chunk_size: int
+    ) -> Tuple[int, float]:
+        """Delete up to ``chunk_size`` rows older than ``cutoff`` from a table"""
+
+        def delete(conn):
+            started = time.perf_counter()
+            deleted = conn.execute(
+                DELETE_EXPIRED_SQL[table], (cutoff, chunk_size)
+            ).fetchone()[0]
+            return deleted, time.perf_counter() - started
+
+        return await self._run(delete)
+
+    async def prune_dimensions(self) -> Tuple[int, float]:
+        """Names are stored inline, so there are no dimension rows to prune"""
+        return 0, 0.0
+
+    async def reclaim_space(self, pages: int) -> Tuple[int, float]:
+        """Checkpoint so row groups emptied by deletes are released"""
+
+        def checkpoint(conn):
+            before = self._file_size()
+            started = time.perf_counter()
+            conn.execute("CHECKPOINT")
+            locked = time.perf_counter() - started
+            return max(before - self._file_size(), 0), locked
+
+        return await self._run(checkpoint)
+
+    def _file_size(self) -> int:
+        if self.db_path == ":memory:" or not os.path.exists(self.db_path):
+            return 0
+        return os.path.getsize(self.db_path)
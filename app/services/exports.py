@@ -0,0 +1,118 @@
+"""
+Streaming encoders for history exports
+
+Each encoder turns the keyset pages of a history window into one chunk per
+page, so exporting a month of pod samples holds a single page in memory.
+Parquet output needs the optional pyarrow package.
+"""
+
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import orjson
+
+Pages = AsyncIterator[List[Dict[str, Any]]]
+
+# Exported columns per level, in file order, with their Parquet types
+EXPORT_COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "namespaces": (
+        ("timestamp", "string"),
+        ("namespace", "string"),
+        ("cpu_mcores", "float64"),
+        ("memory_bytes", "int64"),
+        ("hourly_cost", "float64"),
+        ("monthly_cost", "float64"),
+    ),
+    "pods": (
+        ("timestamp", "string"),
+        ("namespace", "string"),
+        ("pod", "string"),
+        ("cpu_mcores", "float64"),
+        ("memory_bytes", "int64"),
+        ("hourly_cost", "float64"),
+        ("monthly_cost", "float64"),
+    ),
+}
+
+# Format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def load_pyarrow(feature: str = "Parquet export"):
+    """(pyarrow, pyarrow.parquet), or RuntimeError if pyarrow is missing"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            f"{feature} needs the pyarrow package (pip install pyarrow)"
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+async def csv_chunks(pages: Pages, level: str) -> AsyncIterator[str]:
+    columns = [name for name, _ in EXPORT_COLUMNS[level]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in pages:
+        writer.writerows([row[column] for column in columns] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue()
+
+
+async def ndjson_chunks(pages: Pages, level: str) -> AsyncIterator[bytes]:
+    async for rows in pages:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since last taken"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def parquet_chunks(pages: Pages, level: str) -> AsyncIterator[bytes]:
+    """Parquet file with one row group per page"""
+    pa, pq = load_pyarrow()
+    schema = pa.schema(
+        [(name, getattr(pa, type_name)()) for name, type_name in EXPORT_COLUMNS[level]]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in pages:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+ENCODERS = {"csv": csv_chunks, "ndjson": ndjson_chunks, "parquet": parquet_chunks}
@@ -0,0 +1,151 @@
+"""
+Write-behind queue for metrics history
+
+Snapshots are queued without touching the database, coalesced to one per
+sample interval and flushed in batches from a background task, so API
+latency never includes SQLite write time.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.database import db_service
+from app.services.metrics_collector import MetricsSnapshot, metrics_collector
+from app.services.storage import StorageBackend
+
+
+class HistoryWriter:
+    def __init__(
+        self,
+        db: StorageBackend,
+        sample_interval: float,
+        flush_interval: Optional[float] = None,
+    ):
+        self.db = db
+        self.sample_interval = max(sample_interval, 1.0)
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else float(os.getenv("HISTORY_FLUSH_INTERVAL", "5"))
+        )
+        # Latest snapshot per sample-interval bucket awaiting a flush
+        self._pending: Dict[int, MetricsSnapshot] = {}
+        self._last_flushed_bucket = -1
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._listeners: List[Callable[[], Any]] = []
+        self.stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "duplicates": 0,
+            "flushed_snapshots": 0,
+            "flushed_rows": 0,
+            "failed_flushes": 0,
+        }
+
+    def _bucket(self, snapshot: MetricsSnapshot) -> int:
+        return int(snapshot.collected_at // self.sample_interval)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, snapshot: MetricsSnapshot) -> bool:
+        """Queue a snapshot for persistence without waiting on the database.
+
+        Returns False when the snapshot's sample interval is already
+        persisted or queued with a newer snapshot.
+        """
+        self.stats["submitted"] += 1
+        if not snapshot.available:
+            return False
+
+        bucket = self._bucket(snapshot)
+        if bucket <= self._last_flushed_bucket:
+            self.stats["duplicates"] += 1
+            return False
+
+        queued = self._pending.get(bucket)
+        if queued is not None:
+            if queued.version >= snapshot.version:
+                self.stats["duplicates"] += 1
+                return False
+            self.stats["coalesced"] += 1
+
+        self._pending[bucket] = snapshot
+        return True
+
+    def add_listener(self, listener: Callable[[], Any]):
+        """Call ``listener`` after every flush that persisted new history"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], Any]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Warning: History flush listener failed: {e}")
+
+    async def flush(self):
+        """Persist every queued snapshot, oldest first"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            flushed = 0
+            for bucket in sorted(batch):
+                snapshot = batch[bucket]
+                try:
+                    await self.db.save_namespace_metrics(
+                        list(snapshot.namespaces), snapshot.collected_at
+                    )
+                    if snapshot.pods:
+                        await self.db.save_pod_metrics(
+                            list(snapshot.pods), snapshot.collected_at
+                        )
+                except Exception as e:
+                    self.stats["failed_flushes"] += 1
+                    print(f"Warning: Failed to save metrics history: {e}")
+                    continue
+
+                self._last_flushed_bucket = max(self._last_flushed_bucket, bucket)
+                self.stats["flushed_snapshots"] += 1
+                flushed += 1
+                self.stats["flushed_rows"] += len(snapshot.namespaces) + len(
+                    snapshot.pods or ()
+                )
+
+            if flushed:
+                self._notify()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None or self._task.done():
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and persist anything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global history writer instance
+history_writer = HistoryWriter(db_service, sample_interval=metrics_collector.interval)
@@ -1,24 +1,44 @@
+import asyncio
+import functools
+import json
 import os
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 
+from app.services.quantity import parse_cpu_mcores, parse_memory_bytes
 from app.services.simulated_k8s import SimulatedKubernetesCluster
 
 
 class KubernetesClient:
-    def __init__(self):
+    def __init__(
+        self,
+        api_client: Optional[client.ApiClient] = None,
+        use_simulated: Optional[bool] = None,
+    ):
         self.api_client = None
         self.metrics_api = None
+        self.core_api = None
         self.simulated_cluster = None
         self.use_simulated = (
-            os.getenv("USE_SIMULATED_CLUSTER", "true").lower() == "true"
+            use_simulated
+            if use_simulated is not None
+            else os.getenv("USE_SIMULATED_CLUSTER", "true").lower() == "true"
         )
-        self._init_k8s_client()
+        self.page_size = int(os.getenv("METRICS_PAGE_SIZE", "500"))
+        self._init_k8s_client(api_client)
 
-    def _init_k8s_client(self):
+    def _init_k8s_client(self, api_client: Optional[client.ApiClient] = None):
         """Initialize Kubernetes client with in-cluster, kubeconfig, or simulated cluster"""
+        # Use an explicitly configured API client (e.g. a local metrics-server)
+        if api_client is not None:
+            self.api_client = api_client
+            self.metrics_api = client.CustomObjectsApi(self.api_client)
+            self.core_api = client.CoreV1Api(self.api_client)
+            return
+
         # Check if simulated mode is forced
         if self.use_simulated:
             print("🎮 USE_SIMULATED_CLUSTER enabled - using simulated live data")
@@ -43,161 +63,248 @@ class KubernetesClient:
 
         self.api_client = client.ApiClient()
         self.metrics_api = client.CustomObjectsApi(self.api_client)
+        self.core_api = client.CoreV1Api(self.api_client)
         print("✅ Kubernetes client initialized successfully")
 
-    def get_namespace_usage(self) -> Optional[List[Dict[str, Any]]]:
-        """Get CPU and memory usage per namespace from metrics API or simulated cluster"""
+    def _iter_pod_metrics(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream PodMetrics items page by page using limit/continue tokens
+
+        A ``namespace`` lists only that namespace and a ``label_selector`` is
+        matched by the API server, so scoped views never page the cluster.
+        """
+        continue_token = None
+
+        while True:
+            params = {"limit": self.page_size}
+            if continue_token:
+                params["_continue"] = continue_token
+            if label_selector:
+                params["label_selector"] = label_selector
+
+            if namespace:
+                page = self.metrics_api.list_namespaced_custom_object(
+                    group="metrics.k8s.io",
+                    version="v1beta1",
+                    namespace=namespace,
+                    plural="pods",
+                    **params,
+                )
+            else:
+                page = self.metrics_api.list_cluster_custom_object(
+                    group="metrics.k8s.io", version="v1beta1", plural="pods", **params
+                )
+
+            # Hand items on one at a time so only the current page is held
+            yield from page.get("items", [])
+
+            continue_token = page.get("metadata", {}).get("continue")
+            if not continue_token:
+                return
+
+    def _get_pod_nodes(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> Dict[Tuple[str, str], str]:
+        """Map (namespace, pod) to the node each scheduled pod runs on"""
+        pod_nodes = {}
+        continue_token = None
+
+        while True:
+            params = {"limit": self.page_size, "field_selector": "spec.nodeName!="}
+            if continue_token:
+                params["_continue"] = continue_token
+            if label_selector:
+                params["label_selector"] = label_selector
+
+            # Skip model deserialization; only three fields per pod are needed
+            if namespace:
+                response = self.core_api.list_namespaced_pod(
+                    namespace, _preload_content=False, **params
+                )
+            else:
+                response = self.core_api.list_pod_for_all_namespaces(
+                    _preload_content=False, **params
+                )
+            page = json.loads(response.data)
+
+            for pod in page.get("items", []):
+                metadata = pod.get("metadata", {})
+                node = pod.get("spec", {}).get("nodeName")
+                if node:
+                    pod_nodes[(metadata.get("namespace"), metadata.get("name"))] = node
+
+            continue_token = page.get("metadata", {}).get("continue")
+            if not continue_token:
+                return pod_nodes
+
+    def _get_node_labels(self) -> Dict[str, Dict[str, str]]:
+        """Get the labels of every node, keyed by node name"""
+        response = self.core_api.list_node(_preload_content=False)
+        return {
+            node["metadata"]["name"]: node["metadata"].get("labels", {})
+            for node in json.loads(response.data).get("items", [])
+        }
+
+    def get_usage(
+        self,
+        include_nodes: bool = False,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Get per-pod usage and the per-namespace rollup from a single scrape
+
+        With ``include_nodes`` each pod row carries the node it runs on and
+        the result includes node labels for node-level pricing. ``namespace``
+        and ``label_selector`` scope the scrape to the matching pods.
+        """
         # Use simulated cluster if available
         if self.simulated_cluster:
-            return self.simulated_cluster.get_namespace_usage()
+            return self.simulated_cluster.get_usage(namespace, label_selector)
 
         if not self.metrics_api:
             return None
 
         try:
-            # Aggregate pod metrics by namespace
-            namespace_usage = {}
-
-            # Get pod metrics
-            pod_metrics = self.metrics_api.list_cluster_custom_object(
-                group="metrics.k8s.io", version="v1beta1", plural="pods"
+            pod_nodes = (
+                self._get_pod_nodes(namespace, label_selector) if include_nodes else {}
             )
+            nodes = self._get_node_labels() if include_nodes else {}
+            pod_usage = []
+            namespace_usage = {}
 
-            for pod_item in pod_metrics.get("items", []):
-                namespace = pod_item.get("metadata", {}).get("namespace", "default")
+            for pod_item in self._iter_pod_metrics(namespace, label_selector):
+                metadata = pod_item.get("metadata", {})
+                pod_namespace = metadata.get("namespace", "default")
 
-                if namespace not in namespace_usage:
-                    namespace_usage[namespace] = {
-                        "namespace": namespace,
+                if pod_namespace not in namespace_usage:
+                    namespace_usage[pod_namespace] = {
+                        "namespace": pod_namespace,
                         "cpu_mcores": 0,
                         "memory_bytes": 0,
                     }
 
+                # Sum container usage into one row per pod
+                cpu_mcores = 0
+                memory_bytes = 0
                 for container in pod_item.get("containers", []):
                     usage = container.get("usage", {})
-
-                    # Process CPU usage
-                    cpu_str = usage.get("cpu", "0")
-                    if cpu_str.endswith("n"):
-                        # Convert nanocores to millicores
-                        cpu_mcores = int(cpu_str[:-1]) / 1000000
-                    elif cpu_str.endswith("u"):
-                        # Convert microcores to millicores
-                        cpu_mcores = int(cpu_str[:-1]) / 1000
-                    elif cpu_str.endswith("m"):
-                        # Already in millicores
-                        cpu_mcores = int(cpu_str[:-1])
-                    else:
-                        # Cores to millicores
-                        cpu_mcores = float(cpu_str) * 1000
-
-                    namespace_usage[namespace]["cpu_mcores"] += cpu_mcores
-
-                    # Process memory usage
-                    mem_str = usage.get("memory", "0")
-                    if mem_str.endswith("Ki"):
-                        # Convert kibibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024
-                    elif mem_str.endswith("Mi"):
-                        # Convert mebibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024
-                    elif mem_str.endswith("Gi"):
-                        # Convert gibibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024 * 1024
-                    elif mem_str.endswith("Ti"):
-                        # Convert tebibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024 * 1024 * 1024
-                    elif mem_str.endswith("Pi"):
-                        # Convert pebibytes to bytes
-                        memory_bytes = (
-                            int(mem_str[:-2]) * 1024 * 1024 * 1024 * 1024 * 1024
-                        )
-                    else:
-                        # Assume bytes
-                        memory_bytes = int(mem_str)
-
-                    namespace_usage[namespace]["memory_bytes"] += memory_bytes
-
-            return list(namespace_usage.values())
+                    cpu_mcores += parse_cpu_mcores(usage.get("cpu", "0"))
+                    memory_bytes += parse_memory_bytes(usage.get("memory", "0"))
+
+                pod_row = {
+                    "namespace": pod_namespace,
+                    "pod": metadata.get("name", "unknown"),
+                    "cpu_mcores": cpu_mcores,
+                    "memory_bytes": memory_bytes,
+                    # metrics-server copies each pod's labels onto its PodMetrics
+                    "labels": metadata.get("labels") or {},
+                }
+                if include_nodes:
+                    pod_row["node"] = pod_nodes.get((pod_namespace, pod_row["pod"]))
+                pod_usage.append(pod_row)
+
+                # Roll the pod up into its namespace in the same pass
+                namespace_usage[pod_namespace]["cpu_mcores"] += cpu_mcores
+                namespace_usage[pod_namespace]["memory_bytes"] += memory_bytes
+
+            return {
+                "pods": pod_usage,
+                "namespaces": list(namespace_usage.values()),
+                "nodes": nodes,
+            }
 
         except ApiException as e:
-            print(f"Error fetching metrics: {e}")
-            return None
-
-    def get_pod_usage(self) -> Optional[List[Dict[str, Any]]]:
-        """Get CPU and memory usage per pod from metrics API or simulated cluster"""
-        # Use simulated cluster if available
-        if self.simulated_cluster:
-            return self.simulated_cluster.get_pod_usage()
-
-        if not self.metrics_api:
+            print(f"Error fetching pod metrics: {e}")
             return None
 
-        try:
-            # Get pod metrics
-            pod_metrics = self.metrics_api.list_cluster_custom_object(
-                group="metrics.k8s.io", version="v1beta1", plural="pods"
+    def get_namespace_usage(self) -> Optional[List[Dict[str, Any]]]:
+        """Get CPU and memory usage per namespace from metrics API or simulated cluster"""
+        usage = self.get_usage()
+        return usage["namespaces"] if usage is not None else None
+
+    def get_pod_usage(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get CPU and memory usage per pod from metrics API or simulated cluster
+
+        Only pods in ``namespace`` and matching ``label_selector`` are listed.
+        """
+        usage = self.get_usage(namespace=namespace, label_selector=label_selector)
+        return usage["pods"] if usage is not None else None
+
+
+class AsyncKubernetesClient:
+    """Asyncio front-end for KubernetesClient.
+
+    The kubernetes client is blocking, so scrapes run on a small bounded
+    thread pool and the event loop keeps serving requests and WebSocket
+    traffic while a metrics-server round-trip is in flight. Scoped scrapes
+    requested by clients run on a separate pool, so however many arrive they
+    never hold up the background collector's full scrapes.
+    """
+
+    def __init__(
+        self,
+        k8s_client: Optional[KubernetesClient] = None,
+        max_workers: Optional[int] = None,
+        scoped_workers: Optional[int] = None,
+    ):
+        self.client = k8s_client or KubernetesClient()
+        self.max_workers = max_workers or int(os.getenv("K8S_CLIENT_WORKERS", "2"))
+        self.scoped_workers = scoped_workers or int(
+            os.getenv("K8S_SCOPED_WORKERS", "1")
+        )
+        # Started on first use and released by close(); scoped scrapes get
+        # their own pool
+        self._pools: Dict[bool, ThreadPoolExecutor] = {}
+
+    def _pool(self, scoped: bool = False) -> ThreadPoolExecutor:
+        if scoped not in self._pools:
+            self._pools[scoped] = ThreadPoolExecutor(
+                max_workers=self.scoped_workers if scoped else self.max_workers,
+                thread_name_prefix="k8s-scoped" if scoped else "k8s-metrics",
             )
+        return self._pools[scoped]
 
-            pod_usage = []
-
-            for pod_item in pod_metrics.get("items", []):
-                namespace = pod_item.get("metadata", {}).get("namespace", "default")
-
-                for container in pod_item.get("containers", []):
-                    pod_name = pod_item.get("metadata", {}).get("name", "unknown")
+    async def _run(self, func, *args, scoped: bool = False, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool(scoped), functools.partial(func, *args, **kwargs)
+        )
 
-                    usage = container.get("usage", {})
+    async def get_usage(
+        self,
+        include_nodes: bool = False,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Non-blocking variant of KubernetesClient.get_usage"""
+        return await self._run(
+            self.client.get_usage,
+            scoped=namespace is not None or label_selector is not None,
+            include_nodes=include_nodes,
+            namespace=namespace,
+            label_selector=label_selector,
+        )
 
-                    # Process CPU usage
-                    cpu_str = usage.get("cpu", "0")
-                    if cpu_str.endswith("n"):
-                        # Convert nanocores to millicores
-                        cpu_mcores = int(cpu_str[:-1]) / 1000000
-                    elif cpu_str.endswith("u"):
-                        # Convert microcores to millicores
-                        cpu_mcores = int(cpu_str[:-1]) / 1000
-                    elif cpu_str.endswith("m"):
-                        # Already in millicores
-                        cpu_mcores = int(cpu_str[:-1])
-                    else:
-                        # Cores to millicores
-                        cpu_mcores = float(cpu_str) * 1000
-
-                    # Process memory usage
-                    mem_str = usage.get("memory", "0")
-                    if mem_str.endswith("Ki"):
-                        # Convert kibibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024
-                    elif mem_str.endswith("Mi"):
-                        # Convert mebibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024
-                    elif mem_str.endswith("Gi"):
-                        # Convert gibibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024 * 1024
-                    elif mem_str.endswith("Ti"):
-                        # Convert tebibytes to bytes
-                        memory_bytes = int(mem_str[:-2]) * 1024 * 1024 * 1024 * 1024
-                    elif mem_str.endswith("Pi"):
-                        # Convert pebibytes to bytes
-                        memory_bytes = (
-                            int(mem_str[:-2]) * 1024 * 1024 * 1024 * 1024 * 1024
-                        )
-                    else:
-                        # Assume bytes
-                        memory_bytes = int(mem_str)
-
-                    pod_usage.append(
-                        {
-                            "namespace": namespace,
-                            "pod": pod_name,
-                            "cpu_mcores": cpu_mcores,
-                            "memory_bytes": memory_bytes,
-                        }
-                    )
-
-            return pod_usage
+    async def get_namespace_usage(self) -> Optional[List[Dict[str, Any]]]:
+        """Non-blocking variant of KubernetesClient.get_namespace_usage"""
+        return await self._run(self.client.get_namespace_usage)
+
+    async def get_pod_usage(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Non-blocking variant of KubernetesClient.get_pod_usage"""
+        return await self._run(
+            self.client.get_pod_usage,
+            namespace,
+            label_selector,
+            scoped=namespace is not None or label_selector is not None,
+        )
 
-        except ApiException as e:
-            print(f"Error fetching pod metrics: {e}")
-            return None
+    def close(self):
+        """Release the worker threads; later calls start new ones"""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
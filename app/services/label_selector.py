@@ -0,0 +1,64 @@
+"""
+Kubernetes label selectors
+
+Parses the selector syntax of the Kubernetes API (``app=web``,
+``tier!=batch``, ``env in (prod,staging)``, ``env notin (dev)``, ``gpu``,
+``!gpu``) so pods can be matched locally the same way the API server
+matches them.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+# (label key, operator, values); operators are in, notin, exists and !exists
+Requirement = Tuple[str, str, FrozenSet[str]]
+
+_NAME = r"[A-Za-z0-9][\w./-]*"
+_VALUE = r"[\w.-]*"
+_SET_TERM = re.compile(rf"({_NAME})\s+(in|notin)\s*\(([^()]*)\)")
+_EQUALITY_TERM = re.compile(rf"({_NAME})\s*(==|=|!=)\s*({_VALUE})")
+_EXISTS_TERM = re.compile(rf"(!?)\s*({_NAME})")
+# Commas that separate terms, not the values of an in/notin set
+_TERM_SEPARATOR = re.compile(r",(?![^(]*\))")
+
+
+def parse_label_selector(selector: str) -> List[Requirement]:
+    """Requirements of a Kubernetes label selector; ValueError if malformed"""
+    requirements: List[Requirement] = []
+    if not selector.strip():
+        return requirements
+    for term in _TERM_SEPARATOR.split(selector):
+        term = term.strip()
+        if match := _SET_TERM.fullmatch(term):
+            key, operator, values = match.groups()
+            values = frozenset(value.strip() for value in values.split(","))
+            if not all(re.fullmatch(_VALUE, value) for value in values):
+                raise ValueError(f"Invalid label selector: {selector!r}")
+            requirements.append((key, operator, values))
+        elif match := _EQUALITY_TERM.fullmatch(term):
+            key, operator, value = match.groups()
+            operator = "notin" if operator == "!=" else "in"
+            requirements.append((key, operator, frozenset((value,))))
+        elif match := _EXISTS_TERM.fullmatch(term):
+            negated, key = match.groups()
+            requirements.append((key, "!exists" if negated else "exists", frozenset()))
+        else:
+            raise ValueError(f"Invalid label selector: {selector!r}")
+    return requirements
+
+
+def labels_match(labels: Dict[str, str], requirements: Sequence[Requirement]) -> bool:
+    """Whether a label set satisfies every requirement"""
+    for key, operator, values in requirements:
+        value = labels.get(key)
+        if operator == "in":
+            matched = value in values
+        elif operator == "notin":
+            matched = value not in values
+        elif operator == "exists":
+            matched = key in labels
+        else:
+            matched = key not in labels
+        if not matched:
+            return False
+    return True
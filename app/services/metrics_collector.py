@@ -0,0 +1,192 @@
+"""
+Background metrics collector
+
+Scrapes the cluster on a fixed interval, computes costs once per scrape and
+publishes an immutable snapshot that every API route reads from.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.cost_model import CostModel
+from app.services.k8s_client import AsyncKubernetesClient, KubernetesClient
+from app.services.response_cache import ResponseCache
+
+Rows = Tuple[Dict[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Point-in-time view of cluster usage and cost.
+
+    Rows are shared between every reader of the snapshot and must be treated
+    as read-only. ``None`` means the data could not be collected.
+    """
+
+    version: int
+    collected_at: float
+    namespaces: Optional[Rows]
+    pods: Optional[Rows]
+
+    @property
+    def available(self) -> bool:
+        return self.namespaces is not None
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.collected_at).isoformat()
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.collected_at)
+
+    def metadata(self) -> Dict[str, Any]:
+        """Snapshot freshness fields included in API responses"""
+        return {
+            "snapshot_version": self.version,
+            "snapshot_timestamp": self.timestamp,
+            "snapshot_age_seconds": round(self.age_seconds(), 3),
+        }
+
+
+class MetricsCollector:
+    def __init__(
+        self,
+        k8s_client: Optional[KubernetesClient] = None,
+        cost_model: Optional[CostModel] = None,
+        interval: Optional[float] = None,
+    ):
+        self.k8s_client = k8s_client or KubernetesClient()
+        self.async_client = AsyncKubernetesClient(self.k8s_client)
+        self.cost_model = cost_model or CostModel()
+        self.interval = (
+            interval
+            if interval is not None
+            else float(os.getenv("METRICS_COLLECTION_INTERVAL", "15"))
+        )
+        # Identical scoped scrapes share one in flight and reuse it briefly
+        self.scoped_scrapes = ResponseCache(
+            max_entries=64, ttl=float(os.getenv("LIVE_SCRAPE_TTL", "5"))
+        )
+        self._snapshot: Optional[MetricsSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[MetricsSnapshot], Any]] = []
+
+    @property
+    def snapshot(self) -> Optional[MetricsSnapshot]:
+        """Latest published snapshot, or None before the first scrape"""
+        return self._snapshot
+
+    async def collect(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> MetricsSnapshot:
+        """Scrape the cluster without blocking the event loop and cost the results
+
+        A ``namespace`` or ``label_selector`` scrapes only the matching pods.
+        Such a partial snapshot has version 0 and is never published.
+        """
+        collected_at = time.time()
+        scoped = namespace is not None or label_selector is not None
+        # One scrape yields both the pod rows and the namespace rollup
+        usage = await self.async_client.get_usage(
+            include_nodes=self.cost_model.node_pricing_enabled,
+            namespace=namespace,
+            label_selector=label_selector,
+        )
+
+        namespaces = pods = None
+        if usage is not None:
+            self.cost_model.update_nodes(usage.get("nodes", {}))
+            pods = tuple(self.cost_model.compute_cost(usage["pods"]))
+            namespaces = tuple(
+                self.cost_model.compute_namespace_cost(
+                    usage["namespaces"], usage["pods"]
+                )
+            )
+
+        return MetricsSnapshot(
+            version=0 if scoped else self._version + 1,
+            collected_at=collected_at,
+            namespaces=namespaces,
+            pods=pods,
+        )
+
+    async def collect_scoped(
+        self, namespace: Optional[str], label_selector: Optional[str]
+    ) -> MetricsSnapshot:
+        """``collect`` for a namespace or label selector, coalescing repeats
+
+        Concurrent requests for the same scope wait on a single scrape, and
+        its result is served for ``LIVE_SCRAPE_TTL`` seconds.
+        """
+        return await self.scoped_scrapes.get_or_compute(
+            "scoped_scrape",
+            {"namespace": namespace, "label_selector": label_selector},
+            lambda: self.collect(namespace, label_selector),
+        )
+
+    def add_listener(self, listener: Callable[[MetricsSnapshot], Any]):
+        """Call ``listener`` with every newly published snapshot"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[MetricsSnapshot], Any]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _publish(self, snapshot: MetricsSnapshot) -> MetricsSnapshot:
+        self._version = snapshot.version
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Warning: Snapshot listener failed: {e}")
+        return snapshot
+
+    async def refresh(self) -> MetricsSnapshot:
+        """Collect and publish a new snapshot"""
+        async with self._lock:
+            return self._publish(await self.collect())
+
+    async def get_snapshot(self) -> MetricsSnapshot:
+        """Latest snapshot, collecting one on demand if none exists yet"""
+        if self._snapshot is None:
+            async with self._lock:
+                if self._snapshot is None:
+                    self._publish(await self.collect())
+        return self._snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Warning: Metrics collection failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background collection loop"""
+        if self._task is None or self._task.done():
+            # Bind a fresh lock to the running loop
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background collection loop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global metrics collector instance
+metrics_collector = MetricsCollector()
@@ -0,0 +1,194 @@
+"""
+Indexed view of a snapshot's pods
+
+``/api/pods`` filters, sorts and pages the latest snapshot without copying
+or rescanning every pod per request. A ``PodIndex`` is built once per
+snapshot and records where each namespace and label value occurs. Each sort
+order is computed the first time it is requested and reused until the next
+snapshot. Pages start at an offset or after a cursor. The cursor holds the
+last row's sort key, so it still works after a new snapshot is published.
+"""
+
+import base64
+import binascii
+import bisect
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import orjson
+
+from app.services.label_selector import Requirement
+from app.services.metrics_collector import MetricsSnapshot
+
+# Columns /api/pods can sort on; prefix with "-" for descending
+SORT_COLUMNS = (
+    "cpu_mcores",
+    "memory_bytes",
+    "cpu_core_hours",
+    "memory_gb_hours",
+    "hourly_cost",
+    "monthly_cost",
+)
+
+SortKey = Tuple[Any, ...]
+
+
+def sort_key(pod: Dict[str, Any], sort: Optional[str]) -> SortKey:
+    """Position of ``pod`` in ``sort`` order, ties broken by namespace and name"""
+    name = (pod["namespace"], pod["pod"])
+    if sort is None:
+        return name
+    value = pod.get(sort.lstrip("-")) or 0
+    return (-value if sort.startswith("-") else value, *name)
+
+
+def encode_key(key: SortKey) -> str:
+    """Opaque, URL-safe cursor for a sort key"""
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode().rstrip("=")
+
+
+def decode_key(cursor: str, sort: Optional[str]) -> SortKey:
+    """Inverse of ``encode_key`` for ``sort``; raises ValueError if malformed"""
+    try:
+        key = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, orjson.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    width = 2 if sort is None else 3
+    if (
+        not isinstance(key, list)
+        or len(key) != width
+        or not all(isinstance(part, str) for part in key[-2:])
+        or (sort is not None and type(key[0]) not in (int, float))
+    ):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return tuple(key)
+
+
+@dataclass(frozen=True)
+class PodPage:
+    rows: List[Dict[str, Any]]
+    # Pods matching the filters across all pages
+    total: int
+    # Sort key of the last row when more rows follow, else None
+    next_key: Optional[SortKey]
+
+
+class PodIndex:
+    def __init__(self, pods: Sequence[Dict[str, Any]]):
+        self.pods = pods
+        self.names = [pod["pod"] for pod in pods]
+        self.hourly_costs = [pod["hourly_cost"] for pod in pods]
+        self.by_namespace: Dict[str, List[int]] = {}
+        for position, pod in enumerate(pods):
+            self.by_namespace.setdefault(pod["namespace"], []).append(position)
+        self._by_label: Optional[Dict[str, Dict[str, List[int]]]] = None
+        # sort -> every position in sort order
+        self._orders: Dict[Optional[str], List[int]] = {}
+
+    @property
+    def by_label(self) -> Dict[str, Dict[str, List[int]]]:
+        """Positions per label key and value, built on the first selector"""
+        if self._by_label is None:
+            self._by_label = {}
+            for position, pod in enumerate(self.pods):
+                for key, value in (pod.get("labels") or {}).items():
+                    self._by_label.setdefault(key, {}).setdefault(value, []).append(
+                        position
+                    )
+        return self._by_label
+
+    def order(self, sort: Optional[str]) -> List[int]:
+        """Every position in ``sort`` order, built on first use"""
+        if sort not in self._orders:
+            pods = self.pods
+            if sort is None:
+                # One string per pod compares faster than (namespace, pod)
+                # tuples; "\0" sorts below any name character, keeping that order
+                names = [pod["namespace"] + "\0" + pod["pod"] for pod in pods]
+                order = sorted(range(len(pods)), key=names.__getitem__)
+            else:
+                values = [pod.get(sort.lstrip("-")) or 0 for pod in pods]
+                # Stable, so equal values stay in name order either way
+                order = sorted(
+                    self.order(None),
+                    key=values.__getitem__,
+                    reverse=sort.startswith("-"),
+                )
+            self._orders[sort] = order
+        return self._orders[sort]
+
+    def candidates(
+        self, namespace: Optional[str], requirements: Sequence[Requirement]
+    ) -> Optional[Set[int]]:
+        """Positions passing the namespace and label filters, None for every pod"""
+        candidates = None
+        if namespace is not None:
+            candidates = set(self.by_namespace.get(namespace, ()))
+        for key, operator, values in requirements:
+            by_value = self.by_label.get(key, {})
+            if operator in ("in", "notin"):
+                matched = set().union(*(by_value.get(value, ()) for value in values))
+            else:
+                matched = set().union(*by_value.values())
+            if operator in ("in", "exists"):
+                candidates = matched if candidates is None else candidates & matched
+            else:
+                if candidates is None:
+                    candidates = set(range(len(self.pods)))
+                candidates -= matched
+        return candidates
+
+    def query(
+        self,
+        namespace: Optional[str] = None,
+        requirements: Sequence[Requirement] = (),
+        name_prefix: Optional[str] = None,
+        min_hourly_cost: Optional[float] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[SortKey] = None,
+    ) -> PodPage:
+        """One page of the pods matching every given filter, in ``sort`` order"""
+        pods = self.pods
+        candidates = self.candidates(namespace, requirements)
+        if candidates is not None and len(candidates) * 8 < len(pods):
+            # A narrow filter: sorting its matches beats walking the full order
+            matched = sorted(candidates, key=lambda p: sort_key(pods[p], sort))
+        else:
+            matched = self.order(sort)
+            if candidates is not None:
+                matched = [p for p in matched if p in candidates]
+        if name_prefix is not None:
+            names = self.names
+            matched = [p for p in matched if names[p].startswith(name_prefix)]
+        if min_hourly_cost is not None:
+            costs = self.hourly_costs
+            matched = [p for p in matched if costs[p] >= min_hourly_cost]
+
+        start = offset
+        if after is not None:
+            start += bisect.bisect_right(
+                matched, after, key=lambda p: sort_key(pods[p], sort)
+            )
+        end = len(matched) if limit is None else min(start + limit, len(matched))
+        return PodPage(
+            rows=[pods[p] for p in matched[start:end]],
+            total=len(matched),
+            next_key=(
+                sort_key(pods[matched[end - 1]], sort)
+                if start < end < len(matched)
+                else None
+            ),
+        )
+
+
+_latest: Optional[Tuple[MetricsSnapshot, PodIndex]] = None
+
+
+def snapshot_index(snapshot: MetricsSnapshot) -> PodIndex:
+    """Index of ``snapshot``'s pods, built once and kept until the next snapshot"""
+    global _latest
+    if _latest is None or _latest[0] is not snapshot:
+        _latest = snapshot, PodIndex(snapshot.pods or ())
+    return _latest[1]
@@ -0,0 +1,71 @@
+"""
+Kubernetes resource quantity parsing
+
+Implements the full quantity grammar used by the Kubernetes API
+(binary SI, decimal SI and decimal exponent suffixes). Container usage
+values repeat heavily across a cluster, so parsed results are cached.
+"""
+
+import math
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+# Multiplier for every suffix the API server emits
+SUFFIX_MULTIPLIERS = {
+    # Binary SI
+    "Ki": Decimal(2**10),
+    "Mi": Decimal(2**20),
+    "Gi": Decimal(2**30),
+    "Ti": Decimal(2**40),
+    "Pi": Decimal(2**50),
+    "Ei": Decimal(2**60),
+    # Decimal SI
+    "n": Decimal("1e-9"),
+    "u": Decimal("1e-6"),
+    "m": Decimal("1e-3"),
+    "": Decimal(1),
+    "k": Decimal("1e3"),
+    "M": Decimal("1e6"),
+    "G": Decimal("1e9"),
+    "T": Decimal("1e12"),
+    "P": Decimal("1e15"),
+    "E": Decimal("1e18"),
+}
+
+_QUANTITY_RE = re.compile(
+    r"^(?P<number>[+-]?(?:\d+\.?\d*|\.\d+))"
+    r"(?:(?P<exponent>[eE][+-]?\d+)|(?P<suffix>Ki|Mi|Gi|Ti|Pi|Ei|[numkMGTPE])?)$"
+)
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_quantity(quantity: str) -> Decimal:
+    """Parse a quantity string such as ``250m``, ``1.5Gi`` or ``12e6`` to base units"""
+    match = _QUANTITY_RE.match(quantity.strip())
+    if match is None:
+        raise ValueError(f"Invalid Kubernetes quantity: {quantity!r}")
+
+    try:
+        number = Decimal(match.group("number"))
+    except InvalidOperation:
+        raise ValueError(f"Invalid Kubernetes quantity: {quantity!r}")
+
+    exponent = match.group("exponent")
+    if exponent:
+        return number.scaleb(int(exponent[1:]))
+    return number * SUFFIX_MULTIPLIERS[match.group("suffix") or ""]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_cpu_mcores(quantity: str) -> float:
+    """Parse a CPU quantity to millicores"""
+    return float(parse_quantity(quantity) * 1000)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_memory_bytes(quantity: str) -> int:
+    """Parse a memory quantity to bytes, rounding fractional bytes up"""
+    return math.ceil(parse_quantity(quantity))
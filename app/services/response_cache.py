@@ -0,0 +1,135 @@
+"""
+In-process response cache for read-heavy endpoints
+
+Dashboards poll the same trend, top-N, forecast and recommendation views
+from every open tab, while the data behind them only changes once per
+scrape. Results are kept in a bounded LRU keyed by endpoint and normalized
+query parameters, dropped whenever a new snapshot is published or history
+is flushed, and expire after a TTL as a backstop. Concurrent misses for the
+same key share one in-flight computation instead of each running it.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Hashable], ...]]
+
+
+def cache_key(endpoint: str, params: Dict[str, Hashable]) -> CacheKey:
+    """Key that ignores parameter order and omitted (None) parameters"""
+    return endpoint, tuple(
+        sorted((name, value) for name, value in params.items() if value is not None)
+    )
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+        self.ttl = (
+            ttl if ttl is not None else float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+        )
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        # Bumped on invalidation so results computed from older data are not stored
+        self._generation = 0
+        # key -> computation that concurrent misses for that key wait on
+        self._in_flight: Dict[CacheKey, asyncio.Future] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """(True, value) for a live entry, else (False, None)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return True, value
+            del self._entries[key]
+            self.stats["expirations"] += 1
+        self.stats["misses"] += 1
+        return False, None
+
+    def set(self, key: CacheKey, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, *_):
+        """Drop every entry; usable directly as a snapshot or flush listener"""
+        self._generation += 1
+        if self._entries:
+            self._entries.clear()
+        # Later misses must not join computations that read the old data
+        self._in_flight.clear()
+        self.stats["invalidations"] += 1
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: Dict[str, Hashable],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Cached result for ``endpoint`` with ``params``, computing it on a miss
+
+        Misses that arrive while the same key is already being computed await
+        that computation (single-flight). Exceptions reach every waiter and are
+        never cached.
+        """
+        key = cache_key(endpoint, params)
+        found, value = self.get(key)
+        if found:
+            return value
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(compute())
+            self._in_flight[key] = flight
+            flight.add_done_callback(partial(self._land, key, self._generation))
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shielded so one client going away doesn't cancel everyone's result
+        return await asyncio.shield(flight)
+
+    def _land(self, key: CacheKey, generation: int, flight: asyncio.Future):
+        """Store a finished computation unless it was invalidated meanwhile"""
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        if generation == self._generation:
+            self.set(key, flight.result())
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            **self.stats,
+        }
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,141 @@
+"""
+Retention scheduler for metrics history
+
+Periodically purges samples and rollups that have aged out of their tier's
+retention window. Deletes run in bounded chunks, each in its own short
+write transaction, so history writes interleave with a purge instead of
+waiting behind it. Freed pages are then handed back to the filesystem with
+incremental vacuum.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.services.database import db_service
+from app.services.storage import StorageBackend
+
+# Default days kept per tier; override with RETENTION_<TIER>_DAYS
+DEFAULT_RETENTION_DAYS = {"raw": 7, "1h": 90, "1d": 730}
+
+
+def retention_policies() -> Dict[str, float]:
+    """Days of history kept per tier, from the environment"""
+    return {
+        tier: float(os.getenv(f"RETENTION_{tier.upper()}_DAYS", str(days)))
+        for tier, days in DEFAULT_RETENTION_DAYS.items()
+    }
+
+
+class RetentionScheduler:
+    def __init__(
+        self,
+        db: StorageBackend,
+        policies: Optional[Dict[str, float]] = None,
+        interval: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        vacuum_pages: Optional[int] = None,
+    ):
+        self.db = db
+        self.policies = policies if policies is not None else retention_policies()
+        self.interval = (
+            interval
+            if interval is not None
+            else float(os.getenv("RETENTION_INTERVAL", "3600"))
+        )
+        self.chunk_size = chunk_size or int(os.getenv("RETENTION_CHUNK_SIZE", "5000"))
+        self.vacuum_pages = vacuum_pages or int(
+            os.getenv("RETENTION_VACUUM_PAGES", "1000")
+        )
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "failed_runs": 0,
+            "rows_purged": {tier: 0 for tier in db.retention_tables},
+            "dimensions_pruned": 0,
+            "bytes_reclaimed": 0,
+            "lock_seconds": 0.0,
+            "max_lock_seconds": 0.0,
+            "last_run_at": None,
+            "last_run_seconds": None,
+        }
+
+    def _record_lock(self, seconds: float):
+        self.stats["lock_seconds"] += seconds
+        self.stats["max_lock_seconds"] = max(self.stats["max_lock_seconds"], seconds)
+
+    async def _purge_tier(self, tier: str, days: float, now: float) -> int:
+        cutoff = int(now - days * 86400)
+        purged = 0
+        for table, _, _ in self.db.retention_tables[tier]:
+            while True:
+                deleted, locked = await self.db.delete_chunk(
+                    table, cutoff, self.chunk_size
+                )
+                self._record_lock(locked)
+                purged += deleted
+                if deleted < self.chunk_size:
+                    break
+                # Let queued history writes take the lock between chunks
+                await asyncio.sleep(0)
+        return purged
+
+    async def run_once(self) -> Dict[str, int]:
+        """Apply every retention policy once; returns rows purged per tier"""
+        started = time.perf_counter()
+        now = time.time()
+        purged = {}
+
+        for tier, days in self.policies.items():
+            if tier not in self.db.retention_tables or days <= 0:
+                continue
+            purged[tier] = await self._purge_tier(tier, days, now)
+            self.stats["rows_purged"][tier] += purged[tier]
+
+        pruned, locked = await self.db.prune_dimensions()
+        self._record_lock(locked)
+        self.stats["dimensions_pruned"] += pruned
+
+        while True:
+            reclaimed, locked = await self.db.reclaim_space(self.vacuum_pages)
+            self._record_lock(locked)
+            self.stats["bytes_reclaimed"] += reclaimed
+            if not reclaimed:
+                break
+            await asyncio.sleep(0)
+
+        self.stats["runs"] += 1
+        self.stats["last_run_at"] = now
+        self.stats["last_run_seconds"] = time.perf_counter() - started
+        return purged
+
+    async def _run(self):
+        while True:
+            try:
+                purged = await self.run_once()
+                if any(purged.values()):
+                    print(f"🧹 Retention purged {purged}")
+            except Exception as e:
+                self.stats["failed_runs"] += 1
+                print(f"Warning: Retention run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background retention loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the retention loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global retention scheduler instance
+retention_scheduler = RetentionScheduler(db_service)
@@ -6,7 +6,10 @@ Perfect for demos and development.
 
 import random
 import time
-from typing import Any, Dict, List
+import zlib
+from typing import Any, Dict, List, Optional
+
+from app.services.label_selector import labels_match, parse_label_selector
 
 
 class SimulatedKubernetesCluster:
@@ -15,6 +18,14 @@ class SimulatedKubernetesCluster:
     def __init__(self):
         self.start_time = time.time()
 
+        # Simulated node pools, labelled like a managed cloud cluster
+        self.nodes = {
+            "ip-10-0-1-21": self._node_labels("m6i.xlarge", "on-demand", "a", "amd64"),
+            "ip-10-0-1-37": self._node_labels("m6i.xlarge", "on-demand", "b", "amd64"),
+            "ip-10-0-2-14": self._node_labels("m6g.xlarge", "spot", "a", "arm64"),
+            "ip-10-0-2-58": self._node_labels("m6g.xlarge", "spot", "c", "arm64"),
+        }
+
         # Define realistic workloads
         self.workloads = {
             "production": [
@@ -69,6 +80,43 @@ class SimulatedKubernetesCluster:
             ],
         }
 
+    @staticmethod
+    def _node_labels(
+        instance_type: str, capacity_type: str, zone: str, arch: str
+    ) -> Dict[str, str]:
+        return {
+            "node.kubernetes.io/instance-type": instance_type,
+            "karpenter.sh/capacity-type": capacity_type,
+            "topology.kubernetes.io/zone": f"us-east-1{zone}",
+            "kubernetes.io/arch": arch,
+        }
+
+    def _schedule(self, namespace: str, workload: str, replica: int) -> str:
+        """Deterministically place a workload replica on a node"""
+        node_names = list(self.nodes)
+        key = f"{namespace}/{workload}/{replica}".encode()
+        return node_names[zlib.crc32(key) % len(node_names)]
+
+    @staticmethod
+    def _pod_name(namespace: str, workload: str, replica: int) -> str:
+        """Stable Deployment-style pod name (<workload>-<rs hash>-<pod hash>)
+
+        Names survive between scrapes like real pods do, so stored history
+        keeps one series per replica instead of a new pod every sample.
+        """
+        alphabet = "bcdfghjklmnpqrstvwxz2456789"
+
+        def suffix(key: str, length: int) -> str:
+            value = zlib.crc32(key.encode())
+            chars = []
+            for _ in range(length):
+                value, index = divmod(value, len(alphabet))
+                chars.append(alphabet[index])
+            return "".join(chars)
+
+        template = suffix(f"{namespace}/{workload}", 6) + suffix(workload, 3)
+        return f"{workload}-{template}-{suffix(f'{namespace}/{workload}/{replica}', 5)}"
+
     def _get_time_variance(self) -> float:
         """Generate realistic time-based variance (simulates daily patterns)"""
         elapsed = time.time() - self.start_time
@@ -83,60 +131,57 @@ class SimulatedKubernetesCluster:
         jitter = random.uniform(1 - variance, 1 + variance)
         return base_value * jitter
 
-    def get_namespace_usage(self) -> List[Dict[str, Any]]:
-        """Generate realistic namespace-level metrics"""
-        time_variance = self._get_time_variance()
-        namespace_metrics = []
+    def get_usage(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate pod-level metrics and derive the namespace rollup from them"""
+        pod_metrics = self.get_pod_usage(namespace, label_selector)
+        namespace_metrics = {
+            ns: {"namespace": ns, "cpu_mcores": 0, "memory_bytes": 0}
+            for ns in self.workloads
+            if namespace is None or ns == namespace
+        }
 
-        for namespace, workloads in self.workloads.items():
-            total_cpu = 0
-            total_memory = 0
+        for pod in pod_metrics:
+            namespace_metrics[pod["namespace"]]["cpu_mcores"] += pod["cpu_mcores"]
+            namespace_metrics[pod["namespace"]]["memory_bytes"] += pod["memory_bytes"]
 
-            for workload in workloads:
-                # Calculate total for all replicas
-                for _ in range(workload["replicas"]):
-                    # Apply time-based variance and random jitter
-                    cpu = self._add_random_jitter(
-                        workload["cpu_base"] * time_variance, variance=0.20
-                    )
-                    memory = self._add_random_jitter(
-                        workload["mem_base"] * 1024 * 1024,  # Convert MB to bytes
-                        variance=0.10,
-                    )
-
-                    total_cpu += cpu
-                    total_memory += memory
+        return {
+            "pods": pod_metrics,
+            "namespaces": list(namespace_metrics.values()),
+            "nodes": self.nodes,
+        }
 
-            namespace_metrics.append(
-                {
-                    "namespace": namespace,
-                    "cpu_mcores": int(total_cpu),
-                    "memory_bytes": int(total_memory),
-                }
-            )
+    def get_namespace_usage(self) -> List[Dict[str, Any]]:
+        """Generate realistic namespace-level metrics"""
+        return self.get_usage()["namespaces"]
 
-        return namespace_metrics
+    def get_pod_usage(
+        self, namespace: Optional[str] = None, label_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Generate realistic pod-level metrics
 
-    def get_pod_usage(self, namespace: str = None) -> List[Dict[str, Any]]:
-        """Generate realistic pod-level metrics"""
+        Like the metrics API, only pods in ``namespace`` and matching
+        ``label_selector`` are generated; an unknown namespace has no pods.
+        """
         time_variance = self._get_time_variance()
+        requirements = parse_label_selector(label_selector or "")
         pod_metrics = []
 
         # Filter workloads by namespace if specified
         workloads_to_process = (
-            {namespace: self.workloads[namespace]}
-            if namespace and namespace in self.workloads
+            {namespace: self.workloads.get(namespace, [])}
+            if namespace
             else self.workloads
         )
 
         for ns, workloads in workloads_to_process.items():
             for workload in workloads:
+                labels = {"app": workload["name"]}
+                if not labels_match(labels, requirements):
+                    continue
                 for replica in range(workload["replicas"]):
-                    # Generate unique pod name
-                    pod_suffix = "".join(
-                        random.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=10)
-                    )
-                    pod_name = f"{workload['name']}-{pod_suffix}"
+                    pod_name = self._pod_name(ns, workload["name"], replica)
 
                     # Apply time-based variance and random jitter
                     cpu = self._add_random_jitter(
@@ -153,6 +198,8 @@ class SimulatedKubernetesCluster:
                             "pod": pod_name,
                             "cpu_mcores": int(cpu),
                             "memory_bytes": int(memory),
+                            "node": self._schedule(ns, workload["name"], replica),
+                            "labels": labels,
                         }
                     )
 
@@ -0,0 +1,265 @@
+"""
+Storage interface for metrics history
+
+Every history backend implements ``StorageBackend``. The SQLite
+``DatabaseService`` is the default; ``COSTKUBE_STORAGE_BACKEND`` selects
+another one (see ``app.services.database.create_storage_backend``).
+
+Backends share the downsampling tiers and the trend/top-N semantics defined
+here, so switching backends never changes API responses.
+"""
+
+import base64
+import binascii
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+HOURS_PER_MONTH = 730
+
+# Downsampling tiers as (name, bucket seconds), finest first
+ROLLUP_TIERS = (("1h", 3600), ("1d", 86400))
+
+# Trends use the coarsest tier that still yields this many points
+TREND_MIN_POINTS = 48
+
+# Controllers draw generated suffixes from this vowel-free alphabet, so a
+# word such as "proxy" in a pod's own name is never taken for one
+_SUFFIX_CHARS = "[bcdfghjklmnpqrstvwxz2456789]"
+# <deployment>-<pod-template hash>-<pod hash>
+_DEPLOYMENT_POD_RE = re.compile(
+    rf"^(?P<name>.+)-{_SUFFIX_CHARS}{{6,10}}-{_SUFFIX_CHARS}{{5}}$"
+)
+# <statefulset>-<ordinal> or <daemonset/job>-<pod hash>
+_CONTROLLED_POD_RE = re.compile(rf"^(?P<name>.+)-(?:\d+|{_SUFFIX_CHARS}{{5}})$")
+
+
+def workload_name(pod: str) -> str:
+    """Best-effort name of the workload that owns a pod"""
+    match = _DEPLOYMENT_POD_RE.match(pod) or _CONTROLLED_POD_RE.match(pod)
+    return match.group("name") if match else pod
+
+
+def trend_tier(hours: int) -> Tuple[str, int]:
+    """Coarsest rollup tier that gives a window of ``hours`` enough points"""
+    for tier, seconds in reversed(ROLLUP_TIERS):
+        if hours * 3600 // seconds >= TREND_MIN_POINTS:
+            return tier, seconds
+    return ROLLUP_TIERS[0]
+
+
+def rollup_table(tier: str) -> str:
+    return f"namespace_rollup_{tier}"
+
+
+def pod_rollup_table(tier: str) -> str:
+    return f"pod_rollup_{tier}"
+
+
+# Keyset position of a history row: (epoch seconds, backend's series key)
+Position = Tuple[int, Union[int, str]]
+
+
+def encode_cursor(position: Position) -> str:
+    """Opaque, URL-safe cursor for a keyset position"""
+    raw = json.dumps(list(position), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Position:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, key = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if type(ts) is not int or type(key) not in (int, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return ts, key
+
+
+class StorageBackend(ABC):
+    """Persistence for namespace and pod metrics history"""
+
+    name: str
+
+    # Time-series tables per retention tier as (table, series column, time column)
+    retention_tables: Dict[str, Tuple[Tuple[str, str, str], ...]]
+
+    @abstractmethod
+    async def initialize(self):
+        """Create or migrate the schema"""
+
+    @abstractmethod
+    async def close(self):
+        """Release connections and worker threads"""
+
+    @abstractmethod
+    async def save_namespace_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save a namespace snapshot, replacing any sample at the same time"""
+
+    @abstractmethod
+    async def save_pod_metrics(
+        self, metrics: List[Dict[str, Any]], timestamp: Optional[float] = None
+    ):
+        """Save a pod snapshot, replacing any sample at the same time"""
+
+    @abstractmethod
+    async def get_namespace_history(
+        self, namespace: Optional[str] = None, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Raw namespace samples in the window, oldest first"""
+
+    @abstractmethod
+    async def get_namespace_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Up to ``limit`` raw samples following ``after``, in keyset order
+
+        Rows are ordered by (ts, series key), so a page boundary never splits
+        or repeats rows that share a timestamp. Returns the rows and the
+        position to resume after, or None once the window is exhausted.
+        """
+
+    async def history_pages(
+        self,
+        level: str,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield keyset pages of raw ``namespaces`` or ``pods`` samples
+
+        Only one page is held in memory at a time, however long the window.
+        """
+        fetch = {
+            "namespaces": self.get_namespace_history_page,
+            "pods": self.get_pod_history_page,
+        }[level]
+        while True:
+            rows, after = await fetch(namespace, hours, after, page_size)
+            if rows:
+                yield rows
+            if after is None:
+                return
+
+    async def stream_namespace_history(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw samples page by page, holding one page in memory"""
+        pages = self.history_pages("namespaces", namespace, hours, after, page_size)
+        async for rows in pages:
+            for row in rows:
+                yield row
+
+    @abstractmethod
+    async def get_cost_trends(self, hours: int = 168) -> Dict[str, Any]:
+        """Cluster cost per bucket of the tier chosen by ``trend_tier``"""
+
+    @abstractmethod
+    async def get_top_namespaces(
+        self, limit: int = 10, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Namespaces by average hourly cost over the window"""
+
+    @abstractmethod
+    async def get_pod_history(
+        self, namespace: str, pod: str, hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """Raw samples of one pod in the window, oldest first"""
+
+    @abstractmethod
+    async def get_pod_history_page(
+        self,
+        namespace: Optional[str] = None,
+        hours: int = 24,
+        after: Optional[Position] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Position]]:
+        """Up to ``limit`` raw pod samples following ``after``, in keyset order
+
+        Covers every pod in the window, or those of one namespace, ordered by
+        (ts, pod key) like ``get_namespace_history_page``.
+        """
+
+    @abstractmethod
+    async def get_top_pods(
+        self, limit: int = 50, hours: int = 24, namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Pods by average hourly cost over the window, read from rollups only
+
+        The window starts on the hour at or before ``hours`` ago.
+        """
+
+    @abstractmethod
+    async def get_workload_trends(
+        self, namespace: str, workload: str, hours: int = 168
+    ) -> Dict[str, Any]:
+        """One workload's cost per bucket of the tier chosen by ``trend_tier``"""
+
+    # ==================== RETENTION ====================
+
+    @abstractmethod
+    async def delete_chunk(
+        self, table: str, cutoff: int, chunk_size: int
+    ) -> Tuple[int, float]:
+        """Delete up to ``chunk_size`` rows older than ``cutoff``
+
+        Returns the rows deleted and the seconds writers were blocked.
+        """
+
+    @abstractmethod
+    async def prune_dimensions(self) -> Tuple[int, float]:
+        """Drop series names with no remaining data
+
+        Returns the rows removed and the seconds writers were blocked.
+        """
+
+    @abstractmethod
+    async def reclaim_space(self, pages: int) -> Tuple[int, float]:
+        """Hand freed space back to the filesystem, at most ``pages`` at a time
+
+        Returns the bytes reclaimed and the seconds writers were blocked.
+        """
+
+    @staticmethod
+    def _since(hours: int) -> int:
+        return int(time.time()) - hours * 3600
+
+    @staticmethod
+    def _rollup_window(hours: int) -> Tuple[int, int]:
+        """Hour-aligned window start and the first full day after it"""
+        (_, hour), (_, day) = ROLLUP_TIERS
+        start = StorageBackend._since(hours) // hour * hour
+        return start, -(-start // day) * day
+
+    @staticmethod
+    def _top_window(hours: int) -> Tuple[int, int, int]:
+        """Split a window at its first full hour and first full day"""
+        since = StorageBackend._since(hours)
+        (_, hour), (_, day) = ROLLUP_TIERS
+        return since, -(-since // hour) * hour, -(-since // day) * day
+
+    async def cleanup_old_data(self, days: int = 30, chunk_size: int = 5000):
+        """Clean up data older than specified days, in bounded chunks"""
+        cutoff = int(time.time()) - days * 86400
+
+        for tables in self.retention_tables.values():
+            for table, _, _ in tables:
+                deleted = chunk_size
+                while deleted >= chunk_size:
+                    deleted, _ = await self.delete_chunk(table, cutoff, chunk_size)
+        await self.prune_dimensions()
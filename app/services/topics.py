@@ -0,0 +1,158 @@
+"""
+Topic feeds for WebSocket subscribers
+
+A topic is a keyed slice of the latest snapshot: ``cluster`` (every
+namespace), ``namespace:<name>`` (one namespace) or ``pods:<namespace>``
+(that namespace's pods). For each topic with subscribers the feed keeps the
+last rows published and, when a snapshot changes them, encodes one delta of
+the changed and removed rows. Frames are encoded once per topic and version
+and shared by every subscriber.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import orjson
+
+from app.services.metrics_collector import MetricsSnapshot
+
+Rows = Dict[str, Dict[str, Any]]
+
+# Topic kind -> field that keys its rows
+TOPIC_KEYS = {"cluster": "namespace", "namespace": "namespace", "pods": "pod"}
+
+
+def parse_topic(topic: str) -> Optional[Tuple[str, str]]:
+    """(kind, name) for a valid topic, else None"""
+    if topic == "cluster":
+        return "cluster", ""
+    kind, _, name = topic.partition(":")
+    if kind in ("namespace", "pods") and name:
+        return kind, name
+    return None
+
+
+def topic_rows(
+    topic: str,
+    snapshot: MetricsSnapshot,
+    pods_by_namespace: Optional[Dict[str, Rows]] = None,
+) -> Rows:
+    """Rows of ``topic`` in ``snapshot`` keyed by namespace or pod name"""
+    kind, name = parse_topic(topic)
+    if kind == "cluster":
+        return {row["namespace"]: row for row in snapshot.namespaces or ()}
+    if kind == "namespace":
+        return {
+            row["namespace"]: row
+            for row in snapshot.namespaces or ()
+            if row["namespace"] == name
+        }
+    if pods_by_namespace is None:
+        pods_by_namespace = group_pods(snapshot)
+    return pods_by_namespace.get(name, {})
+
+
+def group_pods(snapshot: MetricsSnapshot) -> Dict[str, Rows]:
+    grouped: Dict[str, Rows] = {}
+    for pod in snapshot.pods or ():
+        grouped.setdefault(pod["namespace"], {})[pod["pod"]] = pod
+    return grouped
+
+
+class TopicState:
+    """One topic's rows at ``version`` plus the delta from ``base_version``"""
+
+    def __init__(
+        self,
+        topic: str,
+        rows: Rows,
+        snapshot: MetricsSnapshot,
+        base_version: Optional[int] = None,
+        delta_frame: Optional[str] = None,
+    ):
+        self.topic = topic
+        self.key = TOPIC_KEYS[parse_topic(topic)[0]]
+        self.rows = rows
+        self.version = snapshot.version
+        self.timestamp = snapshot.timestamp
+        self.base_version = base_version
+        self.delta_frame = delta_frame
+        self._full_frame: Optional[str] = None
+
+    def full_frame(self) -> str:
+        if self._full_frame is None:
+            self._full_frame = orjson.dumps(
+                {
+                    "type": "snapshot",
+                    "topic": self.topic,
+                    "key": self.key,
+                    "version": self.version,
+                    "timestamp": self.timestamp,
+                    "rows": list(self.rows.values()),
+                }
+            ).decode()
+        return self._full_frame
+
+    def advance(self, rows: Rows, snapshot: MetricsSnapshot) -> "TopicState":
+        """State after ``snapshot``; unchanged rows keep the current version"""
+        upserts = [row for key, row in rows.items() if self.rows.get(key) != row]
+        removed = [key for key in self.rows if key not in rows]
+        if not upserts and not removed:
+            return self
+
+        delta = orjson.dumps(
+            {
+                "type": "delta",
+                "topic": self.topic,
+                "key": self.key,
+                "version": snapshot.version,
+                "base_version": self.version,
+                "timestamp": snapshot.timestamp,
+                "upserts": upserts,
+                "removed": removed,
+            }
+        ).decode()
+        return TopicState(self.topic, rows, snapshot, self.version, delta)
+
+
+class TopicFeed:
+    def __init__(self):
+        self.topics: Dict[str, TopicState] = {}
+        self.stats = {"full_frames": 0, "delta_frames": 0}
+
+    def publish(self, snapshot: MetricsSnapshot, topics: Iterable[str]):
+        """Advance every subscribed topic to ``snapshot``, dropping the rest"""
+        pods_by_namespace = None
+        states = {}
+        for topic in topics:
+            if topic.startswith("pods:") and pods_by_namespace is None:
+                pods_by_namespace = group_pods(snapshot)
+            rows = topic_rows(topic, snapshot, pods_by_namespace)
+            previous = self.topics.get(topic)
+            states[topic] = (
+                previous.advance(rows, snapshot)
+                if previous is not None
+                else TopicState(topic, rows, snapshot)
+            )
+        self.topics = states
+
+    def track(self, topic: str, snapshot: MetricsSnapshot):
+        """Start following a newly subscribed topic from ``snapshot``"""
+        if topic not in self.topics:
+            self.topics[topic] = TopicState(
+                topic, topic_rows(topic, snapshot), snapshot
+            )
+
+    def frame(self, topic: str, sent_version: int) -> Tuple[Optional[str], int]:
+        """Frame bringing a subscriber at ``sent_version`` up to date
+
+        Returns the delta when the subscriber holds its base version, a full
+        frame otherwise, and None when there is nothing new.
+        """
+        state = self.topics.get(topic)
+        if state is None or state.version == sent_version:
+            return None, sent_version
+        if state.delta_frame is not None and state.base_version == sent_version:
+            self.stats["delta_frames"] += 1
+            return state.delta_frame, state.version
+        self.stats["full_frames"] += 1
+        return state.full_frame(), state.version
@@ -399,6 +399,22 @@ const EfficiencyCalculator = {
 };
 
 // ==================== API SERVICE ====================
+// Rebuild row objects from a format=columnar payload, keeping its metadata
+function fromColumnar(payload) {
+  const { columns, data, dictionaries, count, format, ...metadata } = payload;
+  const values = columns.map(name => {
+    const dictionary = dictionaries[name];
+    return dictionary ? data[name].map(code => dictionary[code]) : data[name];
+  });
+  const rows = new Array(count);
+  for (let i = 0; i < count; i++) {
+    const row = {};
+    columns.forEach((name, c) => { row[name] = values[c][i]; });
+    rows[i] = row;
+  }
+  return { ...metadata, data: rows };
+}
+
 const API = {
   async fetchConfig() {
     try {
@@ -413,20 +429,24 @@ const API = {
 
   async fetchNamespaces() {
     try {
-      const response = await fetch('/api/namespaces');
+      const response = await fetch('/api/namespaces?format=columnar');
       if (!response.ok) throw new Error('Failed to fetch namespaces');
-      return await response.json();
+      return fromColumnar(await response.json());
     } catch (error) {
       console.error('Error fetching namespaces:', error);
       throw error;
     }
   },
 
-  async fetchPods(namespace) {
+  // Most expensive pods first, at most `limit` of them; `total` counts them all
+  async fetchPods(namespace, limit = 100) {
     try {
-      const response = await fetch(`/api/pods?namespace=${encodeURIComponent(namespace)}`);
+      const response = await fetch(
+        `/api/pods?namespace=${encodeURIComponent(namespace)}` +
+        `&sort=-monthly_cost&limit=${limit}&format=columnar`
+      );
       if (!response.ok) throw new Error('Failed to fetch pods');
-      return await response.json();
+      return fromColumnar(await response.json());
     } catch (error) {
       console.error('Error fetching pods:', error);
       throw error;
@@ -757,6 +777,9 @@ const WebSocketManager = {
   reconnectAttempts: 0,
   maxReconnectAttempts: 5,
   reconnectDelay: 3000,
+  // Namespace rows by name and the snapshot version they reflect
+  namespaceRows: new Map(),
+  version: null,
 
   connect() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -766,19 +789,33 @@ const WebSocketManager = {
       this.ws = new WebSocket(wsUrl);
 
       this.ws.onopen = () => {
+        // The server sends a full frame, then only the rows that change
         console.log('✅ WebSocket connected');
         this.reconnectAttempts = 0;
-        this.startHeartbeat();
+        this.version = null;
+        this.send({ action: 'subscribe', topics: ['cluster'] });
       };
 
       this.ws.onmessage = (event) => {
         const data = JSON.parse(event.data);
 
-        if (data.type === 'metrics_update') {
-          AppState.namespaces = data.data;
-          UI.updateKPIs(data.data);
-          UI.populateNamespaceTable(data.data);
-          ChartManager.renderAllCharts();
+        if (data.type === 'snapshot' && data.topic === 'cluster') {
+          this.namespaceRows = new Map(data.rows.map(row => [row[data.key], row]));
+          this.version = data.version;
+          this.render();
+        } else if (data.type === 'delta' && data.topic === 'cluster') {
+          if (data.base_version !== this.version) {
+            // Missed an update: ask for the whole topic again
+            this.send({ action: 'resync', topics: ['cluster'] });
+            return;
+          }
+          data.upserts.forEach(row => this.namespaceRows.set(row[data.key], row));
+          data.removed.forEach(key => this.namespaceRows.delete(key));
+          this.version = data.version;
+          this.render();
+        } else if (data.type === 'metrics_update') {
+          this.namespaceRows = new Map(data.data.map(row => [row.namespace, row]));
+          this.render();
         }
       };
 
@@ -788,7 +825,6 @@ const WebSocketManager = {
 
       this.ws.onclose = () => {
         console.log('WebSocket closed');
-        this.stopHeartbeat();
         this.attemptReconnect();
       };
 
@@ -797,19 +833,18 @@ const WebSocketManager = {
     }
   },
 
-  startHeartbeat() {
-    this.heartbeatInterval = setInterval(() => {
-      if (this.ws && this.ws.readyState === WebSocket.OPEN) {
-        this.ws.send('ping');
-      }
-    }, 30000); // Ping every 30 seconds
+  send(message) {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(message));
+    }
   },
 
-  stopHeartbeat() {
-    if (this.heartbeatInterval) {
-      clearInterval(this.heartbeatInterval);
-      this.heartbeatInterval = null;
-    }
+  render() {
+    const namespaces = Array.from(this.namespaceRows.values());
+    AppState.namespaces = namespaces;
+    UI.updateKPIs(namespaces);
+    UI.populateNamespaceTable(namespaces);
+    ChartManager.renderAllCharts();
   },
 
   attemptReconnect() {
@@ -821,7 +856,6 @@ const WebSocketManager = {
   },
 
   disconnect() {
-    this.stopHeartbeat();
     if (this.ws) {
       this.ws.close();
       this.ws = null;
@@ -996,7 +1030,7 @@ const DrawerManager = {
 
     try {
       const podsData = await API.fetchPods(namespace);
-      this.renderPodDetails(podsData.data, namespace);
+      this.renderPodDetails(podsData.data, namespace, podsData.total);
     } catch (error) {
       contentEl.innerHTML = `
         <div style="text-align: center; padding: 3rem; color: var(--rh-red);">
@@ -1011,7 +1045,7 @@ const DrawerManager = {
     document.body.style.overflow = '';
   },
 
-  renderPodDetails(pods, namespace) {
+  renderPodDetails(pods, namespace, total = pods.length) {
     const contentEl = document.getElementById('pod-drawer-content');
 
     if (!pods || pods.length === 0) {
@@ -1023,9 +1057,14 @@ const DrawerManager = {
       return;
     }
 
-    const totalCost = pods.reduce((sum, pod) => sum + pod.monthly_cost, 0);
-    const totalCPU = pods.reduce((sum, pod) => sum + pod.cpu_mcores, 0);
-    const totalMemory = pods.reduce((sum, pod) => sum + pod.memory_bytes, 0);
+    // Only the top pods are loaded; the namespace row has the full totals
+    const namespaceRow = WebSocketManager.namespaceRows.get(namespace);
+    const namespaceTotal = field => namespaceRow
+      ? namespaceRow[field]
+      : pods.reduce((sum, pod) => sum + pod[field], 0);
+    const totalCost = namespaceTotal('monthly_cost');
+    const totalCPU = namespaceTotal('cpu_mcores');
+    const totalMemory = namespaceTotal('memory_bytes');
 
     contentEl.innerHTML = `
       <div class="drawer-summary">
@@ -1033,7 +1072,8 @@ const DrawerManager = {
           <div class="kpi-header">
             <span class="kpi-label">Total Pods</span>
           </div>
-          <div class="kpi-value">${pods.length}</div>
+          <div class="kpi-value">${total}</div>
+          ${total > pods.length ? `<div class="kpi-trend"><span class="trend-text">top ${pods.length} by cost shown</span></div>` : ''}
         </div>
         <div class="kpi-card">
           <div class="kpi-header">
@@ -0,0 +1,66 @@
+"""
+Benchmark for columnar pod responses
+
+Encodes pod snapshots of several sizes as JSON rows, as format=columnar JSON
+and as an Arrow IPC stream, and reports the encode time, the bytes on the
+wire with and without gzip, and the time a client takes to parse each body.
+
+Run with: PYTHONPATH=. python -m benchmarks.bench_columnar_responses [repeats]
+"""
+
+import gzip
+import statistics
+import sys
+import time
+
+import orjson
+
+from app.api.responses import arrow_stream, dumps, to_columns
+from app.api.routes import DICTIONARY_COLUMNS
+from app.services.exports import load_pyarrow
+from benchmarks.bench_json_responses import SIZES, pod_rows
+
+
+def median_ms(action, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = action()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main(repeats: int):
+    pa, _ = load_pyarrow("This benchmark")
+    print(
+        f"{'rows':>6} {'format':<9} {'encode ms':>10} {'KiB':>8} "
+        f"{'gzip KiB':>9} {'parse ms':>9}"
+    )
+    for size in SIZES:
+        rows = pod_rows(size)
+        cases = (
+            ("json", lambda: dumps({"data": rows}), orjson.loads),
+            (
+                "columnar",
+                lambda: dumps(to_columns(rows, DICTIONARY_COLUMNS)),
+                orjson.loads,
+            ),
+            (
+                "arrow",
+                lambda: arrow_stream(to_columns(rows, DICTIONARY_COLUMNS)),
+                lambda body: pa.ipc.open_stream(body).read_all(),
+            ),
+        )
+        for label, encode, parse in cases:
+            encode_ms, body = median_ms(encode, repeats)
+            parse_ms, _ = median_ms(lambda: parse(body), repeats)
+            compressed = len(gzip.compress(body, compresslevel=5))
+            print(
+                f"{size:>6} {label:<9} {encode_ms:>10.1f} {len(body) / 1024:>8.1f} "
+                f"{compressed / 1024:>9.1f} {parse_ms:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    main(repeats)
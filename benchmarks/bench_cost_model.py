@@ -0,0 +1,80 @@
+"""
+Benchmark for CostModel costing paths
+
+Compares rows/sec of the dict-list API (compute_cost), the columnar
+NumPy path (compute_cost_batch) and the original per-row loop at 1k, 10k
+and 100k rows.
+
+Run with: python -m benchmarks.bench_cost_model
+"""
+
+import random
+import time
+
+import numpy as np
+
+from app.services.cost_model import HOURS_PER_MONTH, CostModel
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def legacy_compute_cost(cost_config, usage_data):
+    """The per-row loop compute_cost used before the columnar path"""
+    result = []
+    for item in usage_data:
+        cpu_core_hours = item.get("cpu_mcores", 0) / 1000.0
+        memory_gb_hours = item.get("memory_bytes", 0) / (1024**3)
+        cpu_cost = cpu_core_hours * cost_config["cpu_per_core_hour"]
+        memory_cost = memory_gb_hours * cost_config["mem_per_gb_hour"]
+        hourly_cost = cpu_cost + memory_cost
+        monthly_cost = hourly_cost * HOURS_PER_MONTH
+        result_item = item.copy()
+        result_item.update(
+            {
+                "cpu_core_hours": cpu_core_hours,
+                "memory_gb_hours": memory_gb_hours,
+                "hourly_cost": round(hourly_cost, 4),
+                "monthly_cost": round(monthly_cost, 2),
+            }
+        )
+        result.append(result_item)
+    return result
+
+
+def rows_per_second(func, rows: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    cost_model = CostModel()
+    rng = random.Random(42)
+    print(f"{'rows':>8} {'legacy':>14} {'compute_cost':>14} {'batch':>14}  (rows/sec)")
+
+    for size in SIZES:
+        rows = [
+            {
+                "namespace": f"ns-{i % 50}",
+                "pod": f"pod-{i}",
+                "cpu_mcores": rng.uniform(1, 4000),
+                "memory_bytes": rng.randint(2**20, 2**34),
+            }
+            for i in range(size)
+        ]
+        cpu = np.array([row["cpu_mcores"] for row in rows])
+        mem = np.array([row["memory_bytes"] for row in rows], dtype=np.float64)
+
+        legacy = rows_per_second(
+            lambda: legacy_compute_cost(cost_model.cost_config, rows), size
+        )
+        adapter = rows_per_second(lambda: cost_model.compute_cost(rows), size)
+        batch = rows_per_second(lambda: cost_model.compute_cost_batch(cpu, mem), size)
+        print(f"{size:>8,} {legacy:>14,.0f} {adapter:>14,.0f} {batch:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark for persisting pod metrics snapshots
+
+Inserts a 20k-pod snapshot with the previous approach (new connection,
+one execute per row) and with DatabaseService's shared WAL connection and
+executemany bulk insert, and reports rows/sec for each.
+
+Run with: python -m benchmarks.bench_database [pods]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from app.services.database import DatabaseService
+from benchmarks.bench_storage_size import LEGACY_SCHEMA
+
+
+def make_snapshot(count: int):
+    return [
+        {
+            "namespace": f"ns-{i % 50}",
+            "pod": f"workload-{i % 2000}-{i:08x}",
+            "cpu_mcores": 50 + i % 900,
+            "memory_bytes": 2**20 * (64 + i % 4000),
+            "hourly_cost": 0.0123,
+            "monthly_cost": 8.98,
+        }
+        for i in range(count)
+    ]
+
+
+async def legacy_save(db_path: str, metrics):
+    """Per-call connection with one INSERT per row"""
+    async with aiosqlite.connect(db_path) as db:
+        await db.executescript(LEGACY_SCHEMA)
+        for metric in metrics:
+            await db.execute(
+                """
+                INSERT INTO pod_metrics
+                (namespace, pod, cpu_mcores, memory_bytes, hourly_cost, monthly_cost)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    metric["namespace"],
+                    metric["pod"],
+                    metric["cpu_mcores"],
+                    metric["memory_bytes"],
+                    metric["hourly_cost"],
+                    metric["monthly_cost"],
+                ),
+            )
+        await db.commit()
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    snapshot = make_snapshot(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        await legacy_save(str(Path(tmp) / "legacy.db"), snapshot)
+        legacy = time.perf_counter() - start
+
+        db_service = DatabaseService(str(Path(tmp) / "bulk.db"))
+        await db_service.initialize()
+        start = time.perf_counter()
+        await db_service.save_pod_metrics(snapshot)
+        bulk = time.perf_counter() - start
+        await db_service.close()
+
+    print(f"Inserting a {count:,}-pod snapshot")
+    print(f"legacy    {legacy * 1000:9.1f} ms  {count / legacy:12,.0f} rows/sec")
+    print(f"bulk      {bulk * 1000:9.1f} ms  {count / bulk:12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark for streaming history exports
+
+Seeds pod samples for a cluster, then streams the whole window through each
+export encoder, reporting throughput and the peak Python memory allocated
+while exporting (which stays at about one page however many rows there are).
+
+Run with: python -m benchmarks.bench_history_export [pods] [snapshots]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services.database import DatabaseService
+from app.services.exports import ENCODERS
+
+NAMESPACES = 50
+PAGE_SIZE = 5000
+
+
+async def seed(db_service: DatabaseService, pods: int, snapshots: int) -> int:
+    now = int(time.time())
+    for tick in range(snapshots):
+        await db_service.save_pod_metrics(
+            [
+                {
+                    "namespace": f"ns-{i % NAMESPACES}",
+                    "pod": f"workload-{i // 10}-{i:05d}",
+                    "cpu_mcores": 100.0 + tick % 50,
+                    "memory_bytes": 2**20 * (1 + i % 64),
+                    "hourly_cost": 0.001 * (1 + i % 97),
+                }
+                for i in range(pods)
+            ],
+            now - (snapshots - tick) * 60,
+        )
+    return now
+
+
+async def export(db_service: DatabaseService, encoding: str, hours: int):
+    pages = db_service.history_pages("pods", hours=hours, page_size=PAGE_SIZE)
+    size = 0
+    async for chunk in ENCODERS[encoding](pages, "pods"):
+        size += len(chunk)
+    return size
+
+
+async def main(pods: int, snapshots: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db_service = DatabaseService(str(Path(directory) / "bench.db"))
+        await db_service.initialize()
+        await seed(db_service, pods, snapshots)
+        rows = pods * snapshots
+        hours = snapshots // 60 + 1
+        print(f"{rows:,} pod samples ({pods} pods x {snapshots} snapshots)")
+
+        for encoding in ENCODERS:
+            started = time.perf_counter()
+            try:
+                size = await export(db_service, encoding, hours)
+            except RuntimeError as e:
+                print(f"{encoding:>8}: skipped ({e})")
+                continue
+            elapsed = time.perf_counter() - started
+
+            # Second pass under tracemalloc, which slows allocation down
+            tracemalloc.start()
+            await export(db_service, encoding, hours)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{encoding:>8}: {rows / elapsed:>10,.0f} rows/sec "
+                f"{size / 2**20:>8.1f} MiB out, peak {peak / 2**20:.1f} MiB allocated"
+            )
+
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    snapshots = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    asyncio.run(main(pods, snapshots))
@@ -0,0 +1,83 @@
+"""
+Benchmark for JSON response serialization
+
+Serves pod-row payloads of several sizes from a throwaway app, once as a
+plain dict (FastAPI's jsonable_encoder plus the stdlib encoder) and once
+through json_response with each content coding, and times full requests.
+
+Run with: python -m benchmarks.bench_json_responses [repeats]
+"""
+
+import statistics
+import sys
+import time
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.responses import json_response
+
+SIZES = (1000, 10000, 50000)
+
+
+def pod_rows(count: int):
+    return [
+        {
+            "namespace": f"ns-{i % 50}",
+            "pod": f"workload-{i // 10}-{i:05d}",
+            "node": f"node-{i % 40}",
+            "cpu_mcores": 100.0 + i % 50,
+            "memory_bytes": 2**20 * (1 + i % 64),
+            "cpu_core_hours": (100.0 + i % 50) / 1000,
+            "memory_gb_hours": (1 + i % 64) / 1024,
+            "hourly_cost": 0.001 * (1 + i % 97),
+            "monthly_cost": 0.73 * (1 + i % 97),
+        }
+        for i in range(count)
+    ]
+
+
+def build_app() -> FastAPI:
+    bench = FastAPI()
+    payloads = {size: {"data": pod_rows(size), "demo_mode": False} for size in SIZES}
+
+    @bench.get("/dict/{size}")
+    async def as_dict(size: int) -> Dict[str, Any]:
+        return payloads[size]
+
+    @bench.get("/fast/{size}")
+    async def as_fast(request: Request, size: int):
+        return await json_response(request, payloads[size])
+
+    return bench
+
+
+def timed(client: TestClient, path: str, encoding: str, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, len(response.content), response
+
+
+def main(repeats: int):
+    client = TestClient(build_app())
+    print(f"{'rows':>6} {'response':<18} {'median ms':>10} {'wire KiB':>10}")
+    for size in SIZES:
+        cases = (
+            ("dict (stdlib)", f"/dict/{size}", "identity"),
+            ("orjson", f"/fast/{size}", "identity"),
+            ("orjson + gzip", f"/fast/{size}", "gzip"),
+            ("orjson + br", f"/fast/{size}", "br"),
+        )
+        for label, path, encoding in cases:
+            elapsed, _, response = timed(client, path, encoding, repeats)
+            wire = int(response.headers.get("content-length", len(response.content)))
+            print(f"{size:>6} {label:<18} {elapsed:>10.1f} {wire / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    main(repeats)
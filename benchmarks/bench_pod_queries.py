@@ -0,0 +1,90 @@
+"""
+Benchmark for /api/pods filtering, sorting and paging
+
+Builds a snapshot of a large cluster and compares answering common pod
+queries by scanning and sorting the full pod list per request with
+answering them from a PodIndex. The index's first query includes building
+it and its sort order; later queries reuse both until the next snapshot.
+
+Run with: PYTHONPATH=. python -m benchmarks.bench_pod_queries [pods] [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+from app.services.label_selector import labels_match, parse_label_selector
+from app.services.pod_index import PodIndex
+from benchmarks.bench_json_responses import pod_rows
+
+QUERIES = (
+    ("top 100 by cost", {"sort": "-hourly_cost", "limit": 100}),
+    ("one namespace", {"namespace": "ns-7"}),
+    (
+        "label selector, top 100",
+        {"selector": "app in (app-3,app-4)", "sort": "-hourly_cost", "limit": 100},
+    ),
+    ("min cost, page 5", {"min_hourly_cost": 0.05, "limit": 100, "offset": 400}),
+)
+
+
+def snapshot(pods: int):
+    return [
+        {**pod, "labels": {"app": f"app-{i % 40}"}}
+        for i, pod in enumerate(pod_rows(pods))
+    ]
+
+
+def scan(
+    pods,
+    namespace=None,
+    selector="",
+    min_hourly_cost=None,
+    sort=None,
+    limit=None,
+    offset=0,
+):
+    """What the endpoint did before: filter and sort the whole list per request"""
+    requirements = parse_label_selector(selector)
+    rows = [
+        pod
+        for pod in pods
+        if (namespace is None or pod["namespace"] == namespace)
+        and labels_match(pod["labels"], requirements)
+        and (min_hourly_cost is None or pod["hourly_cost"] >= min_hourly_cost)
+    ]
+    if sort:
+        rows.sort(key=lambda pod: pod[sort.lstrip("-")], reverse=sort.startswith("-"))
+    end = None if limit is None else offset + limit
+    return rows[offset:end]
+
+
+def indexed(index: PodIndex, selector="", **query):
+    return index.query(requirements=parse_label_selector(selector), **query).rows
+
+
+def median_ms(action, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(count: int, repeats: int):
+    pods = snapshot(count)
+    print(f"{count} pods")
+    print(f"{'query':<26} {'scan ms':>9} {'index 1st ms':>13} {'index ms':>9}")
+    for label, query in QUERIES:
+        scanned = median_ms(lambda: scan(pods, **query), repeats)
+        first = median_ms(lambda: indexed(PodIndex(pods), **query), repeats)
+        index = PodIndex(pods)
+        warm = median_ms(lambda: indexed(index, **query), repeats)
+        print(f"{label:<26} {scanned:>9.2f} {first:>13.2f} {warm:>9.2f}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    main(count, repeats)
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark for Kubernetes quantity parsing
+
+Parses the CPU and memory usage of 100k synthetic containers with the
+cached parser, the same parser with its cache bypassed, and the inline
+if/elif chains it replaced. Usage values are drawn from a realistic pool
+so they repeat the way metrics-server output does.
+
+Run with: python -m benchmarks.bench_quantity [containers]
+"""
+
+import random
+import sys
+import time
+
+from app.services.quantity import parse_cpu_mcores, parse_memory_bytes, parse_quantity
+
+
+def legacy_parse(cpu_str: str, mem_str: str):
+    """The per-container parsing previously inlined in KubernetesClient"""
+    if cpu_str.endswith("n"):
+        cpu_mcores = int(cpu_str[:-1]) / 1000000
+    elif cpu_str.endswith("u"):
+        cpu_mcores = int(cpu_str[:-1]) / 1000
+    elif cpu_str.endswith("m"):
+        cpu_mcores = int(cpu_str[:-1])
+    else:
+        cpu_mcores = float(cpu_str) * 1000
+
+    if mem_str.endswith("Ki"):
+        memory_bytes = int(mem_str[:-2]) * 1024
+    elif mem_str.endswith("Mi"):
+        memory_bytes = int(mem_str[:-2]) * 1024 * 1024
+    elif mem_str.endswith("Gi"):
+        memory_bytes = int(mem_str[:-2]) * 1024 * 1024 * 1024
+    else:
+        memory_bytes = int(mem_str)
+    return cpu_mcores, memory_bytes
+
+
+def uncached_parse(cpu_str: str, mem_str: str):
+    cpu = float(parse_quantity.__wrapped__(cpu_str) * 1000)
+    mem = int(parse_quantity.__wrapped__(mem_str))
+    return cpu, mem
+
+
+def cached_parse(cpu_str: str, mem_str: str):
+    return parse_cpu_mcores(cpu_str), parse_memory_bytes(mem_str)
+
+
+def make_containers(count: int):
+    rng = random.Random(42)
+    cpu_pool = [f"{rng.randint(1, 2000)}m" for _ in range(300)]
+    cpu_pool += [f"{rng.randint(10**5, 10**9)}n" for _ in range(700)]
+    mem_pool = [f"{rng.randint(1, 4096)}Mi" for _ in range(400)]
+    mem_pool += [f"{rng.randint(10**4, 10**7)}Ki" for _ in range(600)]
+    return [(rng.choice(cpu_pool), rng.choice(mem_pool)) for _ in range(count)]
+
+
+def bench(name: str, parse, containers) -> None:
+    start = time.perf_counter()
+    for cpu_str, mem_str in containers:
+        parse(cpu_str, mem_str)
+    elapsed = time.perf_counter() - start
+    per_container = elapsed / len(containers) * 1e9
+    print(f"{name:<10} {elapsed * 1000:9.1f} ms  {per_container:8.0f} ns/container")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    containers = make_containers(count)
+    print(f"Parsing CPU and memory for {count:,} containers")
+
+    bench("legacy", legacy_parse, containers)
+    bench("uncached", uncached_parse, containers)
+    parse_cpu_mcores.cache_clear()
+    parse_memory_bytes.cache_clear()
+    bench("cached", cached_parse, containers)
+
+
+if __name__ == "__main__":
+    main()
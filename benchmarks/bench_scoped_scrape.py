@@ -0,0 +1,63 @@
+"""
+Benchmark for namespace-scoped pod scrapes
+
+Serves PodMetrics for a large cluster from the local metrics-server stub and
+times fetching one namespace's pods two ways: listing the whole cluster and
+filtering client-side, as before, and a namespaced, label-scoped listing
+resolved by the API server.
+
+Run with: PYTHONPATH=. python -m benchmarks.bench_scoped_scrape [pods] [namespaces]
+"""
+
+import statistics
+import sys
+import time
+
+from app.services.k8s_client import KubernetesClient
+from tests.stub_metrics_server import StubMetricsServer, pod_metrics_item
+
+REPEATS = 5
+
+
+def items(pods: int, namespaces: int):
+    return [
+        pod_metrics_item(
+            f"ns-{i % namespaces}",
+            f"pod-{i:05d}",
+            [{"cpu": f"{1 + i % 500}m", "memory": f"{1 + i % 64}Mi"}],
+            labels={"app": f"app-{i % 7}"},
+        )
+        for i in range(pods)
+    ]
+
+
+def timed(label: str, action):
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        rows = action()
+        samples.append(time.perf_counter() - started)
+    print(
+        f"{label:<36} {statistics.median(samples) * 1000:>8.1f} ms {len(rows):>7} rows"
+    )
+
+
+def main(pods: int, namespaces: int):
+    with StubMetricsServer(items(pods, namespaces)) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        print(f"{pods} pods in {namespaces} namespaces")
+        timed(
+            "cluster list, filter ns-7",
+            lambda: [p for p in k8s.get_pod_usage() if p["namespace"] == "ns-7"],
+        )
+        timed("namespaced list of ns-7", lambda: k8s.get_pod_usage("ns-7"))
+        timed(
+            "namespaced list of ns-7, app=app-3",
+            lambda: k8s.get_pod_usage("ns-7", "app=app-3"),
+        )
+
+
+if __name__ == "__main__":
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    namespaces = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    main(pods, namespaces)
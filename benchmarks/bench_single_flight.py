@@ -0,0 +1,88 @@
+"""
+Benchmark for single-flight forecast requests
+
+Seeds a week of namespace history, then fires a burst of concurrent forecast
+computations at a cold cache, as a dashboard reload after a new snapshot
+would, with and without request coalescing.
+
+Run with: python -m benchmarks.bench_single_flight [clients] [namespaces]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.api import routes
+from app.services.database import DatabaseService
+from app.services.response_cache import ResponseCache
+
+DAYS = 7
+
+
+class NoCache:
+    """Stand-in for the response cache that computes every request"""
+
+    async def get_or_compute(self, endpoint, params, compute):
+        return await compute()
+
+
+async def seed(db_service: DatabaseService, namespaces: int):
+    now = int(time.time())
+    for hour in range(DAYS * 24, 0, -1):
+        await db_service.save_namespace_metrics(
+            [
+                {
+                    "namespace": f"ns-{n}",
+                    "cpu_mcores": 1000.0,
+                    "memory_bytes": 2**30,
+                    "hourly_cost": 0.01 * (n + 1) * (1 + hour % 24 / 24),
+                }
+                for n in range(namespaces)
+            ],
+            now - hour * 3600,
+        )
+
+
+async def burst(clients: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(routes.get_cost_forecast(days=30) for _ in range(clients)))
+    return time.perf_counter() - started
+
+
+async def main(clients: int, namespaces: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db_service = DatabaseService(str(Path(directory) / "bench.db"))
+        await db_service.initialize()
+        await seed(db_service, namespaces)
+        routes.db_service = db_service
+
+        queries = []
+        get_cost_trends = db_service.get_cost_trends
+
+        async def counted(hours):
+            queries.append(hours)
+            return await get_cost_trends(hours)
+
+        db_service.get_cost_trends = counted
+
+        for label, cache in (
+            ("uncoalesced", NoCache()),
+            ("single-flight", ResponseCache()),
+        ):
+            routes.response_cache = cache
+            queries.clear()
+            elapsed = await burst(clients)
+            print(
+                f"{label:<14} {clients} concurrent forecasts in "
+                f"{elapsed * 1000:>8.1f} ms ({len(queries)} trend queries)"
+            )
+
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    namespaces = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(clients, namespaces))
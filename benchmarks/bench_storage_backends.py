@@ -0,0 +1,87 @@
+"""
+Benchmark for the history storage backends
+
+Writes pod and namespace snapshots through each backend's public interface,
+then times the window reads the API serves from them.
+
+Run with: python -m benchmarks.bench_storage_backends [pods] [snapshots]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.database import STORAGE_BACKENDS, create_storage_backend
+
+NAMESPACES = 50
+
+
+def snapshot(pods: int, tick: int):
+    pod_rows = [
+        {
+            "namespace": f"ns-{i % NAMESPACES}",
+            "pod": f"workload-{i // 4}-{i:05d}",
+            "cpu_mcores": 100.0 + (i + tick) % 50,
+            "memory_bytes": 2**20 * (1 + (i + tick) % 64),
+            "hourly_cost": 0.001 * (1 + i % 7),
+        }
+        for i in range(pods)
+    ]
+    namespace_rows = [
+        {
+            "namespace": f"ns-{n}",
+            "cpu_mcores": 4000.0,
+            "memory_bytes": 2**30,
+            "hourly_cost": 0.1 * (n + 1),
+        }
+        for n in range(NAMESPACES)
+    ]
+    return pod_rows, namespace_rows
+
+
+async def bench_backend(name: str, directory: str, pods: int, snapshots: int):
+    storage = create_storage_backend(name, str(Path(directory) / f"bench.{name}"))
+    await storage.initialize()
+
+    # One snapshot per minute, ending now
+    now = int(time.time())
+    start = time.perf_counter()
+    for tick in range(snapshots):
+        ts = now - (snapshots - tick) * 60
+        pod_rows, namespace_rows = snapshot(pods, tick)
+        await storage.save_pod_metrics(pod_rows, ts)
+        await storage.save_namespace_metrics(namespace_rows, ts)
+    ingest = time.perf_counter() - start
+    rows = snapshots * (pods + NAMESPACES)
+    print(f"{name:>8}: ingest {rows / ingest:>12,.0f} rows/sec")
+
+    queries = {
+        "history 24h": storage.get_namespace_history(hours=24),
+        "history 1 ns": storage.get_namespace_history("ns-1", hours=24),
+        "trends 7d": storage.get_cost_trends(hours=168),
+        "top-10 24h": storage.get_top_namespaces(limit=10, hours=24),
+    }
+    for label, query in queries.items():
+        start = time.perf_counter()
+        await query
+        print(f"{'':>10}{label:<14} {(time.perf_counter() - start) * 1000:>8.1f} ms")
+
+    await storage.close()
+
+
+async def main(pods: int, snapshots: int):
+    print(f"{pods} pods, {snapshots} one-minute snapshots")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in STORAGE_BACKENDS:
+            try:
+                await bench_backend(name, directory, pods, snapshots)
+            except RuntimeError as e:
+                print(f"{name:>8}: skipped ({e})")
+
+
+if __name__ == "__main__":
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    snapshots = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    asyncio.run(main(pods, snapshots))
@@ -0,0 +1,128 @@
+"""
+Benchmark for on-disk size of stored metrics history
+
+Writes the same pod snapshots into the previous denormalized schema
+(TEXT namespace/pod/timestamp per row, stored monthly_cost) and into
+DatabaseService's normalized WITHOUT ROWID sample tables, then reports
+bytes per sample for each.
+
+Run with: python -m benchmarks.bench_storage_size [pods] [samples]
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from app.services.database import DatabaseService
+
+# Schema used before the normalized sample tables
+LEGACY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pod_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    namespace TEXT NOT NULL,
+    pod TEXT NOT NULL,
+    cpu_mcores REAL,
+    memory_bytes REAL,
+    hourly_cost REAL,
+    monthly_cost REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pod_timestamp ON pod_metrics(timestamp);
+CREATE INDEX IF NOT EXISTS idx_pod_namespace ON pod_metrics(namespace);
+CREATE INDEX IF NOT EXISTS idx_pod_name ON pod_metrics(pod);
+"""
+
+START = 1_700_000_000
+INTERVAL = 60
+
+
+def make_snapshot(count: int):
+    return [
+        {
+            "namespace": f"team-{i % 50:02d}",
+            "pod": f"service-{i % 2000:04d}-7d9f8b6c5d-{i:05x}",
+            "cpu_mcores": 50 + i % 900,
+            "memory_bytes": 2**20 * (64 + i % 4000),
+            "hourly_cost": 0.0123,
+            "monthly_cost": 8.98,
+        }
+        for i in range(count)
+    ]
+
+
+def file_size(path: str) -> int:
+    """Database size after checkpointing the WAL and compacting free pages"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def write_legacy(path: str, snapshot, samples: int):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    for sample in range(samples):
+        timestamp = conn.execute(
+            "SELECT datetime(?, 'unixepoch')", (START + sample * INTERVAL,)
+        ).fetchone()[0]
+        conn.executemany(
+            """
+            INSERT INTO pod_metrics
+            (timestamp, namespace, pod, cpu_mcores, memory_bytes, hourly_cost,
+             monthly_cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+            [
+                (
+                    timestamp,
+                    metric["namespace"],
+                    metric["pod"],
+                    metric["cpu_mcores"],
+                    metric["memory_bytes"],
+                    metric["hourly_cost"],
+                    metric["monthly_cost"],
+                )
+                for metric in snapshot
+            ],
+        )
+    conn.commit()
+    conn.close()
+
+
+async def write_normalized(path: str, snapshot, samples: int):
+    db_service = DatabaseService(path)
+    await db_service.initialize()
+    for sample in range(samples):
+        await db_service.save_pod_metrics(snapshot, timestamp=START + sample * INTERVAL)
+    await db_service.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    snapshot = make_snapshot(count)
+    total = count * samples
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = str(Path(tmp) / "legacy.db")
+        write_legacy(legacy_path, snapshot, samples)
+        legacy = file_size(legacy_path)
+
+        normalized_path = str(Path(tmp) / "normalized.db")
+        asyncio.run(write_normalized(normalized_path, snapshot, samples))
+        normalized = file_size(normalized_path)
+
+    print(f"Storing {samples} samples of a {count:,}-pod snapshot ({total:,} rows)")
+    print(f"legacy      {legacy / 2**20:8.1f} MiB  {legacy / total:6.1f} bytes/sample")
+    print(
+        f"normalized  {normalized / 2**20:8.1f} MiB  "
+        f"{normalized / total:6.1f} bytes/sample"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for pod-level history queries
+
+Seeds hourly and daily pod rollups for a large cluster, as a week of
+collection would leave them, then times top-N pods, a workload trend and the
+write of one full pod snapshot (raw samples plus incremental rollups).
+
+Run with: python -m benchmarks.bench_top_pods [pods] [days]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.database import DatabaseService
+from app.services.storage import ROLLUP_TIERS, pod_rollup_table
+
+NAMESPACES = 50
+
+
+def snapshot(pods: int):
+    return [
+        {
+            "namespace": f"ns-{i % NAMESPACES}",
+            "pod": f"workload-{i // 10}-{i:05d}",
+            "cpu_mcores": 100.0 + i % 50,
+            "memory_bytes": 2**20 * (1 + i % 64),
+            "hourly_cost": 0.001 * (1 + i % 97),
+        }
+        for i in range(pods)
+    ]
+
+
+async def seed(db_service: DatabaseService, pods: int, days: int):
+    """Intern the pods, then bulk-load their rollups in primary key order"""
+    now = int(time.time())
+    await db_service.save_pod_metrics(snapshot(pods), timestamp=now - days * 86400)
+
+    db = await db_service._connection()
+    pod_ids = sorted(db_service._pod_ids.values())
+    for tier, seconds in ROLLUP_TIERS:
+        buckets = range((now - days * 86400) // seconds * seconds, now + 1, seconds)
+        await db.executemany(
+            f"INSERT OR REPLACE INTO {pod_rollup_table(tier)} VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    pod_id,
+                    bucket,
+                    seconds // 60,
+                    100.0 * seconds // 60,
+                    2.0**20 * seconds // 60,
+                    0.001 * (pod_id % 97 + bucket % 7) * seconds // 60,
+                )
+                for pod_id in pod_ids
+                for bucket in buckets
+            ),
+        )
+    await db.commit()
+
+
+def timed(label: str, started: float):
+    print(f"{label:<34} {(time.perf_counter() - started) * 1000:>8.1f} ms")
+
+
+async def main(pods: int, days: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db_service = DatabaseService(str(Path(directory) / "bench.db"))
+        await db_service.initialize()
+
+        started = time.perf_counter()
+        await seed(db_service, pods, days)
+        print(
+            f"Seeded {pods} pods x {days} days of rollups in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+
+        for hours, namespace in ((24 * days, None), (24, None), (24 * days, "ns-7")):
+            started = time.perf_counter()
+            await db_service.get_top_pods(limit=50, hours=hours, namespace=namespace)
+            scope = f" in {namespace}" if namespace else ""
+            timed(f"top-50 pods over {hours}h{scope}", started)
+
+        started = time.perf_counter()
+        await db_service.get_workload_trends("ns-7", "workload-7", hours=24 * days)
+        timed(f"workload trend over {24 * days}h", started)
+
+        started = time.perf_counter()
+        await db_service.save_pod_metrics(snapshot(pods))
+        timed(f"save a {pods}-pod snapshot", started)
+
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    asyncio.run(main(pods, days))
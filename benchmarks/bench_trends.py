@@ -0,0 +1,90 @@
+"""
+Benchmark for historical trend and top-N queries
+
+Seeds one-minute namespace samples and times a 7-day hourly trend computed
+by grouping raw samples against the same trend and top-N read from the
+rollup tiers maintained by DatabaseService.
+
+Run with: python -m benchmarks.bench_trends [namespaces] [days]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.database import DatabaseService
+
+RAW_TRENDS = """
+    SELECT
+        datetime(ts / 3600 * 3600, 'unixepoch') as hour,
+        SUM(hourly_cost) as total_cost,
+        SUM(cpu_mcores) as total_cpu,
+        SUM(memory_bytes) as total_memory
+    FROM namespace_samples
+    WHERE ts >= ?
+    GROUP BY ts / 3600
+    ORDER BY hour ASC
+"""
+
+
+async def seed(db_service: DatabaseService, namespaces: int, days: int):
+    """Bulk-load raw samples, then build the rollups in one pass"""
+    now = int(time.time())
+    await db_service.save_namespace_metrics(
+        [
+            {
+                "namespace": f"ns-{i}",
+                "cpu_mcores": 0,
+                "memory_bytes": 0,
+                "hourly_cost": 0.0,
+            }
+            for i in range(namespaces)
+        ],
+        timestamp=now - days * 86400,
+    )
+    db = await db_service._connection()
+    ids = list(db_service._namespace_ids.values())
+    await db.executemany(
+        "INSERT OR REPLACE INTO namespace_samples VALUES (?, ?, ?, ?, ?)",
+        (
+            (ns_id, ts, 100 + ts % 900, 2**20 * (ns_id + ts % 64), 0.01 * ns_id)
+            for ts in range(now - days * 86400, now, 60)
+            for ns_id in ids
+        ),
+    )
+    await db_service._update_rollups(db, 0, 2**62)
+    await db.commit()
+
+
+async def timed(label: str, query, repeat: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await query()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<24}{elapsed * 1000:9.1f} ms")
+    return result
+
+
+async def main():
+    namespaces = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_service = DatabaseService(str(Path(tmp) / "trends.db"))
+        await db_service.initialize()
+        await seed(db_service, namespaces, days)
+        db = await db_service._connection()
+        since = db_service._since(168)
+
+        print(f"{namespaces} namespaces, {days} days of one-minute samples")
+        await timed("raw 7d trend", lambda: db.execute_fetchall(RAW_TRENDS, (since,)))
+        await timed("rollup 7d trend", lambda: db_service.get_cost_trends(168))
+        await timed("rollup 90d trend", lambda: db_service.get_cost_trends(24 * 90))
+        await timed("rollup 30d top-N", lambda: db_service.get_top_namespaces(10, 720))
+        await db_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
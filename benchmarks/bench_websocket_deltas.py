@@ -0,0 +1,90 @@
+"""
+Benchmark for delta-encoded WebSocket topics
+
+Builds snapshots of a large cluster in which a small share of pods change
+between scrapes and compares, per snapshot, the bytes and encoding time of a
+full namespace frame plus full per-namespace pod frames against the topic
+deltas subscribers receive.
+
+Run with: python -m benchmarks.bench_websocket_deltas [pods] [changed_percent]
+"""
+
+import random
+import sys
+import time
+
+from app.api.routes import snapshot_frame
+from app.services.metrics_collector import MetricsSnapshot
+from app.services.topics import TopicFeed
+
+NAMESPACES = 100
+SNAPSHOTS = 10
+
+
+def rows(pods: int, costs):
+    pod_rows = tuple(
+        {
+            "namespace": f"ns-{i % NAMESPACES}",
+            "pod": f"workload-{i // 10}-{i:05d}",
+            "cpu_mcores": 100.0,
+            "memory_bytes": 2**28,
+            "hourly_cost": costs[i],
+        }
+        for i in range(pods)
+    )
+    namespace_rows = tuple(
+        {
+            "namespace": f"ns-{n}",
+            "hourly_cost": round(sum(costs[n::NAMESPACES]), 6),
+        }
+        for n in range(NAMESPACES)
+    )
+    return namespace_rows, pod_rows
+
+
+def main(pods: int, changed_percent: float):
+    costs = [0.001 * (1 + i % 97) for i in range(pods)]
+    topics = ["cluster"] + [f"pods:ns-{n}" for n in range(NAMESPACES)]
+    feed = TopicFeed()
+    full_bytes = delta_bytes = 0
+    full_seconds = delta_seconds = 0.0
+
+    for version in range(1, SNAPSHOTS + 1):
+        for i in random.sample(range(pods), int(pods * changed_percent / 100)):
+            costs[i] *= 1.01
+        namespaces, pod_rows = rows(pods, costs)
+        snapshot = MetricsSnapshot(version, time.time(), namespaces, pod_rows)
+
+        started = time.perf_counter()
+        feed.publish(snapshot, topics)
+        frames = [feed.frame(topic, version - 1)[0] for topic in topics]
+        elapsed = time.perf_counter() - started
+
+        if version == 1:
+            continue
+        delta_seconds += elapsed
+        delta_bytes += sum(len(frame) for frame in frames if frame)
+
+        started = time.perf_counter()
+        full = [snapshot_frame(snapshot)] + [
+            feed.topics[topic].full_frame() for topic in topics[1:]
+        ]
+        full_seconds += time.perf_counter() - started
+        full_bytes += sum(len(frame) for frame in full)
+
+    updates = SNAPSHOTS - 1
+    print(f"{pods} pods in {NAMESPACES} namespaces, {changed_percent:g}% changing")
+    print(
+        f"full frames: {full_bytes / updates / 1024:>9.1f} KiB "
+        f"{full_seconds / updates * 1000:>7.1f} ms per snapshot"
+    )
+    print(
+        f"deltas:      {delta_bytes / updates / 1024:>9.1f} KiB "
+        f"{delta_seconds / updates * 1000:>7.1f} ms per snapshot"
+    )
+
+
+if __name__ == "__main__":
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    changed_percent = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    main(pods, changed_percent)
@@ -0,0 +1,90 @@
+"""
+Load test for WebSocket snapshot push
+
+Serves the app with uvicorn, connects many WebSocket clients and lets the
+background collector scrape on a short interval. Every client should receive
+each snapshot once while the cluster is scraped only once per interval,
+however many clients are connected.
+
+Run with: python -m benchmarks.bench_websocket_push [clients] [intervals]
+"""
+
+import asyncio
+import json
+import socket
+import statistics
+import sys
+import time
+
+import uvicorn
+import websockets
+
+from app.main import app
+from app.services.metrics_collector import metrics_collector
+
+INTERVAL = 1.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def client(url: str, received: dict, stop: asyncio.Event):
+    async with websockets.connect(url, max_size=None) as websocket:
+        while not stop.is_set():
+            try:
+                frame = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            version = json.loads(frame).get("snapshot_version")
+            received.setdefault(version, []).append(time.perf_counter())
+
+
+async def main(clients: int, intervals: int):
+    metrics_collector.interval = INTERVAL
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=port, log_level="warning", ws_max_size=2**20)
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"ws://127.0.0.1:{port}/ws/metrics"
+    received: dict = {}
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(client(url, received, stop)) for _ in range(clients)]
+    await asyncio.sleep(0)
+    first_version = metrics_collector.snapshot.version
+    print(f"{clients} clients connecting ({time.perf_counter() - started:.1f}s)")
+
+    await asyncio.sleep(intervals * INTERVAL)
+    last_version = metrics_collector.snapshot.version
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Fan-out spread: first to last client receiving the same snapshot
+    pushed = range(first_version + 1, last_version)
+    spreads = [
+        (max(received[v]) - min(received[v])) * 1000 for v in pushed if v in received
+    ]
+    complete = sum(len(received.get(v, ())) == clients for v in pushed)
+    print(f"scrapes: {last_version - first_version} in {intervals} intervals")
+    print(f"snapshots delivered to every client: {complete}/{len(pushed)}")
+    if spreads:
+        print(
+            f"fan-out spread: median {statistics.median(spreads):.1f} ms, "
+            f"max {max(spreads):.1f} ms"
+        )
+
+    server.should_exit = True
+    await serving
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    intervals = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(clients, intervals))
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# The app-level db_service is built at import time; keep it off the tracked
+# data/costkube.db so running the suite never modifies the repository
+os.environ.setdefault(
+    "COSTKUBE_DB_PATH",
+    os.path.join(tempfile.mkdtemp(prefix="costkube-tests-"), "costkube.db"),
+)
+
+from app.services.database import STORAGE_BACKENDS, create_storage_backend  # noqa: E402
+
+# Python packages each optional backend needs
+BACKEND_PACKAGES = {"duckdb": ("duckdb", "pyarrow")}
+
+
+@pytest.fixture(params=sorted(STORAGE_BACKENDS))
+def backend(request):
+    """Every storage backend; modules testing one backend override this"""
+    for package in BACKEND_PACKAGES.get(request.param, ()):
+        pytest.importorskip(package)
+    return request.param
+
+
+@pytest.fixture
+def run_storage(backend, tmp_path):
+    """Run a coroutine against a fresh instance of ``backend``, closing it after"""
+    path = tmp_path / os.path.basename(STORAGE_BACKENDS[backend][2])
+
+    def run(test):
+        async def wrapper():
+            storage = create_storage_backend(backend, str(path))
+            await storage.initialize()
+            try:
+                return await test(storage)
+            finally:
+                await storage.close()
+
+        return asyncio.run(wrapper())
+
+    return run
+
+
+@pytest.fixture
+def make_pods():
+    """Factory for ``count`` pod metric rows spread over ``namespaces``"""
+
+    def make(count: int, prefix: str = "pod", namespaces: int = 5):
+        return [
+            {
+                "namespace": f"ns-{i % namespaces}",
+                "pod": f"{prefix}-{i}",
+                "cpu_mcores": 100 + i,
+                "memory_bytes": 2**20 * (i + 1),
+                "hourly_cost": 0.01,
+                "monthly_cost": 7.3,
+            }
+            for i in range(count)
+        ]
+
+    return make
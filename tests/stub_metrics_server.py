@@ -0,0 +1,163 @@
+"""
+Local stub of the metrics.k8s.io API for exercising KubernetesClient
+against real HTTP without a cluster
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from kubernetes import client
+
+from app.services.label_selector import labels_match, parse_label_selector
+
+PODS_PATH = "/apis/metrics.k8s.io/v1beta1/pods"
+CORE_PODS_PATH = "/api/v1/pods"
+NODES_PATH = "/api/v1/nodes"
+NAMESPACED_PODS_PATH = re.compile(
+    r"/apis/metrics\.k8s\.io/v1beta1/namespaces/(?P<namespace>[^/]+)/pods"
+)
+NAMESPACED_CORE_PODS_PATH = re.compile(r"/api/v1/namespaces/(?P<namespace>[^/]+)/pods")
+
+
+def pod_metrics_item(
+    namespace: str,
+    name: str,
+    containers: List[Dict[str, str]],
+    labels: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Build a PodMetrics object as returned by metrics-server"""
+    metadata = {"name": name, "namespace": namespace}
+    if labels is not None:
+        metadata["labels"] = labels
+    return {
+        "metadata": metadata,
+        "timestamp": "2024-01-01T00:00:00Z",
+        "window": "15s",
+        "containers": [
+            {"name": f"c{i}", "usage": usage} for i, usage in enumerate(containers)
+        ],
+    }
+
+
+class StubMetricsServer:
+    """Serves a fixed list of PodMetrics items, optionally with a delay.
+
+    Honors ``limit``/``continue`` list pagination, namespaced listings and
+    ``labelSelector`` like the API server. ``nodes`` maps node names to
+    labels and ``pod_nodes`` maps ``(namespace, pod)`` to a node name for
+    the core pod/node listings.
+    """
+
+    def __init__(
+        self,
+        items: List[Dict[str, Any]],
+        delay: float = 0.0,
+        nodes: Optional[Dict[str, Dict[str, str]]] = None,
+        pod_nodes: Optional[Dict[Tuple[str, str], str]] = None,
+    ):
+        self.items = items
+        self.delay = delay
+        self.nodes = nodes or {}
+        self.pod_nodes = pod_nodes or {}
+        self.requests: List[str] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def api_client(self) -> client.ApiClient:
+        configuration = client.Configuration()
+        configuration.host = self.url
+        return client.ApiClient(configuration)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                metrics_scope = NAMESPACED_PODS_PATH.fullmatch(url.path)
+                core_scope = NAMESPACED_CORE_PODS_PATH.fullmatch(url.path)
+                if url.path == PODS_PATH or metrics_scope:
+                    items = stub.items
+                elif url.path == CORE_PODS_PATH or core_scope:
+                    labels = {
+                        (item["metadata"]["namespace"], item["metadata"]["name"]): (
+                            item["metadata"].get("labels", {})
+                        )
+                        for item in stub.items
+                    }
+                    items = [
+                        {
+                            "metadata": {
+                                "namespace": namespace,
+                                "name": name,
+                                "labels": labels.get((namespace, name), {}),
+                            },
+                            "spec": {"nodeName": node},
+                        }
+                        for (namespace, name), node in stub.pod_nodes.items()
+                    ]
+                elif url.path == NODES_PATH:
+                    items = [
+                        {"metadata": {"name": name, "labels": labels}}
+                        for name, labels in stub.nodes.items()
+                    ]
+                else:
+                    self.send_error(404)
+                    return
+                scope = metrics_scope or core_scope
+                if scope:
+                    items = [
+                        item
+                        for item in items
+                        if item["metadata"]["namespace"] == scope["namespace"]
+                    ]
+                if "labelSelector" in query:
+                    requirements = parse_label_selector(query["labelSelector"][0])
+                    items = [
+                        item
+                        for item in items
+                        if labels_match(
+                            item["metadata"].get("labels", {}), requirements
+                        )
+                    ]
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                start = int(query.get("continue", ["0"])[0])
+                limit = int(query.get("limit", ["0"])[0]) or len(items)
+                end = start + limit
+                metadata = {"continue": str(end)} if end < len(items) else {}
+
+                body = json.dumps(
+                    {"metadata": metadata, "items": items[start:end]}
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "StubMetricsServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
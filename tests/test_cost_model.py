@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from app.services.cost_model import CostModel
 
 
@@ -90,3 +93,116 @@ def test_cost_model_multiple_items():
     expected_monthly_2 = expected_hourly_2 * 730  # $51.1
     assert abs(result[1]["hourly_cost"] - expected_hourly_2) < 0.001
     assert abs(result[1]["monthly_cost"] - expected_monthly_2) < 0.01
+
+
+def test_cost_model_batch_matches_row_api():
+    """The columnar path produces the same costs as the dict-list API"""
+    cost_model = CostModel()
+
+    cpu_mcores = np.array([0, 100, 500, 2000, 12345.6])
+    memory_bytes = np.array([0, 1073741824, 536870912, 2147483648, 987654321])
+    rows = [
+        {"namespace": f"ns-{i}", "cpu_mcores": cpu, "memory_bytes": mem}
+        for i, (cpu, mem) in enumerate(zip(cpu_mcores, memory_bytes))
+    ]
+
+    batch = cost_model.compute_cost_batch(cpu_mcores, memory_bytes)
+    result = cost_model.compute_cost(rows)
+
+    for i, row in enumerate(result):
+        assert row["namespace"] == f"ns-{i}"
+        for key in ("cpu_core_hours", "memory_gb_hours", "hourly_cost", "monthly_cost"):
+            assert row[key] == batch[key][i]
+
+
+def test_cost_model_empty_input():
+    """Costing no rows returns no rows"""
+    cost_model = CostModel()
+
+    assert cost_model.compute_cost([]) == []
+    assert cost_model.compute_cost_batch(np.array([]), np.array([]))[
+        "hourly_cost"
+    ].shape == (0,)
+
+
+NODE_PRICING_CONFIG = """
+currency: USD
+cpu_per_core_hour: 0.031
+mem_per_gb_hour: 0.004
+node_pricing:
+  - name: arm-spot
+    match:
+      kubernetes.io/arch: arm64
+      karpenter.sh/capacity-type: spot
+    cpu_per_core_hour: 0.01
+    mem_per_gb_hour: 0.001
+  - name: on-demand
+    match:
+      karpenter.sh/capacity-type: on-demand
+    cpu_per_core_hour: 0.05
+"""
+
+NODES = {
+    "arm-1": {"kubernetes.io/arch": "arm64", "karpenter.sh/capacity-type": "spot"},
+    "x86-1": {"kubernetes.io/arch": "amd64", "karpenter.sh/capacity-type": "on-demand"},
+    "x86-2": {"kubernetes.io/arch": "amd64", "karpenter.sh/capacity-type": "spot"},
+}
+
+
+@pytest.fixture
+def node_priced_model(tmp_path):
+    config_path = tmp_path / "cost_model.yaml"
+    config_path.write_text(NODE_PRICING_CONFIG)
+    cost_model = CostModel(str(config_path))
+    cost_model.update_nodes(NODES)
+    return cost_model
+
+
+def test_cost_model_node_pricing(node_priced_model):
+    """Pods are priced by the first rule matching their node's labels"""
+    pods = [
+        {"namespace": "a", "pod": "p1", "cpu_mcores": 1000, "memory_bytes": 2**30},
+        {"namespace": "a", "pod": "p2", "cpu_mcores": 1000, "memory_bytes": 2**30},
+        {"namespace": "b", "pod": "p3", "cpu_mcores": 1000, "memory_bytes": 2**30},
+        {"namespace": "b", "pod": "p4", "cpu_mcores": 1000, "memory_bytes": 2**30},
+    ]
+    for pod, node in zip(pods, ["arm-1", "x86-1", "x86-2", None]):
+        pod["node"] = node
+
+    result = node_priced_model.compute_cost(pods)
+
+    assert result[0]["hourly_cost"] == pytest.approx(0.01 + 0.001)
+    # Rules without a memory price fall back to the default
+    assert result[1]["hourly_cost"] == pytest.approx(0.05 + 0.004)
+    # Unmatched and unscheduled pods use the default prices
+    assert result[2]["hourly_cost"] == pytest.approx(0.031 + 0.004)
+    assert result[3]["hourly_cost"] == pytest.approx(0.031 + 0.004)
+
+
+def test_cost_model_namespace_cost_sums_pod_pricing(node_priced_model):
+    """Namespace costs are attributed from their pods' node pricing"""
+    pods = [
+        {"namespace": "a", "cpu_mcores": 1000, "memory_bytes": 0, "node": "arm-1"},
+        {"namespace": "a", "cpu_mcores": 1000, "memory_bytes": 0, "node": "x86-1"},
+        {"namespace": "b", "cpu_mcores": 500, "memory_bytes": 0, "node": "x86-2"},
+    ]
+    namespaces = [
+        {"namespace": "a", "cpu_mcores": 2000, "memory_bytes": 0},
+        {"namespace": "b", "cpu_mcores": 500, "memory_bytes": 0},
+    ]
+
+    result = node_priced_model.compute_namespace_cost(namespaces, pods)
+
+    assert result[0]["cpu_core_hours"] == 2.0
+    assert result[0]["hourly_cost"] == pytest.approx(0.01 + 0.05)
+    assert result[1]["hourly_cost"] == pytest.approx(0.5 * 0.031)
+    assert result[0]["monthly_cost"] == pytest.approx(0.06 * 730)
+
+
+def test_cost_model_pricing_index():
+    """The default config has a single default price tier"""
+    cost_model = CostModel()
+    cost_model.update_nodes(NODES)
+
+    assert cost_model.pricing_index.tier_names == ["default"]
+    assert cost_model.pricing_index.tiers_for(["arm-1", None]).tolist() == [0, 0]
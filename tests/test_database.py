@@ -0,0 +1,331 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app.services.database import (
+    POD_ROLLUP_QUERIES,
+    ROLLUP_TIERS,
+    DatabaseService,
+    trend_tier,
+    workload_name,
+)
+from app.services.storage import pod_rollup_table
+
+
+@pytest.fixture
+def backend():
+    """These tests cover SQLite specifics: pragmas, interning and migrations"""
+    return "sqlite"
+
+
+def test_connection_is_shared_and_tuned(run_storage, make_pods):
+    """One long-lived WAL connection serves every call"""
+
+    async def test(db_service):
+        db = await db_service._connection()
+        await db_service.save_pod_metrics(make_pods(3))
+        assert await db_service._connection() is db
+
+        rows = await db.execute_fetchall("PRAGMA journal_mode")
+        assert rows[0][0] == "wal"
+
+    run_storage(test)
+
+
+def test_bulk_insert_persists_every_row(run_storage, make_pods):
+    """Snapshots are written in bulk and read back"""
+
+    async def test(db_service):
+        await db_service.save_pod_metrics(make_pods(2500))
+        await db_service.save_namespace_metrics(
+            [
+                {
+                    "namespace": "ns-0",
+                    "cpu_mcores": 500,
+                    "memory_bytes": 2**30,
+                    "hourly_cost": 0.02,
+                    "monthly_cost": 14.6,
+                }
+            ]
+        )
+
+        db = await db_service._connection()
+        rows = await db.execute_fetchall("SELECT COUNT(*) FROM pod_samples")
+        assert rows[0][0] == 2500
+
+        history = await db_service.get_namespace_history("ns-0", hours=1)
+        assert [row["namespace"] for row in history] == ["ns-0"]
+
+    run_storage(test)
+
+
+def test_pod_names_are_interned_once(run_storage, make_pods):
+    """Repeated snapshots reuse the pod, workload and namespace rows"""
+
+    async def test(db_service):
+        pods = make_pods(50)
+        await db_service.save_pod_metrics(pods, timestamp=1_700_000_000)
+        await db_service.save_pod_metrics(pods, timestamp=1_700_000_015)
+
+        db = await db_service._connection()
+        counts = {
+            table: (await db.execute_fetchall(f"SELECT COUNT(*) FROM {table}"))[0][0]
+            for table in ("namespaces", "pods", "pod_samples")
+        }
+        assert counts == {"namespaces": 5, "pods": 50, "pod_samples": 100}
+
+    run_storage(test)
+
+
+@pytest.mark.parametrize(
+    "pod, workload",
+    [
+        ("api-7d9f8b6c5d-x2k4p", "api"),
+        ("payment-gateway-5f6b7c8d9-x7k2p", "payment-gateway"),
+        ("postgres-0", "postgres"),
+        ("fluent-bit-q7x2m", "fluent-bit"),
+        ("standalone", "standalone"),
+        # Name parts that only look like generated suffixes are kept
+        ("nginx-proxy", "nginx-proxy"),
+        ("nginx-proxy-cache", "nginx-proxy-cache"),
+        ("web-abcdef-ghijk", "web-abcdef-ghijk"),
+    ],
+)
+def test_workload_name(pod, workload):
+    """Pods are grouped under the workload that owns them"""
+    assert workload_name(pod) == workload
+
+
+def test_legacy_tables_are_migrated(tmp_path):
+    """Rows from the denormalized schema move into the sample tables"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE namespace_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            namespace TEXT NOT NULL,
+            cpu_mcores REAL, memory_bytes REAL,
+            hourly_cost REAL, monthly_cost REAL
+        );
+        CREATE TABLE pod_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            namespace TEXT NOT NULL, pod TEXT NOT NULL,
+            cpu_mcores REAL, memory_bytes REAL,
+            hourly_cost REAL, monthly_cost REAL
+        );
+        INSERT INTO namespace_metrics (namespace, cpu_mcores, memory_bytes,
+            hourly_cost, monthly_cost) VALUES ('shop', 250, 1048576, 0.5, 365);
+        INSERT INTO pod_metrics (namespace, pod, cpu_mcores, memory_bytes,
+            hourly_cost, monthly_cost) VALUES ('shop', 'web-0', 250, 1048576, 0.5, 365);
+    """
+    )
+    conn.commit()
+    conn.close()
+
+    async def migrate():
+        db_service = DatabaseService(path)
+        await db_service.initialize()
+        try:
+            db = await db_service._connection()
+            tables = {
+                row[0]
+                for row in await db.execute_fetchall(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            pods = await db.execute_fetchall("SELECT COUNT(*) FROM pod_samples")
+            history = await db_service.get_namespace_history("shop", hours=1)
+            return tables, pods[0][0], history
+        finally:
+            await db_service.close()
+
+    tables, pod_samples, history = asyncio.run(migrate())
+
+    assert "namespace_metrics" not in tables and "pod_metrics" not in tables
+    assert pod_samples == 1
+    assert history[0]["hourly_cost"] == 0.5
+    assert history[0]["monthly_cost"] == 365
+
+
+def test_legacy_container_rows_are_summed_per_pod(tmp_path):
+    """The legacy table held a row per container; each pod keeps their sum"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE pod_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            namespace TEXT NOT NULL, pod TEXT NOT NULL,
+            cpu_mcores REAL, memory_bytes REAL,
+            hourly_cost REAL, monthly_cost REAL
+        );
+        INSERT INTO pod_metrics (timestamp, namespace, pod, cpu_mcores,
+            memory_bytes, hourly_cost, monthly_cost) VALUES
+            (datetime('now', '-10 minutes'), 'shop', 'web-0', 200, 1048576, 0.4, 292),
+            (datetime('now', '-10 minutes'), 'shop', 'web-0', 50, 524288, 0.1, 73),
+            (datetime('now', '-5 minutes'), 'shop', 'web-0', 300, 1048576, 0.6, 438);
+    """
+    )
+    conn.commit()
+    conn.close()
+
+    async def migrate():
+        db_service = DatabaseService(path)
+        await db_service.initialize()
+        try:
+            return await db_service.get_pod_history("shop", "web-0", hours=1)
+        finally:
+            await db_service.close()
+
+    history = asyncio.run(migrate())
+
+    assert [
+        (row["cpu_mcores"], row["memory_bytes"], row["hourly_cost"]) for row in history
+    ] == [(250, 1572864, pytest.approx(0.5)), (300, 1048576, pytest.approx(0.6))]
+
+
+def test_rollups_match_raw_samples(run_storage):
+    """Top namespaces read from rollups equal averages over the raw samples"""
+
+    async def test(db_service):
+        now = int(time.time())
+        # Two days of 10-minute samples for three namespaces
+        for ts in range(now - 2 * 86400, now, 600):
+            await db_service.save_namespace_metrics(
+                [
+                    {
+                        "namespace": f"ns-{i}",
+                        "cpu_mcores": 100 * (i + 1) + ts % 7,
+                        "memory_bytes": 2**20 * (i + 1),
+                        "hourly_cost": 0.01 * (i + 1) + (ts % 11) / 1000,
+                    }
+                    for i in range(3)
+                ],
+                timestamp=ts,
+            )
+
+        db = await db_service._connection()
+        for hours in (1, 5, 30):
+            raw = await db.execute_fetchall(
+                """
+                SELECT namespace_id, AVG(hourly_cost) FROM namespace_samples
+                WHERE ts >= ? GROUP BY namespace_id ORDER BY 2 DESC
+            """,
+                (db_service._since(hours),),
+            )
+            top = await db_service.get_top_namespaces(hours=hours)
+            assert [row["avg_hourly_cost"] for row in top] == pytest.approx(
+                [row[1] for row in raw]
+            )
+
+    run_storage(test)
+
+
+def test_replaced_samples_are_not_double_counted(run_storage):
+    """Rewriting a sample recomputes its rollup buckets instead of adding"""
+
+    async def test(db_service):
+        metric = {"namespace": "ns-0", "cpu_mcores": 100, "memory_bytes": 1}
+        ts = int(time.time())
+        await db_service.save_namespace_metrics(
+            [{**metric, "hourly_cost": 1.0}], timestamp=ts
+        )
+        await db_service.save_namespace_metrics(
+            [{**metric, "hourly_cost": 3.0}], timestamp=ts
+        )
+
+        trends = await db_service.get_cost_trends(hours=24)
+        assert trends["resolution"] == "1h"
+        assert trends["costs"] == [3.0]
+
+    run_storage(test)
+
+
+def test_incremental_pod_rollups_match_a_rebuild(run_storage):
+    """Adding each snapshot to its buckets equals re-aggregating them"""
+
+    async def test(db_service):
+        now = int(time.time())
+        for ts in range(now - 2 * 86400, now, 1800):
+            await db_service.save_pod_metrics(
+                [
+                    {
+                        "namespace": "shop",
+                        "pod": f"web-{i}",
+                        "cpu_mcores": 100 + ts % 13,
+                        "memory_bytes": 2**20 * (i + 1),
+                        "hourly_cost": 0.01 * (i + 1) + (ts % 11) / 1000,
+                    }
+                    for i in range(3)
+                ],
+                timestamp=ts,
+            )
+
+        db = await db_service._connection()
+        tables = [pod_rollup_table(tier) for tier, _ in ROLLUP_TIERS]
+        incremental = [
+            await db.execute_fetchall(f"SELECT * FROM {table} ORDER BY 1, 2")
+            for table in tables
+        ]
+        for table in tables:
+            await db.execute(f"DELETE FROM {table}")
+        for query in POD_ROLLUP_QUERIES:
+            await db.execute(query, (0, 2**62))
+        rebuilt = [
+            await db.execute_fetchall(f"SELECT * FROM {table} ORDER BY 1, 2")
+            for table in tables
+        ]
+        return incremental, rebuilt
+
+    incremental, rebuilt = run_storage(test)
+
+    for added, aggregated in zip(incremental, rebuilt):
+        assert len(added) == len(aggregated) > 0
+        for row, expected in zip(added, aggregated):
+            assert tuple(row) == pytest.approx(tuple(expected))
+
+
+@pytest.mark.parametrize(
+    "hours, tier", [(1, "1h"), (168, "1h"), (720, "1h"), (24 * 90, "1d")]
+)
+def test_trend_tier(hours, tier):
+    """Trends use the coarsest tier that still yields enough points"""
+    assert trend_tier(hours)[0] == tier
+
+
+def test_superseded_indexes_are_dropped(tmp_path):
+    """Upgrading replaces older time indexes with the covering keyset one"""
+    path = str(tmp_path / "costkube.db")
+
+    async def indexes_after_upgrade():
+        db_service = DatabaseService(path)
+        await db_service.initialize()
+        db = await db_service._connection()
+        await db.execute(
+            "CREATE INDEX idx_namespace_samples_ts ON namespace_samples(ts)"
+        )
+        await db.execute("PRAGMA user_version = 2")
+        await db.commit()
+        await db_service.close()
+
+        await db_service.initialize()
+        try:
+            db = await db_service._connection()
+            rows = await db.execute_fetchall(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+            return {row[0] for row in rows}
+        finally:
+            await db_service.close()
+
+    indexes = asyncio.run(indexes_after_upgrade())
+
+    assert "idx_namespace_samples_ts" not in indexes
+    assert "idx_namespace_samples_ts_covering" not in indexes
+    assert "idx_namespace_samples_ts_keyset" in indexes
@@ -0,0 +1,199 @@
+import asyncio
+import csv
+import io
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.database import DatabaseService
+
+NAMESPACES = 3
+SNAPSHOTS = 20
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client whose history endpoints read a freshly seeded database"""
+    path = str(tmp_path / "costkube.db")
+
+    async def seed():
+        db_service = DatabaseService(path)
+        await db_service.initialize()
+        now = int(time.time())
+        for i in range(SNAPSHOTS):
+            await db_service.save_namespace_metrics(
+                [
+                    {
+                        "namespace": f"ns-{n}",
+                        "cpu_mcores": 100.0,
+                        "memory_bytes": 2**30,
+                        "hourly_cost": 0.1 * (n + 1),
+                    }
+                    for n in range(NAMESPACES)
+                ],
+                now - (SNAPSHOTS - i) * 60,
+            )
+            await db_service.save_pod_metrics(
+                [
+                    {
+                        "namespace": f"ns-{n}",
+                        "pod": f"api-7d4b9c8f6-x7k2{'bcdfghjklmnpqrstvwxz'[n]}",
+                        "cpu_mcores": 100.0,
+                        "memory_bytes": 2**30,
+                        "hourly_cost": 0.1 * (n + 1),
+                    }
+                    for n in range(NAMESPACES)
+                ],
+                now - (SNAPSHOTS - i) * 60,
+            )
+        await db_service.close()
+
+    asyncio.run(seed())
+    db_service = DatabaseService(path)
+    monkeypatch.setattr(routes, "db_service", db_service)
+    # No lifespan: the collector and writers are not needed here
+    yield TestClient(app)
+    asyncio.run(db_service.close())
+
+
+def test_history_pages_chain_through_cursors(client):
+    """next_cursor walks the whole window without gaps or repeats"""
+    rows, cursor = [], None
+    while True:
+        params = {"hours": 1, "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/history/namespaces", params=params).json()
+        assert page["count"] == len(page["data"]) <= 7
+        rows.extend(page["data"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    keys = [(row["timestamp"], row["namespace"]) for row in rows]
+    assert len(set(keys)) == len(keys) == NAMESPACES * SNAPSHOTS
+
+
+def test_history_streams_ndjson(client):
+    """format=ndjson streams every remaining row, one object per line"""
+    first = client.get(
+        "/api/history/namespaces", params={"hours": 1, "limit": 10}
+    ).json()
+    response = client.get(
+        "/api/history/namespaces",
+        params={
+            "hours": 1,
+            "limit": 4,
+            "format": "ndjson",
+            "cursor": first["next_cursor"],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert len(streamed) == NAMESPACES * SNAPSHOTS - 10
+    assert first["data"][-1]["timestamp"] <= streamed[0]["timestamp"]
+
+
+def test_history_rejects_bad_cursor(client):
+    response = client.get("/api/history/namespaces", params={"cursor": "bogus"})
+    assert response.status_code == 400
+
+
+def test_pod_history_endpoints(client):
+    """Pod history, top pods and workload trends read the seeded pods"""
+    top = client.get("/api/history/top-pods", params={"limit": 2}).json()
+    assert [row["namespace"] for row in top["data"]] == ["ns-2", "ns-1"]
+    assert top["data"][0]["workload"] == "api"
+
+    pod = top["data"][0]["pod"]
+    history = client.get(
+        "/api/history/pods", params={"namespace": "ns-2", "pod": pod, "hours": 1}
+    ).json()
+    assert history["count"] == SNAPSHOTS
+
+    trends = client.get(
+        "/api/history/workloads/trends",
+        params={"namespace": "ns-2", "workload": "api", "hours": 24},
+    ).json()
+    assert trends["resolution"] == "1h"
+    assert trends["pods"] and set(trends["pods"]) == {1}
+    assert client.get("/api/history/pods", params={"pod": pod}).status_code == 422
+
+
+def test_history_exports_stream_every_row(client, monkeypatch):
+    """CSV and NDJSON exports cover the window across several pages"""
+    monkeypatch.setattr(routes, "EXPORT_PAGE_SIZE", 7)
+
+    response = client.get("/api/export/history/pods", params={"hours": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "costkube_pods_1h_" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == NAMESPACES * SNAPSHOTS
+    assert list(rows[0]) == [
+        "timestamp",
+        "namespace",
+        "pod",
+        "cpu_mcores",
+        "memory_bytes",
+        "hourly_cost",
+        "monthly_cost",
+    ]
+
+    response = client.get(
+        "/api/export/history/namespaces",
+        params={"hours": 1, "namespace": "ns-1", "format": "ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == SNAPSHOTS
+    assert {line["namespace"] for line in lines} == {"ns-1"}
+
+    empty = client.get("/api/export/history/pods", params={"namespace": "missing"})
+    assert (
+        empty.text.strip()
+        == "timestamp,namespace,pod,cpu_mcores,memory_bytes,hourly_cost,monthly_cost"
+    )
+    assert client.get("/api/export/history/nodes").status_code == 422
+
+
+def test_history_export_rejects_windows_past_raw_retention(client, monkeypatch):
+    """A window older raw samples were purged from is refused, not truncated"""
+    monkeypatch.setitem(routes.retention_scheduler.policies, "raw", 7)
+
+    response = client.get("/api/export/history/pods", params={"hours": 720})
+    assert response.status_code == 422
+    assert "RETENTION_RAW_DAYS" in response.json()["detail"]
+    assert "168 hours" in response.json()["detail"]
+
+    response = client.get("/api/export/history/namespaces", params={"hours": 168})
+    assert response.status_code == 200
+
+
+def test_history_exports_parquet(client, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(routes, "EXPORT_PAGE_SIZE", 7)
+
+    response = client.get(
+        "/api/export/history/pods", params={"hours": 1, "format": "parquet"}
+    )
+
+    assert response.status_code == 200
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_rows == NAMESPACES * SNAPSHOTS
+    assert parquet.metadata.num_row_groups == -(-NAMESPACES * SNAPSHOTS // 7)
+    assert parquet.schema_arrow.field("memory_bytes").type == "int64"
+
+
+def test_parquet_export_without_pyarrow(client, monkeypatch):
+    def missing():
+        raise RuntimeError("Parquet export needs the pyarrow package")
+
+    monkeypatch.setattr(routes, "load_pyarrow", missing)
+    response = client.get("/api/export/history/pods", params={"format": "parquet"})
+    assert response.status_code == 501
@@ -0,0 +1,108 @@
+import asyncio
+
+from app.services.history_writer import HistoryWriter
+from app.services.metrics_collector import MetricsSnapshot
+
+NAMESPACES = (
+    {
+        "namespace": "team-a",
+        "cpu_mcores": 500,
+        "memory_bytes": 2**30,
+        "hourly_cost": 0.02,
+        "monthly_cost": 14.6,
+    },
+)
+PODS = ({**NAMESPACES[0], "pod": "web-1"},)
+
+
+def make_snapshot(version: int, collected_at: float) -> MetricsSnapshot:
+    return MetricsSnapshot(
+        version=version, collected_at=collected_at, namespaces=NAMESPACES, pods=PODS
+    )
+
+
+class RecordingDatabase:
+    """Records saved snapshots instead of writing them"""
+
+    def __init__(self):
+        self.namespace_saves = []
+        self.pod_saves = []
+
+    async def save_namespace_metrics(self, metrics, timestamp=None):
+        self.namespace_saves.append((timestamp, metrics))
+
+    async def save_pod_metrics(self, metrics, timestamp=None):
+        self.pod_saves.append((timestamp, metrics))
+
+
+def test_submit_does_not_touch_database():
+    """Submitting only queues the snapshot"""
+    db = RecordingDatabase()
+    writer = HistoryWriter(db, sample_interval=60)
+
+    assert writer.submit(make_snapshot(1, 1000.0))
+    assert writer.pending == 1
+    assert db.namespace_saves == []
+
+
+def test_snapshots_are_coalesced_per_interval():
+    """Only the newest snapshot of each sample interval is persisted"""
+    db = RecordingDatabase()
+    writer = HistoryWriter(db, sample_interval=60)
+
+    writer.submit(make_snapshot(1, 1200.0))
+    writer.submit(make_snapshot(2, 1230.0))
+    assert not writer.submit(make_snapshot(2, 1230.0))
+    writer.submit(make_snapshot(3, 1260.0))
+    asyncio.run(writer.flush())
+
+    assert [ts for ts, _ in db.namespace_saves] == [1230.0, 1260.0]
+    assert [ts for ts, _ in db.pod_saves] == [1230.0, 1260.0]
+    assert writer.stats["coalesced"] == 1
+    assert writer.stats["flushed_snapshots"] == 2
+    assert writer.stats["flushed_rows"] == 4
+
+
+def test_persisted_intervals_are_not_written_again():
+    """Page refreshes within a flushed interval don't duplicate history"""
+    db = RecordingDatabase()
+    writer = HistoryWriter(db, sample_interval=60)
+
+    writer.submit(make_snapshot(1, 1200.0))
+    asyncio.run(writer.flush())
+    for _ in range(20):
+        assert not writer.submit(make_snapshot(2, 1210.0))
+    asyncio.run(writer.flush())
+
+    assert len(db.namespace_saves) == 1
+    assert writer.stats["duplicates"] == 20
+
+
+def test_stop_flushes_pending_snapshots():
+    """Shutting down persists whatever is still queued"""
+    db = RecordingDatabase()
+    writer = HistoryWriter(db, sample_interval=60, flush_interval=3600)
+
+    async def run():
+        writer.start()
+        writer.submit(make_snapshot(1, 1200.0))
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert len(db.namespace_saves) == 1
+    assert writer.pending == 0
+
+
+def test_listeners_run_only_after_new_history_is_flushed():
+    db = RecordingDatabase()
+    writer = HistoryWriter(db, sample_interval=60)
+    flushes = []
+    writer.add_listener(lambda: flushes.append(writer.stats["flushed_snapshots"]))
+
+    asyncio.run(writer.flush())
+    assert flushes == []
+
+    writer.submit(make_snapshot(1, 1000))
+    asyncio.run(writer.flush())
+    assert flushes == [1]
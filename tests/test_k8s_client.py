@@ -0,0 +1,207 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.k8s_client import AsyncKubernetesClient, KubernetesClient
+from app.services.metrics_collector import metrics_collector
+from tests.stub_metrics_server import StubMetricsServer, pod_metrics_item
+
+ITEMS = [
+    pod_metrics_item(
+        "team-a",
+        "web-1",
+        [{"cpu": "250m", "memory": "128Mi"}, {"cpu": "500000n", "memory": "1Gi"}],
+        labels={"app": "web"},
+    ),
+    pod_metrics_item("team-a", "web-2", [{"cpu": "1", "memory": "512Ki"}]),
+    pod_metrics_item("team-b", "worker-1", [{"cpu": "10u", "memory": "1048576"}]),
+]
+
+
+def test_namespace_usage_from_metrics_server():
+    """Pod metrics are aggregated per namespace"""
+    with StubMetricsServer(ITEMS) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        usage = {row["namespace"]: row for row in k8s.get_namespace_usage()}
+
+    assert usage["team-a"]["cpu_mcores"] == 250 + 0.5 + 1000
+    assert usage["team-a"]["memory_bytes"] == 128 * 2**20 + 2**30 + 512 * 2**10
+    assert usage["team-b"]["cpu_mcores"] == 0.01
+    assert usage["team-b"]["memory_bytes"] == 1048576
+
+
+def test_pod_usage_from_metrics_server():
+    """Container usage is summed into one row per pod"""
+    with StubMetricsServer(ITEMS) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        pods = k8s.get_pod_usage()
+
+    assert [p["pod"] for p in pods] == ["web-1", "web-2", "worker-1"]
+    assert pods[0] == {
+        "namespace": "team-a",
+        "pod": "web-1",
+        "cpu_mcores": 250.5,
+        "memory_bytes": 128 * 2**20 + 2**30,
+        "labels": {"app": "web"},
+    }
+    assert pods[1]["labels"] == {}
+
+
+def test_usage_views_share_one_scrape():
+    """Pod rows and the namespace rollup come from a single list call"""
+    with StubMetricsServer(ITEMS) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        usage = k8s.get_usage()
+
+    assert len(stub.requests) == 1
+    for ns in usage["namespaces"]:
+        pods = [p for p in usage["pods"] if p["namespace"] == ns["namespace"]]
+        assert ns["cpu_mcores"] == sum(p["cpu_mcores"] for p in pods)
+        assert ns["memory_bytes"] == sum(p["memory_bytes"] for p in pods)
+
+
+def test_usage_with_node_attribution():
+    """Pods are attributed to their nodes and node labels are returned"""
+    nodes = {"node-a": {"kubernetes.io/arch": "arm64"}, "node-b": {}}
+    pod_nodes = {("team-a", "web-1"): "node-a", ("team-b", "worker-1"): "node-b"}
+
+    with StubMetricsServer(ITEMS, nodes=nodes, pod_nodes=pod_nodes) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        usage = k8s.get_usage(include_nodes=True)
+
+    assert usage["nodes"] == nodes
+    assert [p["node"] for p in usage["pods"]] == ["node-a", None, "node-b"]
+    assert any("fieldSelector=spec.nodeName" in path for path in stub.requests)
+
+
+def test_scoped_usage_lists_only_the_namespace():
+    """Namespace and label scopes are resolved by the API server"""
+    pod_nodes = {("team-a", "web-1"): "node-a", ("team-b", "worker-1"): "node-b"}
+
+    with StubMetricsServer(ITEMS, pod_nodes=pod_nodes) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        pods = k8s.get_pod_usage(namespace="team-a")
+        usage = k8s.get_usage(
+            include_nodes=True, namespace="team-a", label_selector="app=web"
+        )
+
+    assert [p["pod"] for p in pods] == ["web-1", "web-2"]
+    assert [p["pod"] for p in usage["pods"]] == ["web-1"]
+    assert usage["pods"][0]["node"] == "node-a"
+    assert [ns["namespace"] for ns in usage["namespaces"]] == ["team-a"]
+    pod_listings = [path for path in stub.requests if "/pods" in path]
+    assert len(pod_listings) == 3
+    assert all("/namespaces/team-a/pods" in path for path in pod_listings)
+    assert all("labelSelector=app%3Dweb" in path for path in pod_listings[1:])
+
+
+def test_simulated_cluster_honors_scopes():
+    """The simulated cluster filters like the metrics API"""
+    k8s = KubernetesClient(use_simulated=True)
+
+    production = k8s.get_pod_usage(namespace="production")
+    selected = k8s.get_pod_usage(label_selector="app in (grafana,prometheus)")
+    usage = k8s.get_usage(namespace="staging")
+
+    assert production and {p["namespace"] for p in production} == {"production"}
+    assert {p["labels"]["app"] for p in selected} == {"grafana", "prometheus"}
+    assert [ns["namespace"] for ns in usage["namespaces"]] == ["staging"]
+    assert k8s.get_pod_usage(namespace="no-such-namespace") == []
+
+
+def test_pod_metrics_are_paginated():
+    """Large clusters are listed in bounded pages using continue tokens"""
+    items = [
+        pod_metrics_item(f"ns-{i % 7}", f"pod-{i}", [{"cpu": "1m", "memory": "1Ki"}])
+        for i in range(1203)
+    ]
+
+    with StubMetricsServer(items) as stub:
+        k8s = KubernetesClient(api_client=stub.api_client())
+        k8s.page_size = 500
+        pods = k8s.get_pod_usage()
+        namespaces = k8s.get_namespace_usage()
+
+    assert len(pods) == 1203
+    assert len({p["pod"] for p in pods}) == 1203
+    assert sum(ns["cpu_mcores"] for ns in namespaces) == 1203
+    # Three pages per scrape, each bounded by the page size
+    assert len(stub.requests) == 6
+    assert all("limit=500" in path for path in stub.requests)
+    assert sum("continue=" in path for path in stub.requests) == 4
+
+
+def test_async_client_keeps_event_loop_responsive():
+    """The event loop keeps running while a slow scrape is in flight"""
+
+    async def scrape_while_ticking(async_client):
+        ticks = 0
+        scrape = asyncio.create_task(async_client.get_pod_usage())
+        while not scrape.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks, await scrape
+
+    with StubMetricsServer(ITEMS, delay=0.3) as stub:
+        async_client = AsyncKubernetesClient(
+            KubernetesClient(api_client=stub.api_client())
+        )
+        try:
+            ticks, pods = asyncio.run(scrape_while_ticking(async_client))
+        finally:
+            async_client.close()
+
+    assert len(pods) == 3
+    assert ticks >= 10
+
+
+def test_scoped_scrapes_leave_the_collector_a_worker():
+    """Stalled scoped scrapes never hold up a full-cluster scrape"""
+    release = threading.Event()
+
+    class SlowScopedClient:
+        def get_usage(self, include_nodes=False, namespace=None, label_selector=None):
+            if namespace is not None:
+                release.wait(5)
+            return {"namespaces": [], "pods": []}
+
+    async def full_scrape_during_scoped_ones(async_client):
+        scoped = [
+            asyncio.create_task(async_client.get_usage(namespace=f"team-{i}"))
+            for i in range(async_client.max_workers + 2)
+        ]
+        await asyncio.sleep(0.05)
+        try:
+            return await asyncio.wait_for(async_client.get_usage(), timeout=2)
+        finally:
+            release.set()
+            await asyncio.gather(*scoped)
+
+    async_client = AsyncKubernetesClient(SlowScopedClient())
+    try:
+        usage = asyncio.run(full_scrape_during_scoped_ones(async_client))
+    finally:
+        async_client.close()
+
+    assert usage == {"namespaces": [], "pods": []}
+
+
+def test_app_shutdown_releases_the_worker_threads():
+    """Lifespan teardown closes the pools; the next startup starts new ones"""
+    for _ in range(2):
+        with TestClient(app) as client:
+            assert client.get("/api/pods", params={"save_history": False}).is_success
+        assert metrics_collector.async_client._pools == {}
+
+
+def test_async_client_uses_simulated_cluster():
+    """The async variant serves simulated data when no cluster is configured"""
+    async_client = AsyncKubernetesClient(KubernetesClient(use_simulated=True))
+    try:
+        namespaces = asyncio.run(async_client.get_namespace_usage())
+    finally:
+        async_client.close()
+
+    assert {row["namespace"] for row in namespaces} >= {"production", "staging"}
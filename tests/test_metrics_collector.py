@@ -0,0 +1,133 @@
+import asyncio
+import dataclasses
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.cost_model import CostModel
+from app.services.metrics_collector import MetricsCollector
+
+
+class FakeKubernetesClient:
+    """Counts scrapes and returns fixed usage data"""
+
+    def __init__(self, available: bool = True):
+        self.available = available
+        self.scrapes = 0
+        self.scopes = []
+
+    def get_usage(self, include_nodes=False, namespace=None, label_selector=None):
+        self.scrapes += 1
+        self.scopes.append((namespace, label_selector))
+        if not self.available:
+            return None
+        return {
+            "namespaces": [
+                {"namespace": "team-a", "cpu_mcores": 500, "memory_bytes": 2**30}
+            ],
+            "pods": [
+                {
+                    "namespace": "team-a",
+                    "pod": "web-1",
+                    "cpu_mcores": 500,
+                    "memory_bytes": 2**30,
+                }
+            ],
+        }
+
+
+def test_refresh_publishes_costed_snapshot():
+    """Each refresh scrapes once and publishes a new costed snapshot"""
+    k8s = FakeKubernetesClient()
+    collector = MetricsCollector(k8s, CostModel(), interval=60)
+
+    first = asyncio.run(collector.refresh())
+    second = asyncio.run(collector.refresh())
+
+    assert k8s.scrapes == 2
+    assert second.version == first.version + 1
+    assert collector.snapshot is second
+    assert second.available
+    assert second.namespaces[0]["hourly_cost"] > 0
+    assert second.pods[0]["pod"] == "web-1"
+    assert second.metadata()["snapshot_age_seconds"] >= 0
+
+
+def test_snapshot_is_immutable():
+    """Published snapshots cannot be reassigned by readers"""
+    collector = MetricsCollector(FakeKubernetesClient(), CostModel(), interval=60)
+    snapshot = asyncio.run(collector.refresh())
+
+    assert isinstance(snapshot.namespaces, tuple)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.namespaces = ()
+
+
+def test_get_snapshot_reuses_published_snapshot():
+    """Readers share the latest snapshot instead of scraping again"""
+    k8s = FakeKubernetesClient()
+    collector = MetricsCollector(k8s, CostModel(), interval=60)
+
+    async def read_many():
+        return await asyncio.gather(*(collector.get_snapshot() for _ in range(20)))
+
+    snapshots = asyncio.run(read_many())
+
+    assert k8s.scrapes == 1
+    assert all(s is snapshots[0] for s in snapshots)
+
+
+def test_scoped_collect_is_never_published():
+    """A namespace- or label-scoped scrape is costed but not versioned"""
+    k8s = FakeKubernetesClient()
+    collector = MetricsCollector(k8s, CostModel(), interval=60)
+    published = asyncio.run(collector.refresh())
+
+    scoped = asyncio.run(collector.collect("team-a", "app=web"))
+
+    assert k8s.scopes == [(None, None), ("team-a", "app=web")]
+    assert scoped.version == 0
+    assert scoped.pods[0]["hourly_cost"] > 0
+    assert collector.snapshot is published
+    assert asyncio.run(collector.refresh()).version == published.version + 1
+
+
+def test_identical_scoped_scrapes_are_coalesced():
+    """Concurrent and repeated requests for one scope share a single scrape"""
+    k8s = FakeKubernetesClient()
+    collector = MetricsCollector(k8s, CostModel(), interval=60)
+
+    async def scrape_many():
+        return await asyncio.gather(
+            *(collector.collect_scoped("team-a", "app=web") for _ in range(10)),
+            collector.collect_scoped("team-a", None),
+        )
+
+    *same, other = asyncio.run(scrape_many())
+    again = asyncio.run(collector.collect_scoped("team-a", "app=web"))
+
+    assert len(k8s.scopes) == 2
+    assert set(k8s.scopes) == {("team-a", None), ("team-a", "app=web")}
+    assert all(s is same[0] for s in same) and again is same[0]
+    assert other is not same[0]
+
+
+def test_unavailable_cluster_snapshot():
+    """A failed scrape publishes an unavailable snapshot"""
+    collector = MetricsCollector(
+        FakeKubernetesClient(available=False), CostModel(), interval=60
+    )
+    snapshot = asyncio.run(collector.refresh())
+
+    assert not snapshot.available
+    assert snapshot.pods is None
+
+
+def test_api_responses_include_snapshot_age():
+    """Snapshot-backed endpoints report the age of the data they serve"""
+    with TestClient(app) as client:
+        for path in ("/api/namespaces", "/api/pods", "/api/recommendations"):
+            data = client.get(path).json()
+            assert data["snapshot_age_seconds"] >= 0
+            assert "snapshot_timestamp" in data
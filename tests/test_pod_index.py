@@ -0,0 +1,215 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.label_selector import labels_match, parse_label_selector
+from app.services.metrics_collector import metrics_collector
+from app.services.pod_index import PodIndex, decode_key, encode_key
+
+
+def make_pods(count: int):
+    return [
+        {
+            "namespace": f"ns-{i % 4}",
+            "pod": f"{'web' if i % 3 else 'batch'}-{i:03d}",
+            "hourly_cost": round(0.01 * (i % 17), 2),
+            "cpu_mcores": 10 * i,
+            "labels": (
+                {"app": "web" if i % 3 else "batch", "tier": f"t{i % 2}"}
+                if i % 5
+                else {}
+            ),
+        }
+        for i in range(count)
+    ]
+
+
+PODS = make_pods(200)
+INDEX = PodIndex(PODS)
+
+
+@pytest.mark.parametrize(
+    "selector, expected",
+    [
+        ("", []),
+        ("app=web", [("app", "in", frozenset({"web"}))]),
+        ("app==web", [("app", "in", frozenset({"web"}))]),
+        ("app!=web", [("app", "notin", frozenset({"web"}))]),
+        ("app=", [("app", "in", frozenset({""}))]),
+        (
+            "app in (web, batch),tier",
+            [
+                ("app", "in", frozenset({"web", "batch"})),
+                ("tier", "exists", frozenset()),
+            ],
+        ),
+        (
+            "app.kubernetes.io/name notin (a),!tier",
+            [
+                ("app.kubernetes.io/name", "notin", frozenset({"a"})),
+                ("tier", "!exists", frozenset()),
+            ],
+        ),
+    ],
+)
+def test_label_selector_parsing(selector, expected):
+    assert parse_label_selector(selector) == expected
+
+
+@pytest.mark.parametrize("selector", ["app in (web", "a=b=c", ",", "app in ()x"])
+def test_malformed_label_selectors(selector):
+    with pytest.raises(ValueError):
+        parse_label_selector(selector)
+
+
+@pytest.mark.parametrize(
+    "selector",
+    [
+        "app=web",
+        "app!=web",
+        "app in (web,batch),tier=t1",
+        "app notin (batch)",
+        "tier",
+        "!tier",
+        "app=web,!tier",
+        "missing=x",
+    ],
+)
+def test_index_matches_a_linear_scan(selector):
+    requirements = parse_label_selector(selector)
+    page = INDEX.query(
+        namespace="ns-1",
+        requirements=requirements,
+        name_prefix="web",
+        min_hourly_cost=0.05,
+        sort="-hourly_cost",
+    )
+
+    expected = sorted(
+        (
+            pod
+            for pod in PODS
+            if pod["namespace"] == "ns-1"
+            and labels_match(pod["labels"], requirements)
+            and pod["pod"].startswith("web")
+            and pod["hourly_cost"] >= 0.05
+        ),
+        key=lambda pod: (-pod["hourly_cost"], pod["namespace"], pod["pod"]),
+    )
+    assert page.rows == expected
+    assert page.total == len(expected)
+    assert page.next_key is None
+
+
+@pytest.mark.parametrize("sort", [None, "hourly_cost", "-hourly_cost", "-cpu_mcores"])
+@pytest.mark.parametrize(
+    "filters", [{}, {"namespace": "ns-2"}, {"min_hourly_cost": 0.1}]
+)
+def test_cursor_pages_cover_every_match_once(sort, filters):
+    everything = INDEX.query(sort=sort, **filters).rows
+    rows, after = [], None
+    while True:
+        page = INDEX.query(sort=sort, limit=7, after=after, **filters)
+        assert page.total == len(everything)
+        rows.extend(page.rows)
+        if page.next_key is None:
+            break
+        after = decode_key(encode_key(page.next_key), sort)
+
+    assert rows == everything
+
+
+def test_offset_pages():
+    top = INDEX.query(sort="-hourly_cost").rows
+    page = INDEX.query(sort="-hourly_cost", limit=10, offset=20)
+
+    assert page.rows == top[20:30]
+    assert page.next_key is not None
+    assert INDEX.query(sort="-hourly_cost", offset=500).rows == []
+
+
+def test_cursor_survives_a_new_snapshot():
+    """A cursor is a sort key, so it resumes in the next snapshot's order"""
+    first = INDEX.query(sort="-cpu_mcores", limit=10)
+    newer = PodIndex(make_pods(150))
+
+    page = newer.query(sort="-cpu_mcores", limit=10, after=first.next_key)
+
+    assert page.rows[0]["cpu_mcores"] < first.rows[-1]["cpu_mcores"]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_key(("ns", "pod"))])
+def test_malformed_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_key(cursor, "-hourly_cost")
+
+
+def test_pods_api_filters_sorts_and_pages():
+    client = TestClient(app)
+    params = {"save_history": False, "sort": "-monthly_cost", "limit": 5}
+    everything = client.get(
+        "/api/pods", params={"save_history": False, "sort": "-monthly_cost"}
+    ).json()["data"]
+
+    first = client.get("/api/pods", params=params).json()
+    assert first["data"] == everything[:5]
+    assert first["total"] == len(everything)
+    second = client.get(
+        "/api/pods", params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    if second["snapshot_version"] == first["snapshot_version"]:
+        assert second["data"] == everything[5:10]
+
+    selected = client.get(
+        "/api/pods",
+        params={
+            "save_history": False,
+            "label_selector": "app in (nginx-web,redis-cache)",
+            "namespace": "production",
+        },
+    ).json()
+    assert selected["total"] == 5
+    assert {pod["labels"]["app"] for pod in selected["data"]} == {
+        "nginx-web",
+        "redis-cache",
+    }
+
+
+def test_pods_api_rejects_bad_selectors_and_cursors():
+    client = TestClient(app)
+    for params in (
+        {"label_selector": "app in (web"},
+        {"sort": "-hourly_cost", "cursor": "garbage"},
+    ):
+        response = client.get("/api/pods", params={"save_history": False, **params})
+        assert response.status_code == 400
+    response = client.get("/api/pods", params={"sort": "pod"})
+    assert response.status_code == 422
+
+
+def test_live_pods_scrape_only_the_namespace(monkeypatch):
+    client = TestClient(app)
+    scopes = []
+    get_usage = metrics_collector.k8s_client.get_usage
+
+    def scoped_get_usage(*args, **kwargs):
+        scopes.append((kwargs.get("namespace"), kwargs.get("label_selector")))
+        return get_usage(*args, **kwargs)
+
+    monkeypatch.setattr(metrics_collector.k8s_client, "get_usage", scoped_get_usage)
+    metrics_collector.scoped_scrapes.invalidate()
+    response = client.get(
+        "/api/pods",
+        params={
+            "namespace": "monitoring",
+            "label_selector": "app=grafana",
+            "live": True,
+            "format": "columnar",
+        },
+    )
+
+    payload = response.json()
+    assert scopes == [("monitoring", "app=grafana")]
+    assert payload["snapshot_version"] == 0
+    assert payload["total"] == 1
+    assert payload["dictionaries"]["namespace"] == ["monitoring"]
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+
+from app.services.quantity import parse_cpu_mcores, parse_memory_bytes, parse_quantity
+
+
+@pytest.mark.parametrize(
+    "quantity, expected",
+    [
+        ("0", Decimal(0)),
+        ("2", Decimal(2)),
+        ("1.5", Decimal("1.5")),
+        (".5", Decimal("0.5")),
+        ("5.", Decimal(5)),
+        ("+3", Decimal(3)),
+        ("-3", Decimal(-3)),
+        ("100n", Decimal("0.0000001")),
+        ("250u", Decimal("0.00025")),
+        ("250m", Decimal("0.25")),
+        ("2k", Decimal(2000)),
+        ("2M", Decimal(2_000_000)),
+        ("2G", Decimal(2 * 10**9)),
+        ("2T", Decimal(2 * 10**12)),
+        ("2P", Decimal(2 * 10**15)),
+        ("2E", Decimal(2 * 10**18)),
+        ("1Ki", Decimal(1024)),
+        ("1.5Mi", Decimal(1.5 * 2**20)),
+        ("1Gi", Decimal(2**30)),
+        ("1Ti", Decimal(2**40)),
+        ("1Pi", Decimal(2**50)),
+        ("1Ei", Decimal(2**60)),
+        ("12e6", Decimal(12 * 10**6)),
+        ("12E6", Decimal(12 * 10**6)),
+        ("5e-3", Decimal("0.005")),
+    ],
+)
+def test_parse_quantity(quantity, expected):
+    """Every suffix in the Kubernetes quantity grammar is understood"""
+    assert parse_quantity(quantity) == expected
+
+
+@pytest.mark.parametrize("quantity", ["", "Mi", "1.2.3", "1Zi", "1 Gi", "1e", "abc"])
+def test_parse_quantity_rejects_invalid(quantity):
+    """Malformed quantities raise ValueError"""
+    with pytest.raises(ValueError):
+        parse_quantity(quantity)
+
+
+def test_parse_cpu_mcores():
+    """CPU quantities convert to millicores"""
+    assert parse_cpu_mcores("500000n") == 0.5
+    assert parse_cpu_mcores("10u") == 0.01
+    assert parse_cpu_mcores("250m") == 250
+    assert parse_cpu_mcores("1.5") == 1500
+    assert parse_cpu_mcores("2k") == 2_000_000
+
+
+def test_parse_memory_bytes():
+    """Memory quantities convert to whole bytes, rounding up"""
+    assert parse_memory_bytes("128Mi") == 128 * 2**20
+    assert parse_memory_bytes("1G") == 10**9
+    assert parse_memory_bytes("1.5k") == 1500
+    assert parse_memory_bytes("100m") == 1
+    assert isinstance(parse_memory_bytes("1Gi"), int)
+
+
+def test_repeated_quantities_are_cached():
+    """Repeated usage strings are served from the LRU cache"""
+    parse_cpu_mcores.cache_clear()
+    for _ in range(100):
+        parse_cpu_mcores("123m")
+
+    info = parse_cpu_mcores.cache_info()
+    assert info.misses == 1
+    assert info.hits == 99
@@ -0,0 +1,260 @@
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.response_cache import ResponseCache, cache_key
+
+
+def test_keys_ignore_parameter_order_and_omitted_values():
+    assert cache_key("top", {"limit": 10, "hours": 24}) == cache_key(
+        "top", {"hours": 24, "limit": 10, "namespace": None}
+    )
+    assert cache_key("top", {"limit": 10}) != cache_key("trends", {"limit": 10})
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.set(cache_key("a", {}), 1)
+    cache.set(cache_key("b", {}), 2)
+    assert cache.get(cache_key("a", {})) == (True, 1)
+
+    cache.set(cache_key("c", {}), 3)
+
+    assert cache.get(cache_key("b", {})) == (False, None)
+    assert cache.get(cache_key("a", {})) == (True, 1)
+    assert len(cache) == 2
+    assert cache.stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache = ResponseCache(max_entries=8, ttl=30)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache.set(cache_key("a", {}), 1)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+
+    assert cache.get(cache_key("a", {})) == (False, None)
+    assert cache.stats["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = ResponseCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    async def run():
+        first = await cache.get_or_compute("trends", {"hours": 24}, compute)
+        second = await cache.get_or_compute("trends", {"hours": 24}, compute)
+        other = await cache.get_or_compute("trends", {"hours": 48}, compute)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+
+    assert first is second
+    assert other == {"value": 2}
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+
+def test_invalidation_drops_entries_and_in_flight_results():
+    """A result computed from data older than the invalidation is not stored"""
+    cache = ResponseCache(max_entries=8, ttl=60)
+    cache.set(cache_key("a", {}), 1)
+
+    async def compute():
+        cache.invalidate()  # a snapshot lands mid-computation
+        return "stale"
+
+    async def run():
+        return await cache.get_or_compute("b", {}, compute)
+
+    assert asyncio.run(run()) == "stale"
+    assert len(cache) == 0
+    assert cache.stats["invalidations"] == 1
+
+
+def test_failures_are_not_cached():
+    cache = ResponseCache(max_entries=8, ttl=60)
+
+    async def fail():
+        raise RuntimeError("database locked")
+
+    async def run():
+        try:
+            await cache.get_or_compute("trends", {}, fail)
+        except RuntimeError:
+            pass
+        return await cache.get_or_compute("trends", {}, lambda: asyncio.sleep(0, "ok"))
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"forecast": len(calls)}
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                cache.get_or_compute("forecast", {"days": 30}, compute)
+                for _ in range(10)
+            )
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert cache.stats["coalesced"] == 9
+    assert cache.info()["in_flight"] == 0
+    assert len(cache) == 1
+
+
+def test_shared_failure_reaches_every_waiter_and_is_not_cached():
+    cache = ResponseCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database locked")
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_compute("trends", {}, fail) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == [1]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(cache) == 0
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    cache = ResponseCache(max_entries=8, ttl=60)
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("trends", {}, compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("trends", {}, compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "ok"
+    assert len(cache) == 1
+
+
+def test_misses_after_invalidation_start_a_fresh_computation():
+    cache = ResponseCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        before = asyncio.create_task(cache.get_or_compute("trends", {}, compute))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        after = await cache.get_or_compute("trends", {}, compute)
+        return await before, after
+
+    assert asyncio.run(run()) == (2, 2)
+    assert calls == [1, 1]
+    assert cache.get(cache_key("trends", {})) == (True, 2)
+
+
+def test_endpoints_serve_cached_responses(monkeypatch):
+    cache = ResponseCache(max_entries=8, ttl=60)
+    monkeypatch.setattr(routes, "response_cache", cache)
+    calls = []
+
+    async def get_cost_trends(hours):
+        calls.append(hours)
+        return {"timestamps": [], "costs": [], "hours": hours}
+
+    monkeypatch.setattr(routes.db_service, "get_cost_trends", get_cost_trends)
+    client = TestClient(app)
+
+    for _ in range(3):
+        assert (
+            client.get("/api/history/trends", params={"hours": 24}).status_code == 200
+        )
+    assert calls == [24]
+
+    cache.invalidate()
+    client.get("/api/history/trends", params={"hours": 24})
+    assert calls == [24, 24]
+
+    # Forecast and budget runway reuse the cached 7-day trends
+    client.get("/api/forecast")
+    client.get("/api/forecast/budget-runway", params={"budget": 100})
+    assert calls == [24, 24, 168]
+
+    health = client.get("/api/health").json()["response_cache"]
+    assert health["hits"] == 3
+    assert health["misses"] == 4
+    assert health["entries"] == 3
+
+
+def test_cached_responses_report_current_snapshot_age(monkeypatch):
+    """Hits reuse the cached payload but not the freshness fields around it"""
+    cache = ResponseCache(max_entries=8, ttl=60)
+    monkeypatch.setattr(routes, "response_cache", cache)
+    client = TestClient(app)
+
+    first = client.get("/api/recommendations").json()
+    time.sleep(0.05)
+    second = client.get("/api/recommendations").json()
+
+    assert cache.stats["hits"] == 1
+    assert second["snapshot_version"] == first["snapshot_version"]
+    assert second["snapshot_age_seconds"] > first["snapshot_age_seconds"]
+    assert {k: v for k, v in second.items() if k != "snapshot_age_seconds"} == {
+        k: v for k, v in first.items() if k != "snapshot_age_seconds"
+    }
+
+
+def test_cached_forecast_is_stamped_per_request(monkeypatch):
+    cache = ResponseCache(max_entries=8, ttl=60)
+    monkeypatch.setattr(routes, "response_cache", cache)
+    now = time.time()
+
+    async def get_cost_trends(hours):
+        timestamps = [
+            datetime.fromtimestamp(now - (24 - h) * 3600).isoformat() for h in range(24)
+        ]
+        return {"timestamps": timestamps, "costs": [1.0 + h for h in range(24)]}
+
+    monkeypatch.setattr(routes.db_service, "get_cost_trends", get_cost_trends)
+    client = TestClient(app)
+
+    first = client.get("/api/forecast").json()
+    time.sleep(0.01)
+    second = client.get("/api/forecast").json()
+
+    assert cache.stats["hits"] == 1
+    assert second["timestamp"] > first["timestamp"]
+    assert second["forecast_costs"] == first["forecast_costs"]
@@ -0,0 +1,181 @@
+import asyncio
+import gzip
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.api import responses, routes
+from app.api.responses import (
+    arrow_stream,
+    dumps,
+    json_response,
+    negotiate_encoding,
+    to_columns,
+)
+from app.main import app
+
+
+def make_request(accept_encoding: str) -> Request:
+    headers = [(b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+ROWS = {"data": [{"namespace": f"ns-{i}", "hourly_cost": 0.01 * i} for i in range(500)]}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("*;q=0", None),
+    ],
+)
+def test_encoding_negotiation(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_gzip_is_used_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert negotiate_encoding("gzip, br") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+def test_large_bodies_are_compressed_as_negotiated():
+    response = asyncio.run(json_response(make_request("gzip"), ROWS))
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.body)) == ROWS
+
+
+def test_small_bodies_are_sent_as_is():
+    response = asyncio.run(json_response(make_request("gzip, br"), {"ok": True}))
+
+    assert "content-encoding" not in response.headers
+    assert response.body == b'{"ok":true}'
+
+
+def test_columnar_payloads_serialize_numpy_arrays():
+    payload = {"hourly_cost": np.array([0.5, 1.5]), "memory_bytes": np.arange(2)}
+    assert json.loads(dumps(payload)) == {
+        "hourly_cost": [0.5, 1.5],
+        "memory_bytes": [0, 1],
+    }
+
+
+def test_row_endpoints_negotiate_compression():
+    client = TestClient(app)
+    for encoding in ("br", "gzip"):
+        response = client.get(
+            "/api/pods",
+            params={"save_history": False},
+            headers={"Accept-Encoding": encoding},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == encoding
+        assert response.json()["data"]
+
+
+def from_columns(payload):
+    """Rows back from a columnar payload, as the dashboard decodes it"""
+    columns = {
+        name: (
+            [payload["dictionaries"][name][code] for code in values]
+            if name in payload["dictionaries"]
+            else values
+        )
+        for name, values in payload["data"].items()
+    }
+    return [
+        {name: columns[name][i] for name in payload["columns"]}
+        for i in range(payload["count"])
+    ]
+
+
+def test_columns_dictionary_encode_and_fill_missing_fields():
+    rows = [
+        {"namespace": "a", "pod": "p1"},
+        {"namespace": "b", "pod": "p2", "owner": "team"},
+        {"namespace": "a", "pod": "p3"},
+    ]
+    payload = to_columns(rows, ("namespace", "absent"))
+
+    assert payload["columns"] == ["namespace", "pod", "owner"]
+    assert payload["data"]["namespace"] == [0, 1, 0]
+    assert payload["dictionaries"] == {"namespace": ["a", "b"]}
+    assert payload["data"]["owner"] == [None, "team", None]
+    assert to_columns([]) == {
+        "format": "columnar",
+        "count": 0,
+        "columns": [],
+        "data": {},
+        "dictionaries": {},
+    }
+
+
+def test_arrow_stream_keeps_dictionary_columns():
+    pa = pytest.importorskip("pyarrow")
+    rows = [{"namespace": f"ns-{i % 3}", "hourly_cost": 0.5 * i} for i in range(10)]
+
+    table = pa.ipc.open_stream(
+        arrow_stream(to_columns(rows, ("namespace",)))
+    ).read_all()
+
+    assert pa.types.is_dictionary(table.schema.field("namespace").type)
+    assert table.to_pylist() == rows
+
+
+def test_row_endpoints_serve_columnar_payloads():
+    client = TestClient(app)
+    for path in ("/api/namespaces", "/api/pods"):
+        rows = client.get(path, params={"save_history": False}).json()
+        payload = client.get(
+            path, params={"save_history": False, "format": "columnar"}
+        ).json()
+
+        assert payload["format"] == "columnar"
+        assert payload["snapshot_version"] == rows["snapshot_version"]
+        assert from_columns(payload) == rows["data"]
+
+
+def test_pods_are_served_as_arrow_streams():
+    pa = pytest.importorskip("pyarrow")
+    client = TestClient(app)
+    namespace = client.get("/api/pods", params={"save_history": False}).json()["data"][
+        0
+    ]["namespace"]
+    params = {"save_history": False, "namespace": namespace}
+    rows = client.get("/api/pods", params=params).json()
+
+    response = client.get("/api/pods", params={**params, "format": "arrow"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert response.headers["x-snapshot-version"] == str(rows["snapshot_version"])
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert pa.types.is_map(table.schema.field("labels").type)
+    assert [
+        {**row, "labels": dict(row["labels"])} for row in table.to_pylist()
+    ] == rows["data"]
+
+
+def test_arrow_without_pyarrow(monkeypatch):
+    def missing(feature):
+        raise RuntimeError(f"{feature} needs the pyarrow package")
+
+    monkeypatch.setattr(routes, "load_pyarrow", missing)
+    response = TestClient(app).get(
+        "/api/pods", params={"save_history": False, "format": "arrow"}
+    )
+
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from app.services.retention import RetentionScheduler
+
+
+@pytest.fixture
+def backend():
+    """Retention is exercised against SQLite's incremental vacuum"""
+    return "sqlite"
+
+
+def test_old_samples_are_purged_in_chunks(run_storage, make_pods):
+    """Expired rows go in bounded chunks while recent rows are kept"""
+
+    async def test(db_service):
+        now = int(time.time())
+        old = now - 10 * 86400
+        for offset in range(5):
+            await db_service.save_pod_metrics(make_pods(100, "old"), old + offset)
+        await db_service.save_pod_metrics(make_pods(10, "new"), now)
+
+        scheduler = RetentionScheduler(
+            db_service,
+            policies={"raw": 7, "1h": 7, "1d": 7},
+            chunk_size=120,
+            vacuum_pages=50,
+        )
+        purged = await scheduler.run_once()
+
+        db = await db_service._connection()
+        remaining = await db.execute_fetchall("SELECT COUNT(*) FROM pod_samples")
+        pods = await db.execute_fetchall("SELECT COUNT(*) FROM pods")
+        return purged, remaining[0][0], pods[0][0], scheduler.stats
+
+    purged, remaining, pods, stats = run_storage(test)
+
+    assert purged["raw"] == 500
+    assert remaining == 10
+    # Pods whose samples and rollups all expired are pruned from the
+    # dimension table
+    assert pods == 10
+    assert stats["rows_purged"]["raw"] == 500
+    assert stats["runs"] == 1
+    assert 0 < stats["max_lock_seconds"] <= stats["lock_seconds"]
+
+
+def test_pods_with_rollups_are_not_pruned(run_storage, make_pods):
+    """A pod stays interned while its rollups outlive its raw samples"""
+
+    async def test(db_service):
+        old = int(time.time()) - 10 * 86400
+        await db_service.save_pod_metrics(make_pods(5, "old"), old)
+
+        scheduler = RetentionScheduler(db_service, policies={"raw": 7})
+        await scheduler.run_once()
+        return await db_service.get_top_pods(hours=24 * 30)
+
+    top = run_storage(test)
+
+    assert sorted(row["pod"] for row in top) == [f"old-{i}" for i in range(5)]
+
+
+def test_rollups_outlive_raw_samples(run_storage):
+    """Each tier keeps history for its own retention window"""
+
+    async def test(db_service):
+        old = int(time.time()) - 30 * 86400
+        await db_service.save_namespace_metrics(
+            [
+                {
+                    "namespace": "ns-0",
+                    "cpu_mcores": 1,
+                    "memory_bytes": 1,
+                    "hourly_cost": 1,
+                }
+            ],
+            old,
+        )
+        await RetentionScheduler(db_service, policies={"raw": 7, "1h": 90}).run_once()
+
+        db = await db_service._connection()
+        raw = await db.execute_fetchall("SELECT COUNT(*) FROM namespace_samples")
+        hourly = await db.execute_fetchall("SELECT COUNT(*) FROM namespace_rollup_1h")
+        namespaces = await db.execute_fetchall("SELECT name FROM namespaces")
+        return raw[0][0], hourly[0][0], [row[0] for row in namespaces]
+
+    raw, hourly, namespaces = run_storage(test)
+
+    assert raw == 0
+    assert hourly == 1
+    assert namespaces == ["ns-0"]
+
+
+def test_incremental_vacuum_shrinks_file(run_storage, make_pods, tmp_path):
+    """Purged pages are returned to the filesystem"""
+    path = tmp_path / "costkube.db"
+
+    async def test(db_service):
+        old = int(time.time()) - 30 * 86400
+        for offset in range(20):
+            await db_service.save_pod_metrics(make_pods(500), old + offset)
+        db = await db_service._connection()
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = os.path.getsize(path)
+
+        scheduler = RetentionScheduler(db_service, policies={"raw": 7})
+        await scheduler.run_once()
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return before, os.path.getsize(path), scheduler.stats
+
+    before, after, stats = run_storage(test)
+
+    assert stats["bytes_reclaimed"] > 0
+    assert after < before / 2
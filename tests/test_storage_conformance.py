@@ -0,0 +1,367 @@
+"""
+Conformance tests every storage backend must pass
+
+Each test runs against every backend in STORAGE_BACKENDS through the shared
+``run_storage`` fixture; optional backends whose package is not installed
+are skipped.
+"""
+
+import importlib
+import time
+
+import pytest
+
+from app.services.database import STORAGE_BACKENDS, create_storage_backend
+from app.services.retention import RetentionScheduler
+from app.services.storage import decode_cursor, encode_cursor
+
+HOUR = 3600
+
+
+def namespace_row(namespace: str, hourly_cost: float, cpu: float = 100.0):
+    return {
+        "namespace": namespace,
+        "cpu_mcores": cpu,
+        "memory_bytes": 2**30,
+        "hourly_cost": hourly_cost,
+    }
+
+
+def pod_row(namespace: str, pod: str, hourly_cost: float = 0.01):
+    return {**namespace_row(namespace, hourly_cost), "pod": pod}
+
+
+def test_backends_are_importable():
+    """Every registered backend names a real StorageBackend subclass"""
+    from app.services.storage import StorageBackend
+
+    for name, (module, class_name, _) in STORAGE_BACKENDS.items():
+        storage_class = getattr(importlib.import_module(module), class_name)
+        assert issubclass(storage_class, StorageBackend)
+        assert storage_class.name == name
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_storage_backend("cassandra")
+
+
+def test_namespace_history_round_trip(run_storage):
+    """Saved snapshots read back in time order, optionally filtered"""
+
+    async def test(storage):
+        now = int(time.time())
+        await storage.save_namespace_metrics(
+            [namespace_row("shop", 0.5), namespace_row("search", 0.2)], now - 120
+        )
+        await storage.save_namespace_metrics([namespace_row("shop", 0.7)], now - 60)
+
+        everything = await storage.get_namespace_history(hours=1)
+        shop = await storage.get_namespace_history("shop", hours=1)
+        return everything, shop
+
+    everything, shop = run_storage(test)
+
+    assert len(everything) == 3
+    assert [row["hourly_cost"] for row in shop] == [0.5, 0.7]
+    assert shop[0]["monthly_cost"] == 365.0
+    assert shop[0]["memory_bytes"] == 2**30
+    assert len(shop[0]["timestamp"]) == len("2024-01-01 00:00:00")
+    assert [row["timestamp"] for row in everything] == sorted(
+        row["timestamp"] for row in everything
+    )
+
+
+def test_history_pages_follow_keyset_order(run_storage):
+    """Pages tile the window exactly, even across rows sharing a timestamp"""
+
+    async def test(storage):
+        now = int(time.time())
+        for ts in range(now - 600, now, 60):
+            await storage.save_namespace_metrics(
+                [namespace_row(f"ns-{i}", i + ts % 60) for i in range(3)], ts
+            )
+
+        pages, after = [], None
+        while True:
+            rows, after = await storage.get_namespace_history_page(
+                hours=1, after=after, limit=4
+            )
+            pages.append(rows)
+            if after is None:
+                break
+            after = decode_cursor(encode_cursor(after))
+
+        shop, _ = await storage.get_namespace_history_page("ns-1", hours=1, limit=100)
+        streamed = [
+            row async for row in storage.stream_namespace_history(hours=1, page_size=7)
+        ]
+        return pages, shop, streamed, await storage.get_namespace_history(hours=1)
+
+    pages, shop, streamed, everything = run_storage(test)
+
+    paged = [row for page in pages for row in page]
+    keys = [(row["timestamp"], row["namespace"]) for row in paged]
+    assert all(len(page) == 4 for page in pages[:-1])
+    # Ties on timestamp are ordered by the backend's series key
+    assert [ts for ts, _ in keys] == sorted(ts for ts, _ in keys)
+    assert len(set(keys)) == len(keys) == 30
+    assert set(keys) == {(row["timestamp"], row["namespace"]) for row in everything}
+    assert streamed == paged
+    assert [row["namespace"] for row in shop] == ["ns-1"] * 10
+    assert "_ts" not in paged[0] and "_series" not in paged[0]
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "WzFd", "WyJhIiwxXQ"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cost_trends_average_each_bucket(run_storage):
+    """Each trend point is the summed average hourly cost of its bucket"""
+
+    async def test(storage):
+        hour = int(time.time()) // HOUR * HOUR - HOUR
+        for offset, cost in ((0, 1.0), (600, 3.0)):
+            await storage.save_namespace_metrics(
+                [namespace_row("a", cost), namespace_row("b", 10.0)], hour + offset
+            )
+        return await storage.get_cost_trends(hours=24)
+
+    trends = run_storage(test)
+
+    assert trends["resolution"] == "1h"
+    assert trends["costs"] == [pytest.approx(12.0)]
+    assert trends["timestamps"][0].endswith(":00:00")
+
+
+def test_replaced_sample_is_not_double_counted(run_storage):
+    """Saving a series at an existing timestamp replaces its sample"""
+
+    async def test(storage):
+        ts = int(time.time())
+        await storage.save_namespace_metrics([namespace_row("a", 1.0)], ts)
+        await storage.save_namespace_metrics([namespace_row("a", 3.0)], ts)
+        return (
+            await storage.get_namespace_history(hours=1),
+            await storage.get_cost_trends(hours=24),
+        )
+
+    history, trends = run_storage(test)
+
+    assert [row["hourly_cost"] for row in history] == [3.0]
+    assert trends["costs"] == [3.0]
+
+
+def test_top_namespaces_match_raw_averages(run_storage):
+    """Top-N over raw, hourly and daily segments equals the raw average"""
+
+    async def test(storage):
+        # Samples sit halfway between window boundaries, so the window can
+        # drift while the test runs without changing which samples it holds
+        now = int(time.time())
+        samples = {}
+        for ts in range(now - 450 - 2 * 86400, now - 450, 900):
+            rows = [namespace_row(f"ns-{i}", 0.01 * (i + 1) + ts % 7) for i in range(3)]
+            samples[ts] = rows
+            await storage.save_namespace_metrics(rows, ts)
+
+        results = {}
+        for hours in (1, 30):
+            since = now - hours * HOUR
+            expected = {}
+            for ts, rows in samples.items():
+                if ts >= since:
+                    for row in rows:
+                        expected.setdefault(row["namespace"], []).append(
+                            row["hourly_cost"]
+                        )
+            top = await storage.get_top_namespaces(limit=2, hours=hours)
+            results[hours] = (top, expected)
+        return results
+
+    for top, expected in run_storage(test).values():
+        averages = {ns: sum(costs) / len(costs) for ns, costs in expected.items()}
+        ranked = sorted(averages, key=averages.get, reverse=True)[:2]
+        assert [row["namespace"] for row in top] == ranked
+        for row in top:
+            assert row["avg_hourly_cost"] == pytest.approx(averages[row["namespace"]])
+            assert row["avg_monthly_cost"] == pytest.approx(
+                averages[row["namespace"]] * 730
+            )
+
+
+def test_pod_history_round_trip(run_storage):
+    """One pod's samples read back in time order"""
+
+    async def test(storage):
+        now = int(time.time())
+        for offset, cost in ((120, 0.1), (60, 0.2)):
+            await storage.save_pod_metrics(
+                [pod_row("shop", "web-1", cost), pod_row("shop", "web-2", 0.5)],
+                now - offset,
+            )
+        return await storage.get_pod_history("shop", "web-1", hours=1)
+
+    history = run_storage(test)
+
+    assert [row["hourly_cost"] for row in history] == [0.1, 0.2]
+    assert history[0]["pod"] == "web-1"
+    assert history[0]["monthly_cost"] == 73.0
+
+
+def test_pod_history_pages_cover_every_pod(run_storage):
+    """Pod pages tile the window, including pods sharing a name across namespaces"""
+
+    async def test(storage):
+        now = int(time.time())
+        pods = [("a", "web-1"), ("a", "web-2"), ("a-b", "web-1"), ("b", "db")]
+        for ts in range(now - 300, now, 60):
+            await storage.save_pod_metrics(
+                [pod_row(namespace, pod, ts % 7) for namespace, pod in pods], ts
+            )
+
+        paged = [
+            row
+            async for page in storage.history_pages("pods", hours=1, page_size=3)
+            for row in page
+        ]
+        scoped, _ = await storage.get_pod_history_page("a", hours=1, limit=100)
+        return paged, scoped
+
+    paged, scoped = run_storage(test)
+
+    keys = [(row["timestamp"], row["namespace"], row["pod"]) for row in paged]
+    assert len(set(keys)) == len(keys) == 20
+    assert [ts for ts, _, _ in keys] == sorted(ts for ts, _, _ in keys)
+    assert {row["namespace"] for row in scoped} == {"a"}
+    assert len(scoped) == 10
+    assert paged[0]["monthly_cost"] == round(paged[0]["hourly_cost"] * 730, 2)
+
+
+def test_top_pods_match_raw_averages(run_storage):
+    """Top-N pods from rollups equals the raw average over the aligned window"""
+
+    async def test(storage):
+        now = int(time.time())
+        samples = {}
+        for ts in range(now - 450 - 2 * 86400, now - 450, 900):
+            rows = [
+                pod_row(f"ns-{i % 2}", f"api-{i}", 0.01 * (i + 1) + ts % 7)
+                for i in range(4)
+            ]
+            samples[ts] = rows
+            await storage.save_pod_metrics(rows, ts)
+
+        results = {}
+        for hours, namespace in ((1, None), (30, None), (30, "ns-1")):
+            start = (now - hours * HOUR) // HOUR * HOUR
+            expected = {}
+            for ts, rows in samples.items():
+                for row in rows:
+                    if ts >= start and namespace in (None, row["namespace"]):
+                        expected.setdefault(row["pod"], []).append(row["hourly_cost"])
+            top = await storage.get_top_pods(limit=3, hours=hours, namespace=namespace)
+            results[(hours, namespace)] = (top, expected)
+        return results
+
+    for top, expected in run_storage(test).values():
+        averages = {pod: sum(costs) / len(costs) for pod, costs in expected.items()}
+        ranked = sorted(averages, key=averages.get, reverse=True)[:3]
+        assert [row["pod"] for row in top] == ranked
+        for row in top:
+            assert row["avg_hourly_cost"] == pytest.approx(averages[row["pod"]])
+            assert row["workload"] == "api"
+
+
+def test_workload_trends_sum_their_pods(run_storage):
+    """Each trend point sums the average cost of the workload's pods"""
+
+    async def test(storage):
+        hour = int(time.time()) // HOUR * HOUR - HOUR
+        for offset, cost in ((0, 1.0), (600, 3.0)):
+            await storage.save_pod_metrics(
+                [
+                    pod_row("shop", "web-7d4b9c8f6-x7k2p", cost),
+                    pod_row("shop", "web-7d4b9c8f6-q9m4z", 10.0),
+                    pod_row("shop", "db-0", 100.0),
+                ],
+                hour + offset,
+            )
+        return await storage.get_workload_trends("shop", "web", hours=24)
+
+    trends = run_storage(test)
+
+    assert trends["resolution"] == "1h"
+    assert trends["costs"] == [pytest.approx(12.0)]
+    assert trends["pods"] == [2]
+
+
+def test_replaced_pod_sample_is_not_double_counted(run_storage):
+    """Re-saving a pod snapshot replaces its share of the rollups"""
+
+    async def test(storage):
+        ts = int(time.time())
+        await storage.save_pod_metrics(
+            [pod_row("a", "web-1", 1.0), pod_row("a", "gone-1", 5.0)], ts
+        )
+        await storage.save_pod_metrics([pod_row("a", "web-1", 3.0)], ts)
+        return await storage.get_top_pods(hours=1)
+
+    top = run_storage(test)
+
+    # Pods missing from the second snapshot keep their first sample
+    assert [(row["pod"], row["avg_hourly_cost"]) for row in top] == [
+        ("gone-1", 5.0),
+        ("web-1", 3.0),
+    ]
+
+
+def test_retention_purges_each_tier(run_storage):
+    """The retention scheduler drives every backend's chunked deletes"""
+
+    async def test(storage):
+        now = int(time.time())
+        for ts in (now - 20 * 86400, now - 10 * 86400, now):
+            await storage.save_namespace_metrics([namespace_row("a", 1.0)], ts)
+            await storage.save_pod_metrics(
+                [pod_row("a", f"web-{i}") for i in range(5)], ts
+            )
+
+        scheduler = RetentionScheduler(
+            storage, policies={"raw": 7, "1h": 15, "1d": 365}, chunk_size=3
+        )
+        purged = await scheduler.run_once()
+        return purged, await storage.get_namespace_history(hours=24 * 30)
+
+    purged, history = run_storage(test)
+
+    # Two old snapshots of one namespace and five pods
+    assert purged["raw"] == 2 + 10
+    # One hourly bucket of the namespace and of each pod fell outside the
+    # 15-day window
+    assert purged["1h"] == 1 + 5
+    assert purged["1d"] == 0
+    assert len(history) == 1
+
+
+def test_cleanup_old_data(run_storage):
+    """cleanup_old_data applies one cutoff to every table"""
+
+    async def test(storage):
+        now = int(time.time())
+        await storage.save_namespace_metrics(
+            [namespace_row("a", 1.0)], now - 40 * 86400
+        )
+        await storage.save_namespace_metrics([namespace_row("a", 2.0)], now)
+        await storage.cleanup_old_data(days=30, chunk_size=1)
+        return (
+            await storage.get_namespace_history(hours=24 * 60),
+            await storage.get_top_namespaces(hours=24 * 60),
+        )
+
+    history, top = run_storage(test)
+
+    assert [row["hourly_cost"] for row in history] == [2.0]
+    assert top[0]["avg_hourly_cost"] == 2.0
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.routes import ConnectionManager
+from app.main import app
+from app.services.metrics_collector import MetricsSnapshot
+from app.services.topics import TopicFeed, parse_topic
+
+
+def make_snapshot(version: int, pods=()) -> MetricsSnapshot:
+    return MetricsSnapshot(
+        version=version,
+        collected_at=time.time(),
+        namespaces=({"namespace": "team-a", "hourly_cost": 0.01 * version},),
+        pods=tuple(pods),
+    )
+
+
+def make_pods(costs):
+    return [
+        {"namespace": namespace, "pod": pod, "hourly_cost": cost}
+        for (namespace, pod), cost in costs.items()
+    ]
+
+
+class SlowSocket:
+    """Accepts instantly, then takes ``delay`` seconds per frame sent"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.frames.append(json.loads(frame)["snapshot_version"])
+
+
+def test_slow_clients_skip_to_the_newest_frame():
+    """A slow consumer drops stale frames without delaying fast ones"""
+    manager = ConnectionManager()
+
+    async def run():
+        fast, slow = SlowSocket(), SlowSocket(delay=0.05)
+        senders = []
+        for socket in (fast, slow):
+            subscriber = await manager.connect(socket)
+            senders.append(asyncio.create_task(manager.send_frames(subscriber)))
+
+        for version in range(1, 6):
+            manager.push_snapshot(make_snapshot(version))
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.15)
+        for sender in senders:
+            sender.cancel()
+        return fast.frames, slow.frames
+
+    fast, slow = asyncio.run(run())
+
+    assert fast == [1, 2, 3, 4, 5]
+    assert slow[0] == 1 and slow[-1] == 5 and len(slow) < 5
+    assert manager.stats["frames_dropped"] == 5 - len(slow)
+    assert manager.stats["broadcasts"] == 5
+
+
+def test_snapshots_are_pushed_without_polling(monkeypatch):
+    manager = ConnectionManager()
+    manager.push_snapshot(make_snapshot(1))
+    monkeypatch.setattr(routes, "manager", manager)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/metrics") as websocket:
+        # The latest snapshot arrives on connect, the next one when published
+        assert websocket.receive_json()["snapshot_version"] == 1
+        websocket.portal.call(manager.push_snapshot, make_snapshot(2))
+        update = websocket.receive_json()
+        assert update["type"] == "metrics_update"
+        assert update["snapshot_version"] == 2
+        assert update["data"][0]["namespace"] == "team-a"
+
+        # Old clients that still ping get the latest snapshot back
+        websocket.send_text("ping")
+        assert websocket.receive_json()["snapshot_version"] == 2
+
+    assert manager.info()["connections"] == 0
+
+
+def test_topics_send_a_full_frame_then_only_changed_rows():
+    feed = TopicFeed()
+    pods = {("team-a", "web-1"): 0.1, ("team-a", "web-2"): 0.2, ("team-b", "db"): 1.0}
+    feed.publish(make_snapshot(1, make_pods(pods)), ["pods:team-a"])
+
+    frame, version = feed.frame("pods:team-a", 0)
+    full = json.loads(frame)
+    assert (full["type"], full["key"], version) == ("snapshot", "pod", 1)
+    assert {row["pod"] for row in full["rows"]} == {"web-1", "web-2"}
+
+    # Another namespace's pods changing is not a change to this topic
+    pods[("team-b", "db")] = 2.0
+    feed.publish(make_snapshot(2, make_pods(pods)), ["pods:team-a"])
+    assert feed.frame("pods:team-a", 1) == (None, 1)
+
+    pods[("team-a", "web-1")] = 0.5
+    del pods[("team-a", "web-2")]
+    feed.publish(make_snapshot(3, make_pods(pods)), ["pods:team-a"])
+
+    frame, version = feed.frame("pods:team-a", 1)
+    delta = json.loads(frame)
+    assert (delta["type"], delta["base_version"], version) == ("delta", 1, 3)
+    assert delta["upserts"] == [
+        {"namespace": "team-a", "pod": "web-1", "hourly_cost": 0.5}
+    ]
+    assert delta["removed"] == ["web-2"]
+
+    # A subscriber that missed the base version is resent everything
+    assert json.loads(feed.frame("pods:team-a", 0)[0])["type"] == "snapshot"
+    assert feed.stats == {"full_frames": 2, "delta_frames": 1}
+
+
+def test_topic_names_are_validated():
+    assert parse_topic("cluster") == ("cluster", "")
+    assert parse_topic("namespace:team-a") == ("namespace", "team-a")
+    assert parse_topic("pods:team-a") == ("pods", "team-a")
+    assert parse_topic("pods:") is None
+    assert parse_topic("nodes:worker-1") is None
+
+
+def test_subscribers_receive_deltas(monkeypatch):
+    manager = ConnectionManager()
+    pods = {("team-a", "web-1"): 0.1, ("team-a", "web-2"): 0.2}
+    manager.push_snapshot(make_snapshot(1, make_pods(pods)))
+    monkeypatch.setattr(routes, "manager", manager)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/metrics") as websocket:
+        # Legacy full frame until the client subscribes
+        assert websocket.receive_json()["type"] == "metrics_update"
+        websocket.send_json(
+            {"action": "subscribe", "topics": ["cluster", "pods:team-a", "bogus"]}
+        )
+        frames = [websocket.receive_json() for _ in range(3)]
+        assert frames[0] == {"type": "error", "message": "Unknown topic: bogus"}
+        assert {frame["topic"]: frame["type"] for frame in frames[1:]} == {
+            "cluster": "snapshot",
+            "pods:team-a": "snapshot",
+        }
+
+        pods[("team-a", "web-2")] = 0.3
+        websocket.portal.call(manager.push_snapshot, make_snapshot(2, make_pods(pods)))
+        deltas = {}
+        for _ in range(2):
+            frame = websocket.receive_json()
+            deltas[frame["topic"]] = frame
+        assert deltas["pods:team-a"]["upserts"] == [
+            {"namespace": "team-a", "pod": "web-2", "hourly_cost": 0.3}
+        ]
+        assert deltas["pods:team-a"]["base_version"] == 1
+        assert deltas["cluster"]["type"] == "delta"
+
+        websocket.send_json({"action": "resync", "topics": ["pods:team-a"]})
+        resent = websocket.receive_json()
+        assert (resent["type"], resent["version"]) == ("snapshot", 2)
+        assert len(resent["rows"]) == 2
+
+
+def test_malformed_messages_get_an_error_notice(monkeypatch):
+    manager = ConnectionManager()
+    manager.push_snapshot(make_snapshot(1))
+    monkeypatch.setattr(routes, "manager", manager)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/metrics") as websocket:
+        assert websocket.receive_json()["type"] == "metrics_update"
+        for message in (
+            {"action": ["subscribe"]},
+            {"action": "subscribe", "topics": "cluster"},
+            {"action": "subscribe", "topics": [1]},
+            ["subscribe"],
+        ):
+            websocket.send_json(message)
+            assert websocket.receive_json() == {
+                "type": "error",
+                "message": "Invalid message",
+            }
+
+        # The connection survives and still serves subscriptions
+        websocket.send_json({"action": "subscribe", "topics": ["cluster"]})
+        assert websocket.receive_json()["topic"] == "cluster"